@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+
+from .suite import BASELINE, BENCHMARKS, REPEAT, SIZES, TOLERANCE, compare, read_results, report, run, write_results
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get command line arguments parser"""
+    parser = argparse.ArgumentParser(prog='benchmarks', description='Benchmark parser, encoder and GUI run path')
+    parser.add_argument(
+        '-s', '--sizes', type=int, nargs='+', default=SIZES, help='program sizes in lines, eg: 100 1000 10000000'
+    )
+    parser.add_argument(
+        '-b', '--benchmark', nargs='+', choices=list(BENCHMARKS), help='benchmarks to run, all by default'
+    )
+    parser.add_argument(
+        '-r', '--repeat', type=int, default=REPEAT, help='samples of each benchmark, median one is kept'
+    )
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='JSON file of results')
+    parser.add_argument('--baseline', default=BASELINE, help='local JSON file of results to compare with')
+    parser.add_argument(
+        '--tolerance', type=float, default=TOLERANCE,
+        help='allowed relative slowdown and memory growth, doubled for sizes below 10000 lines'
+    )
+    parser.add_argument(
+        '--normalize', action='store_true', help='compare throughput relative to the median change of all benchmarks'
+    )
+    parser.add_argument(
+        '--save', '--save-baseline', dest='save_baseline', action='store_true',
+        help='store results as the new local baseline'
+    )
+    parser.add_argument(
+        '--require-baseline', action='store_true',
+        help='exit with status 2 if there is no baseline to compare with, eg: on CI'
+    )
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = get_parser().parse_args(argv)
+    missing = not args.save_baseline and not os.path.exists(args.baseline)
+    if missing and args.require_baseline:
+        # checked before running, so missing baseline does not pass silently after a long run
+        print(f"no baseline at {args.baseline}, run with --save to store one", file=sys.stderr)
+        return 2
+    results = run(args.sizes, args.benchmark, args.repeat, report)
+    write_results(results, args.output)
+    if args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if missing:
+        print(f"no baseline at {args.baseline}, run with --save to store one", file=sys.stderr)
+        return 0
+    regressions = compare(results, read_results(args.baseline), args.tolerance, args.normalize)
+    for result, base, reason in regressions:
+        print(
+            f"REGRESSION {result.name} at {result.size:,} lines: {reason} "
+            f"({base.throughput:,.0f} -> {result.throughput:,.0f} lines/s, "
+            f"{base.peak_memory / 1024:,.0f} -> {result.peak_memory / 1024:,.0f} KiB)",
+            file=sys.stderr
+        )
+    if regressions:
+        print(f"{len(regressions)} regressions against {args.baseline}", file=sys.stderr)
+        return 1
+    print(f"no regressions against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import random
+from typing import Dict, Iterator, List
+
+from py_assembler.lexer import BASE_PLUS_INDEX, DIRECT, IMMEDIATE, INDIRECT, REGULAR, RELATIVE
+from py_assembler.regs import REGISTERS
+from py_assembler.types import INSTRUCTIONS, iType, rType
+
+
+SEED = 2022
+
+NAMES = [name for name in REGISTERS if name != 'zero']
+
+
+def base_plus_index(rnd: random.Random) -> str:
+    """Get random base plus index operand, sum of its registers fits in a register field"""
+    base = rnd.choice(NAMES[:-1])
+    index = rnd.choice([name for name in NAMES if REGISTERS[base] + REGISTERS[name] < 32])
+    return f"[${base}+${index}]"
+
+
+# addressing mode of each class in REGS -> operand generator
+MODES = {
+    REGULAR: lambda r: f"${r.choice(NAMES)}",
+    IMMEDIATE: lambda r: f"#{r.randrange(32)}",
+    DIRECT: lambda r: f"[{r.randrange(32)}]",
+    INDIRECT: lambda r: f"[${r.choice(NAMES)}]",
+    BASE_PLUS_INDEX: base_plus_index,
+    RELATIVE: lambda r: f"[${r.choice(NAMES)}+{r.randrange(64)}]",
+}
+
+BRANCHES = frozenset({'beq', 'bne', 'blez', 'bqtz'})
+
+
+def get_operand(rnd: random.Random, mode: str = None) -> str:
+    """Get random register operand in addressing mode, random mode if it is not passed"""
+    return MODES[mode or rnd.choice(list(MODES))](rnd)
+
+
+def get_statement(rnd: random.Random, op: str, mode: str) -> str:
+    """Get random statement of mnemonic, its first register operand is in required addressing mode"""
+    typ = INSTRUCTIONS[op]
+    if isinstance(typ, rType):
+        operands = [get_operand(rnd, mode), get_operand(rnd), get_operand(rnd)]
+        if op in ('sll', 'srl', 'sra'):
+            operands.append(f"#{rnd.randrange(32)}")
+    elif isinstance(typ, iType):
+        operands = [get_operand(rnd, mode), get_operand(rnd), f"#{rnd.randrange(1 << 15)}"]
+    elif op in BRANCHES:
+        operands = [get_operand(rnd, REGULAR), get_operand(rnd, REGULAR), f"#{rnd.randrange(1 << 15)}"]
+        if op in ('blez', 'bqtz'):
+            del operands[1]
+    else:
+        operands = [f"#{rnd.randrange(1 << 20)}" if mode == IMMEDIATE else get_operand(rnd, REGULAR)]
+    return f"{op} {','.join(operands)};"
+
+
+def iter_program(size: int, seed: int = SEED) -> Iterator[str]:
+    """Yield lines of synthetic program, every mnemonic of INSTRUCTIONS is used in every addressing mode of REGS
+    in turn, so all combinations appear in programs of at least len(INSTRUCTIONS) * len(MODES) lines"""
+    rnd = random.Random(seed)
+    combinations = [(op, mode) for op in INSTRUCTIONS for mode in MODES]
+    for index in range(size):
+        yield get_statement(rnd, *combinations[index % len(combinations)])
+
+
+def generate_program(size: int, seed: int = SEED) -> str:
+    """Get synthetic program of size lines"""
+    return '\n'.join(iter_program(size, seed)) + '\n'
+
+
+def generate_operands(size: int, seed: int = SEED) -> List[str]:
+    """Get operands of all addressing modes in turn, without $ as they are passed to get_register_type"""
+    rnd = random.Random(seed)
+    modes = list(MODES)
+    return [get_operand(rnd, modes[index % len(modes)]).replace('$', '') for index in range(size)]
+
+
+def count_mnemonics(program: str) -> Dict[str, int]:
+    """Get count of statements of each mnemonic in program"""
+    counts = dict.fromkeys(INSTRUCTIONS, 0)
+    for line in program.splitlines():
+        counts[line.split(None, 1)[0]] += 1
+    return counts
@@ -0,0 +1,205 @@
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from py_assembler.instruction import ENCODING_CACHE, Instruction
+from py_assembler.parse import instructions_parser
+from py_assembler.regs import get_register_type
+
+from .generators import generate_operands, generate_program
+
+
+SIZES = 100, 1000, 10_000, 100_000
+# baseline is machine specific, so it is kept next to the results of the local machine and is not committed
+BASELINE = 'benchmark_baseline.json'
+REPEAT = 7
+
+# allowed slowdown of throughput and growth of peak memory before a result is a regression
+TOLERANCE = 0.3
+# timings of small sizes are short and noisy, so their tolerance is multiplied
+SMALL_SIZE = 10_000
+SMALL_FACTOR = 2
+# peak memory of small sizes is dominated by allocator noise
+MEMORY_SLACK = 64 * 1024
+
+
+class TextBuffer:
+    """Headless replacement of Tk text widget, supports line based indexes used by the run menu"""
+
+    def __init__(self, text: str = ''):
+        self.lines = text.split('\n')
+
+    def index(self, index: str) -> str:
+        # end index of Tk text is the line after the last one
+        return f"{len(self.lines) + 1}.0"
+
+    def get(self, start: str, stop: str) -> str:
+        start, stop = int(start.split('.')[0]), int(stop.split('.')[0])
+        return ''.join(f"{line}\n" for line in self.lines[start - 1:stop - 1])
+
+    def replace_lines(self, start: int, stop: int, lines: List[str]) -> None:
+        self.lines[start:stop] = lines
+
+
+@dataclass
+class Result:
+    """Timing of benchmark on program of size lines"""
+    name: str
+    size: int
+    seconds: float
+    throughput: float
+    peak_memory: int
+
+
+def get_setup(size: int) -> Dict[str, object]:
+    """Get inputs of benchmarks, they are prepared once and are not measured"""
+    program = generate_program(size)
+    statements = [line.rstrip(';') for line in program.splitlines()]
+    instructions = [Instruction(inst) for inst in statements]
+    return {
+        'program': program,
+        'statements': statements,
+        'instructions': instructions,
+        'records': [inst.enc for inst in instructions],
+        'operands': generate_operands(size),
+    }
+
+
+def get_insert_results(setup: dict) -> Callable[[], object]:
+    """Get output path of the GUI run menu on headless buffers, raises ImportError if GUI dependencies are missing"""
+    # gui imports tkinter and matplotlib, but no window is created
+    from gui.menu.run import insert_results
+    return cold(lambda: insert_results(TextBuffer(setup['program']), TextBuffer()))
+
+
+def cold(func: Callable[[], object]) -> Callable[[], object]:
+    """Get function that runs with empty encoding cache, so each run encodes the whole program"""
+    def run():
+        ENCODING_CACHE.clear()
+        return func()
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[dict], Callable[[], object]]] = {
+    'get_register_type': lambda setup: lambda: [get_register_type(i) for i in setup['operands']],
+    'instruction': lambda setup: cold(lambda: [Instruction(i) for i in setup['statements']]),
+    'instructions_parser': lambda setup: cold(lambda: instructions_parser(setup['program'])),
+    'get_full_repr': lambda setup: lambda: [enc.get_full_repr() for enc in setup['records']],
+    'get_hex_repr': lambda setup: lambda: [inst.get_hex_repr() for inst in setup['instructions']],
+    'insert_results': get_insert_results,
+}
+
+
+def measure(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Get median time of single run, small inputs run many times per sample"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat, number)) / number
+
+
+def measure_memory(func: Callable[[], object]) -> int:
+    """Get peak memory allocated while running, it is measured in separate run as tracing slows it down"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(
+        sizes: Iterable[int] = SIZES,
+        names: Iterable[str] = None,
+        repeat: int = REPEAT,
+        report: Callable[[Result], None] = None
+) -> List[Result]:
+    """Run benchmarks on programs of sizes, benchmarks whose dependencies are not installed are skipped"""
+    results = []
+    for size in sizes:
+        setup = get_setup(size)
+        for name in names or BENCHMARKS:
+            try:
+                func = BENCHMARKS[name](setup)
+            except ImportError as e:
+                print(f"{name} skipped: {e}", file=sys.stderr)
+                continue
+            seconds = measure(func, repeat)
+            result = Result(name, size, seconds, size / seconds, measure_memory(func))
+            results.append(result)
+            if report:
+                report(result)
+    return results
+
+
+def get_environment() -> dict:
+    """Get description of machine results were taken on"""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+
+
+def write_results(results: List[Result], path: str) -> None:
+    """Write results with environment as JSON"""
+    data = {'environment': get_environment(), 'results': [asdict(result) for result in results]}
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.write('\n')
+
+
+def read_results(path: str) -> List[Result]:
+    """Read results written by write_results"""
+    with open(path) as f:
+        return [Result(**result) for result in json.load(f)['results']]
+
+
+def get_tolerance(size: int, tolerance: float = TOLERANCE) -> float:
+    """Get tolerance of results of size, small sizes are allowed larger changes"""
+    return tolerance * SMALL_FACTOR if size < SMALL_SIZE else tolerance
+
+
+def compare(
+        results: List[Result],
+        baseline: List[Result],
+        tolerance: float = TOLERANCE,
+        normalize: bool = False
+) -> List[Tuple[Result, Result, str]]:
+    """Get (result, baseline result, reason) of each regression, results missing from baseline are skipped.
+    If normalize is set, throughput ratios are divided by their median, so a machine that is uniformly faster or
+    slower than the one of the baseline reports only benchmarks that slowed down relative to the others"""
+    previous: Dict[Tuple[str, int], Result] = {(i.name, i.size): i for i in baseline}
+    pairs = [(result, previous[key]) for result in results if (key := (result.name, result.size)) in previous]
+    scale = 1
+    if normalize and pairs:
+        scale = statistics.median(result.throughput / base.throughput for result, base in pairs)
+    regressions = []
+    for result, base in pairs:
+        allowed = get_tolerance(result.size, tolerance)
+        ratio = result.throughput / base.throughput / scale
+        if ratio < 1 - allowed:
+            regressions.append((result, base, f"throughput {ratio - 1:+.0%}"))
+        if result.peak_memory > base.peak_memory * (1 + allowed) + MEMORY_SLACK:
+            regressions.append((result, base, f"peak memory {result.peak_memory / base.peak_memory - 1:+.0%}"))
+    return regressions
+
+
+def format_result(result: Result) -> str:
+    """Get single line report of result"""
+    return (
+        f"{result.name:<20} {result.size:>10,} lines {result.seconds * 1000:>12.3f} ms "
+        f"{result.throughput:>14,.0f} lines/s {result.peak_memory / 1024:>12,.0f} KiB"
+    )
+
+
+def report(result: Result) -> None:
+    print(format_result(result), file=sys.stderr)
@@ -0,0 +1,61 @@
+import os
+from threading import Lock
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+
+# extensions of assembly sources shown in folders tree, directories are always shown
+SOURCE_EXTENSIONS = ('.asm', '.s', '.txt')
+
+
+class Entry(NamedTuple):
+    """Child of scanned directory"""
+    name: str
+    path: str
+    is_dir: bool
+
+
+def scan_directory(path: str, extensions: Iterable[str] = SOURCE_EXTENSIONS) -> List[Entry]:
+    """Get directories and source files of path, directories first, each group sorted by name.
+    Types of entries are read from the directory listing itself, so no extra system call is made per entry"""
+    extensions = tuple(extension.lower() for extension in extensions)
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            if is_dir or entry.name.lower().endswith(extensions):
+                entries.append(Entry(entry.name, entry.path, is_dir))
+    entries.sort(key=lambda entry: (not entry.is_dir, entry.name.casefold()))
+    return entries
+
+
+class DirectoryCache:
+    """Entries of scanned directories, they are reused while modification time of directory is unchanged.
+    It is safe to scan from worker threads"""
+
+    def __init__(self, extensions: Iterable[str] = SOURCE_EXTENSIONS):
+        self.extensions = tuple(extensions)
+        self._lock = Lock()
+        self._entries: Dict[str, Tuple[int, List[Entry]]] = {}
+
+    def scan(self, path: str) -> List[Entry]:
+        """Get entries of directory, it is scanned again only if it has changed since last scan"""
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        entries = scan_directory(path, self.extensions)
+        with self._lock:
+            self._entries[path] = mtime, entries
+        return entries
+
+    def invalidate(self, path: str = None) -> None:
+        """Remove cached entries of path, or of all directories if path is not passed"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
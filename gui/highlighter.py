@@ -0,0 +1,112 @@
+from tkinter import Label
+
+from py_assembler.highlight import DIRECTIVE, ERROR, IMMEDIATE, LABEL, MNEMONIC, REGISTER, STRING, analyze_text
+
+
+TAGS = {
+    MNEMONIC: {'foreground': '#569cd6'},
+    REGISTER: {'foreground': '#9cdcfe'},
+    IMMEDIATE: {'foreground': '#b5cea8'},
+    LABEL: {'foreground': '#dcdcaa'},
+    DIRECTIVE: {'foreground': '#c586c0'},
+    STRING: {'foreground': '#ce9178'},
+    ERROR: {'underline': True, 'foreground': '#f44747'},
+}
+
+
+class Highlighter:
+    """Highlight and diagnostics of editor text, only statements of visible lines are tagged, statements are analyzed
+    once per text and runs are debounced, so typing in large files does not re-lex the whole buffer"""
+    delay_ms = 150
+    # lines above and below visible region that are tagged as well, so short scrolls are already highlighted
+    margin = 20
+
+    def __init__(self, text):
+        self.text = text
+        # lines tagged since text was last changed, line numbers of other lines could be shifted by edits
+        self.tagged = set()
+        self.changed = True
+        # error message of each tagged line
+        self.errors = {}
+        self.job = None
+        for kind, options in TAGS.items():
+            text.tag_configure(kind, **options)
+        text.tag_raise(ERROR)
+
+        self.tooltip = Label(text, bg='#ffffe0', fg='black', relief='solid', borderwidth=1)
+        text.tag_bind(ERROR, '<Enter>', self.show_error)
+        text.tag_bind(ERROR, '<Leave>', lambda e: self.tooltip.place_forget())
+
+        text.bind('<<Modified>>', self.on_modified, add='+')
+        text.bind('<Configure>', self.schedule, add='+')
+        # scrolling changes visible lines, scrollbar of ScrolledText is still updated
+        self.scrollbar = getattr(text, 'vbar', None)
+        text.configure(yscrollcommand=self.on_scroll)
+        self.schedule()
+
+    def on_scroll(self, first, last):
+        if self.scrollbar is not None:
+            self.scrollbar.set(first, last)
+        self.schedule()
+
+    def on_modified(self, *args):
+        self.changed = True
+        self.schedule()
+
+    def schedule(self, *args):
+        """Highlight visible lines once there are no changes for delay"""
+        if self.job is not None:
+            self.text.after_cancel(self.job)
+        self.job = self.text.after(self.delay_ms, self.highlight)
+
+    def get_visible_lines(self):
+        first = int(self.text.index('@0,0').split('.')[0])
+        last = int(self.text.index(f'@0,{self.text.winfo_height()}').split('.')[0])
+        end = int(self.text.index('end-1c').split('.')[0])
+        return max(1, first - self.margin), min(end, last + self.margin)
+
+    def highlight(self):
+        self.job = None
+        if self.text.edit_modified():
+            # every handler of <<Modified>> has already seen the change, so flag is reset to report next edit
+            self.text.edit_modified(False)
+        first, last = self.get_visible_lines()
+        if self.changed:
+            self.changed = False
+            self.tagged.clear()
+            self.errors.clear()
+        if all(number in self.tagged for number in range(first, last + 1)):
+            return
+        # statements are split on ; as by the assembler, so region is extended to whole statements of visible lines
+        start = self.text.search(';', f'{first}.0', backwards=True, stopindex='1.0')
+        start = self.text.index(f'{start}+1c' if start else '1.0')
+        end = self.text.index(self.text.search(';', f'{last}.end', stopindex='end') or 'end-1c')
+        self.highlight_region(start, end)
+
+    def highlight_region(self, start, end):
+        """Tag statements between start and end indices by their analysis, statements with the same text are
+        analyzed once"""
+        lines = range(int(start.split('.')[0]), int(end.split('.')[0]) + 1)
+        for kind in TAGS:
+            self.text.tag_remove(kind, start, end)
+        for number in lines:
+            self.errors.pop(number, None)
+        for offset, spans, error in analyze_text(self.text.get(start, end)):
+            for first, last, kind in spans:
+                self.text.tag_add(kind, f'{start}+{offset + first}c', f'{start}+{offset + last}c')
+            if error is not None:
+                (first, last, kind), message = error
+                first = self.text.index(f'{start}+{offset + first}c')
+                last = self.text.index(f'{start}+{offset + last}c')
+                self.text.tag_add(kind, first, last)
+                # message is shown on every line of multi-line statement
+                for number in range(int(first.split('.')[0]), int(last.split('.')[0]) + 1):
+                    self.errors[number] = message
+        self.tagged.update(lines)
+
+    def show_error(self, event):
+        number = int(self.text.index(f'@{event.x},{event.y}').split('.')[0])
+        message = self.errors.get(number)
+        if message:
+            self.tooltip.configure(text=message)
+            self.tooltip.place(x=event.x + 10, y=event.y + 15)
@@ -34,13 +34,17 @@ class Edit:
         target = askstring('Find', 'Search String:')
 
         if target:
-            idx = '1.0'
-            while 1:
-                idx = self.text.search(target, idx, nocase=1, stopindex=END)
-                if not idx: break
-                lastidx = '%s+%dc' % (idx, len(target))
-                self.text.tag_add('found', idx, lastidx)
-                idx = lastidx
+            # text is searched once in python, matches are tagged with a single call
+            lines = self.text.get('1.0', 'end-1c').lower().split('\n')
+            target = target.lower()
+            ranges = []
+            for number, line in enumerate(lines, 1):
+                idx = line.find(target)
+                while idx != -1:
+                    ranges += ['%d.%d' % (number, idx), '%d.%d' % (number, idx + len(target))]
+                    idx = line.find(target, idx + len(target))
+            if ranges:
+                self.text.tag_add('found', *ranges)
             self.text.tag_config('found', foreground='white', background='blue')
 
     def __init__(self, text, root):
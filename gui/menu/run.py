@@ -1,33 +1,246 @@
-from tkinter import Menu, END
+from array import array
+from functools import partial
+from itertools import islice
+from tkinter import Menu, Toplevel, END, BOTH
+from tkinter.scrolledtext import ScrolledText
+from tkinter.messagebox import showerror
 
-from gui.visualizations import Graph
-from py_assembler.parse import instructions_parser
+from gui.tasks import BackgroundTask, run_in_background
+from gui.visualizations import show_graph
+from gui.widgets import ResultsView
+from py_assembler.hazards import analyze
+from py_assembler.incremental import IncrementalAssembler, get_layout, render_statements
+from py_assembler.instruction import private_cache
+from py_assembler.parse import instructions_parser, iter_statements, program_parser
+from py_assembler.profiling import Profiler
+from py_assembler.simulator import Memory, Simulator
+from py_assembler.summary import summarize
+from py_assembler.symbols import get_words
+
+
+def iter_text_chunks(txt, lines: int = 1000):
+    """Read editor text lazily in chunks of lines instead of copying whole content at once"""
+    last = int(txt.index(END).split('.')[0])
+    for start in range(1, last + 1, lines):
+        yield txt.get(f"{start}.0", f"{start + lines}.0")
 
 
 def insert_results(txt, cmd):
-    instructions = instructions_parser(txt.get(0.0, END))
-    cmd.delete("1.0", END)
-    for inst in instructions:
-        cmd.insert(END, f"\n{inst.inst} // {inst.get_hex_repr()} // {inst.get_bin_repr()}")
+    lines = render_statements([statement for _, statement in iter_statements(iter_text_chunks(txt))])
+    # whole output is written with a single insert
+    cmd.replace_lines(0, int(cmd.index(END).split('.')[0]), lines)
+
+
+class Runner:
+    """Re-assembles only statements edited since previous run on worker thread and patches their output lines"""
+    batch_lines = 500
+
+    def __init__(self, txt, cmd):
+        self.txt = txt
+        self.cmd = cmd
+        self.assembler = IncrementalAssembler()
+        self.dirty = True
+        self.task = None
+        self.pending = None
+        self.title = txt.winfo_toplevel().title()
+        txt.bind("<<Modified>>", self.on_modified, add="+")
+
+    def on_modified(self, *args):
+        if self.txt.edit_modified():
+            self.dirty = True
+            # reset flag, so next edit fires the event again
+            self.txt.edit_modified(False)
+
+    def run(self, *args):
+        if self.task is not None:
+            # run in progress is outdated by the new one
+            self.task.cancel()
+            self.task = None
+            self.dirty = True
+        self.flush()
+        if not self.dirty:
+            return
+        self.dirty = False
+        text = self.txt.get("1.0", END)
+        self.task = BackgroundTask(
+            self.cmd,
+            lambda task: self.assembler.prepare(text, task.progress),
+            self.on_done,
+            self.on_progress,
+            self.on_error,
+        ).start()
+
+    def on_progress(self, done, total):
+        self.txt.winfo_toplevel().title(f"{self.title} - assembling {done * 100 // max(total, 1)}%")
+
+    def on_error(self, error):
+        self.task = None
+        self.txt.winfo_toplevel().title(self.title)
+        showerror(title="Assembler", message=str(error))
+
+    def on_done(self, update):
+        self.task = None
+        self.txt.winfo_toplevel().title(self.title)
+        if update is None:
+            return
+        patch = self.assembler.commit(update)
+        lines = iter(patch.lines)
+        batch = list(islice(lines, self.batch_lines))
+        self.cmd.replace_lines(patch.start, patch.stop, batch)
+        self.pending = patch.start + len(batch), lines
+        self.cmd.after(1, self.insert_batch)
+
+    def insert_batch(self):
+        """Insert next batch of pending lines, then give the event loop a chance before the following one"""
+        if self.pending is None:
+            return
+        position, lines = self.pending
+        batch = list(islice(lines, self.batch_lines))
+        if not batch:
+            self.pending = None
+            return
+        self.cmd.insert(f"{position + 1}.0", "".join(f"{line}\n" for line in batch))
+        self.pending = position + len(batch), lines
+        self.cmd.after(1, self.insert_batch)
+
+    def flush(self):
+        """Insert all pending lines at once"""
+        if self.pending is None:
+            return
+        position, lines = self.pending
+        self.pending = None
+        self.cmd.insert(f"{position + 1}.0", "".join(f"{line}\n" for line in lines))
+
+
+def get_table_data(text):
+    statements, words, errors = [], array('I'), {}
+    program = [statement for _, statement in iter_statements((text, ))]
+    addresses, symbols, invalid = get_layout(program)
+    for position, (statement, address) in enumerate(zip(program, addresses)):
+        if position in invalid:
+            errors[len(statements)] = invalid[position].message
+            row = 0,
+        else:
+            try:
+                # labels and directives have no words, expanded pseudo instructions have a row per word
+                row = get_words(statement, address, symbols)
+            except Exception as e:
+                errors[len(statements)] = str(e) or e.__class__.__name__
+                row = 0,
+        for word in row:
+            statements.append(statement)
+            words.append(word)
+    return statements, words, errors
+
+
+def show_table(txt):
+    def on_done(data):
+        window = Toplevel()
+        window.title("Results")
+        ResultsView(window).set_data(*data)
+
+    run_in_background(
+        txt,
+        partial(get_table_data, txt.get(0.0, END)),
+        on_done,
+        on_error=lambda e: showerror(title="Assembler", message=str(e)),
+    )
+
+
+def get_results_data(text):
+    instructions = instructions_parser(text)
+    return summarize([i.op for i in instructions], [i.typ.avg_exc_time for i in instructions])
 
 
 def show_results(txt):
-    instructions = instructions_parser(txt.get(0.0, END))
-    Graph(
-        [i.op for i in instructions],
-        [i.typ.avg_exc_time for i in instructions],
-        "Result",
-        "Average Execution Time",
-        "Instructions",
-        "Time in ns",
+    run_in_background(
+        txt,
+        partial(get_results_data, txt.get(0.0, END)),
+        lambda data: show_graph(data, "Result", "Average Execution Time", "Instructions", "Time in ns"),
+        on_error=lambda e: showerror(title="Assembler", message=str(e)),
+    )
+
+
+def get_simulation_data(text):
+    program = program_parser(text)
+    memory = Memory()
+    # data section is loaded before running, so loads of data labels read their values
+    memory.load(program.data, program.data_base)
+    stats = Simulator(program.words, memory).run()
+    return summarize(stats.mnemonics, stats.cycles)
+
+
+def show_simulation(txt):
+    run_in_background(
+        txt,
+        partial(get_simulation_data, txt.get(0.0, END)),
+        lambda data: show_graph(data, "Simulation", "Executed Cycles", "Instructions", "Cycles"),
+        on_error=lambda e: showerror(title="Assembler", message=str(e)),
+    )
+
+
+def get_stalls_data(text, forwarding: bool = True):
+    instructions = instructions_parser(text)
+    report = analyze(inst.enc.word for inst in instructions)
+    return summarize([i.op for i in instructions], report.get_instruction_cycles(forwarding))
+
+
+def show_stalls(txt, forwarding: bool = True):
+    run_in_background(
+        txt,
+        partial(get_stalls_data, txt.get(0.0, END), forwarding),
+        lambda data: show_graph(
+            data,
+            f"Pipeline {'With' if forwarding else 'Without'} Forwarding",
+            f"Pipeline Cycles {'With' if forwarding else 'Without'} Forwarding",
+            "Instructions",
+            "Cycles",
+        ),
+        on_error=lambda e: showerror(title="Assembler", message=str(e)),
+    )
+
+
+def get_profile_data(text):
+    statements = [statement for _, statement in iter_statements((text, ))]
+    # profiler and empty cache of this thread, so every statement goes through all stages and other runs are not
+    # affected
+    profiler = Profiler()
+    with private_cache():
+        profiler.enable(detail=True)
+        try:
+            render_statements(statements)
+        finally:
+            profiler.disable()
+    return profiler.stats().format()
+
+
+def show_profile(txt):
+    def on_done(report):
+        window = Toplevel()
+        window.title("Profile")
+        view = ScrolledText(window, font="TkFixedFont", width=64)
+        view.insert(END, report)
+        view.pack(fill=BOTH, expand=True)
+
+    run_in_background(
+        txt,
+        partial(get_profile_data, txt.get(0.0, END)),
+        on_done,
+        on_error=lambda e: showerror(title="Assembler", message=str(e)),
     )
 
 
 def main(root, text, menubar, cmd):
+    runner = Runner(text, cmd)
     run_menu = Menu(menubar)
-    run_menu.add_command(label="Run", command=lambda: insert_results(text, cmd), accelerator="Ctrl+R")
+    run_menu.add_command(label="Run", command=runner.run, accelerator="Ctrl+R")
     run_menu.add_command(label="Graph", command=lambda: show_results(text), accelerator="Ctrl+R")
-    root.bind_all("<Control-r>", lambda _: insert_results(text, cmd))
+    run_menu.add_command(label="Results Table", command=lambda: show_table(text))
+    run_menu.add_command(label="Simulate", command=lambda: show_simulation(text))
+    run_menu.add_command(label="Pipeline Stalls", command=lambda: show_stalls(text))
+    run_menu.add_command(label="Pipeline Stalls Without Forwarding", command=lambda: show_stalls(text, False))
+    run_menu.add_command(label="Profile", command=lambda: show_profile(text))
+    root.bind_all("<Control-r>", runner.run)
     run_menu.add_separator()
     menubar.add_cascade(label="Debug", menu=run_menu)
     root.config(menu=menubar)
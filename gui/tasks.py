@@ -0,0 +1,70 @@
+import threading
+from queue import Empty, SimpleQueue
+
+
+class Cancelled(Exception):
+    """Raised inside worker when its task is cancelled"""
+
+
+class BackgroundTask:
+    """Run function on worker thread, progress and result are delivered to Tk thread by after polling"""
+    poll_ms = 50
+
+    def __init__(self, widget, func, on_done, on_progress=None, on_error=None):
+        self.widget = widget
+        self.func = func
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.cancelled = threading.Event()
+        self.queue = SimpleQueue()
+        self.thread = threading.Thread(target=self._work, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def progress(self, done, total):
+        """Report progress from worker, it raises Cancelled to stop the worker once task is cancelled"""
+        if self.cancelled.is_set():
+            raise Cancelled
+        self.queue.put(('progress', (done, total)))
+
+    def _work(self):
+        try:
+            self.queue.put(('done', self.func(self)))
+        except Cancelled:
+            self.queue.put(('cancelled', None))
+        except Exception as e:
+            self.queue.put(('error', e))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, value = self.queue.get_nowait()
+            except Empty:
+                break
+            if self.cancelled.is_set():
+                # results of cancelled task are discarded
+                if kind != 'progress':
+                    return
+            elif kind == 'progress':
+                if self.on_progress:
+                    self.on_progress(*value)
+            elif kind == 'done':
+                self.on_done(value)
+                return
+            elif kind == 'error':
+                if self.on_error:
+                    self.on_error(value)
+                return
+        self.widget.after(self.poll_ms, self._poll)
+
+
+def run_in_background(widget, func, on_done, on_error=None):
+    """Run func without arguments on worker thread, then call on_done with its result on Tk thread"""
+    return BackgroundTask(widget, lambda task: func(), on_done, on_error=on_error).start()
@@ -4,19 +4,66 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 
 
 class Graph(Toplevel):
-    def __init__(self, x, y, title, plot_title, x_label, y_label):
+    """Window of aggregated plots, it is redrawn in place by update instead of creating new window"""
+
+    def __init__(self, title, plot_title, x_label, y_label):
         super().__init__()
         self.title(title)
+        self.plot_title = plot_title
+        self.x_label = x_label
+        self.y_label = y_label
+
+        self.figure = Figure(figsize=(10, 7))
+        self.canvas = FigureCanvasTkAgg(self.figure, self)
+        NavigationToolbar2Tk(self.canvas, self)
+        self.mnemonics, self.types, self.windows, self.histogram = self.figure.subplots(2, 2).flat
+
+        self.canvas.get_tk_widget().pack(side=TOP, fill=BOTH, expand=1)
+
+    def update_summary(self, summary):
+        """Draw summary of py_assembler.summary, each plot has a bounded count of bars or points"""
+        for axes in (self.mnemonics, self.types, self.windows, self.histogram):
+            axes.clear()
+
+        self.figure.suptitle(f"{self.plot_title} - {summary.count:,} instructions, total {summary.total:,}")
+
+        self.mnemonics.bar(*summary.mnemonics)
+        self.mnemonics.set_title("Per Mnemonic")
+        self.mnemonics.set_xlabel(self.x_label)
+        self.mnemonics.set_ylabel(self.y_label)
+        self.mnemonics.tick_params(axis='x', labelrotation=90)
+
+        self.types.bar(*summary.types)
+        self.types.set_title("Per Type")
+        self.types.set_ylabel(self.y_label)
+
+        self.windows.step(*summary.windows, where='post')
+        self.windows.set_title(f"Per {summary.window} Bytes Window")
+        self.windows.set_xlabel("Address")
+        self.windows.set_ylabel(self.y_label)
+
+        labels, counts = summary.histogram
+        width = min((b - a for a, b in zip(labels, labels[1:])), default=1)
+        self.histogram.bar(labels, counts, width=width * 0.9, align='edge')
+        self.histogram.set_title("Histogram")
+        self.histogram.set_xlabel(self.y_label)
+        self.histogram.set_ylabel("Instructions")
+
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
+
 
-        figure = Figure()
-        figure_canvas = FigureCanvasTkAgg(figure, self)
-        NavigationToolbar2Tk(figure_canvas, self)
+# open graphs by title, re-running the same graph updates its window
+GRAPHS = {}
 
-        axes = figure.add_subplot()
-        axes.bar(x, y)
-        axes.axis('equal')
-        axes.set_title(plot_title)
-        axes.set_ylabel(y_label)
-        axes.set_xlabel(x_label)
 
-        figure_canvas.get_tk_widget().pack(side=TOP, fill=BOTH, expand=1)
+def show_graph(summary, title, plot_title, x_label, y_label):
+    """Show summary in graph window of title, the window is created once and reused while it is open"""
+    graph = GRAPHS.get(title)
+    if graph is None or not graph.winfo_exists():
+        graph = GRAPHS[title] = Graph(title, plot_title, x_label, y_label)
+    else:
+        graph.deiconify()
+        graph.lift()
+    graph.update_summary(summary)
+    return graph
@@ -1,8 +1,16 @@
 import os
+from functools import partial
+from itertools import islice
 from tkinter import Tk, Frame, TOP, BOTTOM, X, LEFT, RIGHT, Y, BOTH, NORMAL, DISABLED
 from tkinter.ttk import Treeview, Scrollbar
 from tkinter.scrolledtext import ScrolledText
 
+from gui.folders import SOURCE_EXTENSIONS, DirectoryCache, Entry
+from gui.highlighter import Highlighter
+from gui.tasks import run_in_background
+from py_assembler.disasm import BRANCHES, decode, signed
+from py_assembler.types import iType, rType
+
 
 class MainFrame(Tk):
     def __init__(self, *args, **kwargs):
@@ -16,6 +24,7 @@ class Editor(ScrolledText):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.pack(side=TOP, fill=X)
+        self.highlighter = Highlighter(self)
 
 
 class CMD(ScrolledText):
@@ -29,11 +38,102 @@ class CMD(ScrolledText):
         super(CMD, self).insert(*args, **kwargs)
         self.config(state=DISABLED)
 
+    def delete(self, *args, **kwargs):
+        self.config(state=NORMAL)
+        super(CMD, self).delete(*args, **kwargs)
+        self.config(state=DISABLED)
+
+    def replace_lines(self, start, stop, lines):
+        """Replace output lines from start till stop, zero based, with a single delete and a single insert"""
+        self.config(state=NORMAL)
+        super(CMD, self).delete(f"{start + 1}.0", f"{stop + 1}.0")
+        super(CMD, self).insert(f"{start + 1}.0", "".join(f"{line}\n" for line in lines))
+        self.config(state=DISABLED)
+
+
+def get_fields(d):
+    """Get decoded parts of word as text, only the fields of its type"""
+    if isinstance(d.typ, rType):
+        return f"op={d.op} rs={d.rs} rt={d.rt} rd={d.rd} shift={d.shift}"
+    if isinstance(d.typ, iType):
+        return f"op={d.op} rs={d.rs} rt={d.rt} imm={d.imm}"
+    if d.op in BRANCHES:
+        return f"op={d.op} rs={d.rs} rt={d.rt} offset={signed(d.imm)}"
+    return f"op={d.op} target={d.pseudo}"
+
+
+class ResultsView(Frame):
+    """Virtualized table of assembled program, only visible rows exist as Treeview items"""
+    columns = ('source', 'hex', 'binary', 'fields')
+
+    def __init__(self, *args, rows=40, **kwargs):
+        super(ResultsView, self).__init__(*args, **kwargs)
+        self.pack(side=TOP, fill=BOTH, expand=1)
+
+        self.tree = Treeview(self, columns=self.columns, show='headings', height=rows, selectmode='none')
+        for column in self.columns:
+            self.tree.heading(column, text=column.title(), anchor='w')
+        self.tree.pack(side=LEFT, fill=BOTH, expand=1)
+
+        self.ysb = Scrollbar(self, orient='vertical', command=self.on_scroll)
+        self.ysb.pack(side=RIGHT, fill=Y)
+
+        self.tree.bind('<MouseWheel>', lambda e: self.scroll_to(self.offset - e.delta // 120 * 3))
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.offset - 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.offset + 3))
+
+        self.items = [self.tree.insert('', 'end', values=('', ) * len(self.columns)) for _ in range(rows)]
+        self.statements, self.words, self.errors = [], [], {}
+        self.offset = 0
+
+    def set_data(self, statements, words, errors=None):
+        """Show statements with their words, errors maps statement index to its message"""
+        self.statements, self.words, self.errors = statements, words, errors or {}
+        self.offset = 0
+        self.refresh()
+
+    def get_row(self, index):
+        source = self.statements[index]
+        if index in self.errors:
+            return source, '', '', self.errors[index]
+        word = self.words[index]
+        try:
+            fields = get_fields(decode(word))
+        except ValueError as e:
+            fields = str(e)
+        return source, f"{word:#010x}", f"{word:032b}", fields
+
+    def refresh(self):
+        count = len(self.statements)
+        for row, item in enumerate(self.items):
+            index = self.offset + row
+            values = self.get_row(index) if index < count else ('', ) * len(self.columns)
+            self.tree.item(item, values=values)
+        if count:
+            self.ysb.set(self.offset / count, min(1.0, (self.offset + len(self.items)) / count))
+        else:
+            self.ysb.set(0.0, 1.0)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), len(self.statements) - len(self.items)))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def on_scroll(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(float(value) * len(self.statements))
+        elif action == 'scroll':
+            step = len(self.items) if unit == 'pages' else 1
+            self.scroll_to(self.offset + int(value) * step)
+
 
 class FoldersFrame(Frame):
-    nodes: dict = {}
+    """Tree of directories and assembly sources, directories are scanned on worker threads once they are opened
+    and their children are inserted in batches, so large directories do not block the event loop"""
+    batch_size = 500
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, path='', extensions=SOURCE_EXTENSIONS, **kwargs):
         self.master = args[0]
 
         super(FoldersFrame, self).__init__(*args, **kwargs)
@@ -54,31 +154,109 @@ class FoldersFrame(Frame):
         self.tree.configure(yscroll=self.ysb.set, xscroll=self.xsb.set)
         self.tree.configure(yscrollcommand=self.ysb.set, xscrollcommand=self.xsb.set)
 
-        self.abspath = os.path.abspath('')
+        # state is kept per tree: entry of each node, directories that are not scanned yet, running loads
+        self.nodes = {}
+        self.unloaded = set()
+        self.loads = {}
+        self.cache = DirectoryCache(extensions)
+
+        self.abspath = os.path.abspath(path)
+        self.tree.bind('<<TreeviewOpen>>', self.open_node)
         self.update_nodes()
 
-    def insert_node(self, parent, text, abspath):
-        node = self.tree.insert(parent, 'end', text=text, open=False)
-        if os.path.isdir(abspath):
-            self.nodes[node] = abspath
+    def insert_node(self, parent, entry, index='end'):
+        node = self.tree.insert(parent, index, text=entry.name, open=False)
+        self.nodes[node] = entry
+        if entry.is_dir:
+            self.unloaded.add(node)
+            # placeholder, so directory could be opened before it is scanned
             self.tree.insert(node, 'end')
+        return node
 
     def open_node(self, event):
         node = self.tree.focus()
-        abspath = self.nodes.pop(node, None)
-        if abspath:
-            self.tree.delete(self.tree.get_children(node))
-            for p in os.listdir(abspath):
-                self.insert_node(node, p, os.path.join(abspath, p))
+        if node in self.unloaded:
+            self.unloaded.discard(node)
+            self.load_node(node)
+
+    def load_node(self, node):
+        """Scan directory of node on worker thread, then update its children"""
+        # loads of node started later supersede this one, results and remaining batches of it are dropped
+        token = self.loads[node] = object()
+        run_in_background(
+            self,
+            partial(self.cache.scan, self.nodes[node].path),
+            partial(self.set_children, node, token),
+            on_error=partial(self.set_error, node, token),
+        )
+
+    def set_error(self, node, token, error):
+        if self.loads.get(node) is not token:
+            return
+        del self.loads[node]
+        if self.tree.exists(node):
+            for child in self.tree.get_children(node):
+                self.remove_node(child)
+            message = error.strerror if isinstance(error, OSError) and error.strerror else str(error)
+            self.tree.insert(node, 'end', text=f"<{message}>")
+
+    def set_children(self, node, token, entries):
+        """Replace children of node by entries, children that are still there are kept with their state"""
+        if self.loads.get(node) is not token:
+            return
+        if not self.tree.exists(node):
+            del self.loads[node]
+            return
+        wanted = {(entry.name, entry.is_dir) for entry in entries}
+        children = {}
+        for child in self.tree.get_children(node):
+            entry = self.nodes.get(child)
+            if entry is not None and (entry.name, entry.is_dir) in wanted:
+                children[entry.name, entry.is_dir] = child
+            else:
+                self.remove_node(child)
+        pending = [(index, entry) for index, entry in enumerate(entries) if (entry.name, entry.is_dir) not in children]
+        self.insert_batch(node, token, iter(pending))
+
+    def insert_batch(self, node, token, pending):
+        """Insert next batch of pending children, then give the event loop a chance before the following one"""
+        if self.loads.get(node) is not token:
+            return
+        if not self.tree.exists(node):
+            del self.loads[node]
+            return
+        batch = list(islice(pending, self.batch_size))
+        for index, entry in batch:
+            self.insert_node(node, entry, index)
+        if len(batch) < self.batch_size:
+            del self.loads[node]
+            return
+        self.after(1, self.insert_batch, node, token, pending)
+
+    def forget_node(self, node):
+        """Drop state of node and its descendants"""
+        for child in self.tree.get_children(node):
+            self.forget_node(child)
+        self.nodes.pop(node, None)
+        self.unloaded.discard(node)
+        self.loads.pop(node, None)
 
     def delete_nodes(self):
         for child in self.tree.get_children():
-            self.tree.delete(child)
+            self.remove_node(child)
 
     def remove_node(self, child):
+        self.forget_node(child)
         self.tree.delete(child)
 
     def update_nodes(self):
-        self.delete_nodes()
-        self.insert_node('', self.abspath, self.abspath)
-        self.tree.bind('<<TreeviewOpen>>', self.open_node)
+        """Show root directory, scanned directories are scanned again and only their changed children are updated,
+        unchanged directories are served from cache"""
+        roots = self.tree.get_children()
+        if not roots or self.nodes.get(roots[0], Entry('', '', True)).path != self.abspath:
+            self.delete_nodes()
+            self.insert_node('', Entry(self.abspath, self.abspath, True))
+            return
+        for node, entry in list(self.nodes.items()):
+            if entry.is_dir and node not in self.unloaded and node not in self.loads:
+                self.load_node(node)
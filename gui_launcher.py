@@ -6,7 +6,7 @@ from gui.widgets import MainFrame, Editor, CMD, FoldersFrame
 
 def main():
     root = MainFrame()
-    # folders = FoldersFrame(root, bg='red')  # needs to be fixed
+    folders = FoldersFrame(root)
     editor = Editor(root, bg='#202020', fg='white')
     cmd = CMD(root, bg='#a5a5a5', fg='yellow', height=400)
 
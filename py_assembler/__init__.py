@@ -9,9 +9,9 @@ It is used to convert native mips assembly instructions into machine code.
 """
 
 from .regs import RegularReg, ImmediateReg, DirectReg, InDirectReg, BasePlusIndexReg, RelativeReg, REGS, get_register_type
-from .types import iType, rType, jType, INSTRUCTIONS, get_instruction_type
+from .types import iType, rType, jType, iEncoding, rEncoding, jEncoding, INSTRUCTIONS, get_instruction_type
 from .instruction import Instruction
-from .parse import instructions_parser
+from .parse import instructions_parser, program_parser
 
 
 __title__ = 'Py Assembler'
@@ -33,6 +33,8 @@ __all__ = [
     get_register_type,
     # Types
     iType, rType, jType,
+    # Per-Instruction Encoded Records
+    iEncoding, rEncoding, jEncoding,
     # All-Instructions
     INSTRUCTIONS,
     # Get Instruction Type By Opcode
@@ -40,5 +42,7 @@ __all__ = [
     # Instruction
     Instruction,
     # Parse String
-    instructions_parser
+    instructions_parser,
+    # Parse Program With Sections
+    program_parser
 ]
@@ -0,0 +1,357 @@
+import argparse
+import io
+import linecache
+import os
+import sys
+import time
+
+from .directives import DATA_BASE, DataSegment
+from .diskcache import DEFAULT_MAXSIZE, CacheEntry, DiskCache
+from .errors import AssemblyError, Diagnostic
+from .instruction import ENCODING_CACHE
+from .objfile import write_object
+from .output import write_binary, write_hex, write_ihex, write_listing
+from .parallel import (
+    Image, assemble_files_parallel, assemble_statements, assemble_statements_parallel, is_large, to_words
+)
+from .parse import iter_chunks, iter_statements
+from .profiling import PROFILER
+from .pseudo import get_size
+from .symbols import Layout, get_data_address, is_directive, split_labels
+
+
+STDIN = '-'
+
+FORMATS = 'hex', 'bin', 'ihex', 'lst', 'obj'
+
+
+def get_jobs(value: str) -> int:
+    """Get count of worker processes of --jobs argument, 0 is replaced by count of cores"""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"jobs should be 0 or a positive number, not {jobs}")
+    return jobs or os.cpu_count() or 1
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get command line arguments parser"""
+    parser = argparse.ArgumentParser(prog='py_assembler', description='Convert mips assembly into machine code')
+    parser.add_argument('sources', nargs='*', default=[STDIN], help='assembly source files, - or nothing reads stdin')
+    parser.add_argument('-o', '--output', default=STDIN, help='output file, - writes to stdout')
+    parser.add_argument(
+        '-f', '--format', choices=FORMATS, default='hex',
+        help='hex words per line, raw binary, Intel HEX, listing of instruction // hex // bin lines or object file'
+    )
+    parser.add_argument(
+        '-e', '--endian', choices=('little', 'big'), default='little', help='byte order of bin and ihex formats'
+    )
+    parser.add_argument(
+        '-j', '--jobs', type=get_jobs, default=1,
+        help='number of worker processes to assemble in parallel, 0 uses all cores'
+    )
+    parser.add_argument('--time', action='store_true', help='report elapsed time and throughput on stderr')
+    parser.add_argument('--stats', action='store_true', help='report instructions and cache statistics on stderr')
+    parser.add_argument(
+        '--profile', nargs='?', const='stages', choices=('stages', 'detail'),
+        help='report calls and time of each assembler stage on stderr, detail breaks them down by mnemonic and '
+             'addressing mode, work of worker processes is not included'
+    )
+    parser.add_argument(
+        '--cache-dir', help='directory of on-disk cache of assembled sources, unchanged sources are not parsed again, '
+                            'it is not used for stdin and lst format'
+    )
+    parser.add_argument(
+        '--cache-size', type=float, default=DEFAULT_MAXSIZE / 2 ** 20,
+        help='size limit of on-disk cache in MiB, least recently used entries are evicted'
+    )
+    return parser
+
+
+def needs_statements(args) -> bool:
+    """Check output format requires statements of sources, not only their words"""
+    return args.format in ('lst', 'obj')
+
+
+def get_name(source: str) -> str:
+    """Get name of source used in error messages"""
+    return '<stdin>' if source == STDIN else source
+
+
+def read_statements(source) -> list:
+    """Read (line number, statement) pairs of source path or file object"""
+    return list(iter_statements(iter_chunks(sys.stdin if source == STDIN else source)))
+
+
+def read_source(source: str) -> bytes:
+    """Read content of source file"""
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def get_rows(statements: list) -> list:
+    """Get (line number, statement) pairs that hold instructions, one per word, labels and directives are dropped"""
+    rows = []
+    for line, statement in statements:
+        inst = split_labels(statement)[1]
+        if inst and not is_directive(inst):
+            rows.extend([(line, statement)] * get_size(inst))
+    return rows
+
+
+def get_symbols(tables: list) -> dict:
+    """Get symbols of all sources from symbols table of each one, labels are already at their final addresses"""
+    symbols = {}
+    for table in tables:
+        for name, address in table.items():
+            symbols.setdefault(name, address)
+    return symbols
+
+
+def place_sources(sources: list, statements: list, assemble, address: int = 0, data_end: int = DATA_BASE) -> list:
+    """Assemble sources one after another into images by assemble(statements, name, state), each source is placed
+    after text and data sections of previous ones, so its labels are resolved at their final addresses"""
+    images = []
+    for source, st in zip(sources, statements):
+        data_address = get_data_address(data_end, st)
+        state = Layout(get_name(source), address, DataSegment(data_address))
+        words = assemble(st, get_name(source), state)
+        images.append(Image(words, bytes(state.data.data), data_address, state.symbols))
+        address, data_end = state.address, state.data.address
+    return images
+
+
+def assemble_tolerant(
+        sources: list,
+        statements: list,
+        errors: list,
+        address: int = 0,
+        data_end: int = DATA_BASE
+) -> list:
+    """Assemble sources on this process, errors of all sources are appended to errors list"""
+    return place_sources(
+        sources, statements,
+        lambda st, name, state: to_words(assemble_statements(st, name, errors=errors, state=state)),
+        address, data_end
+    )
+
+
+def assemble(sources: list, jobs: int, statements: bool, errors: list) -> tuple:
+    """Assemble sources into their images, statements are returned as well if required.
+    Errors of all sources are appended to errors list, words of invalid statements are left out"""
+    # workers read whole files themselves and send back assembled images, a single or large file is split into
+    # chunks of statements instead, so it is not assembled by one worker
+    whole_files = len(sources) > 1 and STDIN not in sources and not any(map(is_large, sources))
+    if jobs != 1 and not statements and whole_files:
+        try:
+            return None, assemble_files_parallel(sources, jobs)
+        except AssemblyError:
+            # workers stop at first error, sources are assembled again to report all of them
+            statements = [read_statements(source) for source in sources]
+            return statements, assemble_tolerant(sources, statements, errors)
+
+    statements = [read_statements(source) for source in sources]
+    return statements, assemble_read(sources, statements, jobs, errors)
+
+
+def assemble_read(
+        sources: list,
+        statements: list,
+        jobs: int,
+        errors: list,
+        address: int = 0,
+        data_end: int = DATA_BASE
+) -> list:
+    """Assemble statements already read from sources, the first one is placed at text address after data_end"""
+    if jobs == 1:
+        return assemble_tolerant(sources, statements, errors, address, data_end)
+    try:
+        return place_sources(
+            sources, statements,
+            lambda st, name, state: assemble_statements_parallel(st, jobs, path=name, state=state),
+            address, data_end
+        )
+    except AssemblyError:
+        return assemble_tolerant(sources, statements, errors, address, data_end)
+
+
+def assemble_cached(sources: list, jobs: int, cache: DiskCache) -> list:
+    """Get cache entry of each source, only sources that are not in cache are parsed and assembled then stored.
+    Each source is placed after previous ones, so it is looked up by its content and the addresses it is placed at"""
+    entries, address, data_end = [], 0, DATA_BASE
+    for source in sources:
+        content = read_source(source)
+        key = cache.key(content, address, data_end)
+        entry = cache.get(key)
+        if entry is None:
+            # the hashed content is parsed, so entry matches its key even if file changes meanwhile
+            st = read_statements(io.TextIOWrapper(io.BytesIO(content)))
+            errors = []
+            image = assemble_read([source], [st], jobs, errors, address, data_end)[0]
+            diagnostics = [get_diagnostic(error) for error in errors]
+            if diagnostics:
+                # words of invalid statements are left out, so lines and symbols would not match them
+                lines, symbols = None, {}
+            else:
+                lines, symbols = [line for line, _ in get_rows(st)], image.symbols
+            cache.put(key, image.words, lines, symbols, diagnostics, image.data, image.data_address)
+            entry = CacheEntry(image.words, lines, symbols, diagnostics, image.data, image.data_address)
+        entries.append(entry)
+        address, data_end = address + len(entry.words) * 4, entry.data_address + len(entry.data)
+    return entries
+
+
+def get_diagnostic(error: AssemblyError) -> Diagnostic:
+    """Get diagnostic of error, column is found in source file of error, it is not known for stdin"""
+    source_line = None
+    if error.path != get_name(STDIN) and error.line:
+        source_line = linecache.getline(error.path, error.line) or None
+    return Diagnostic.from_error(error, source_line)
+
+
+def report_diagnostics(diagnostics: list) -> None:
+    """Print (path, diagnostic) pairs of all sources sorted by location on stderr, repeated ones are printed once"""
+    diagnostics = sorted(dict.fromkeys(diagnostics), key=lambda d: (d[0] or '', d[1].line or 0, d[1].column or 0))
+    for path, diagnostic in diagnostics:
+        print(diagnostic.format(path), file=sys.stderr)
+    print(f"{len(diagnostics)} errors", file=sys.stderr)
+
+
+def get_data(parts: list) -> tuple:
+    """Get data sections of all sources as one block with its address, gaps between sections are zero filled"""
+    parts = [part for part in parts if part.data]
+    if not parts:
+        return b'', DATA_BASE
+    data, start = bytearray(), parts[0].data_address
+    for part in parts:
+        data += bytes(part.data_address - start - len(data))
+        data += part.data
+    return bytes(data), start
+
+
+def write(
+        args,
+        programs: list,
+        rows: list = None,
+        lines: list = None,
+        symbols: dict = None,
+        data: bytes = b'',
+        data_address: int = DATA_BASE
+) -> int:
+    """Write words and data section in required format, returns count of written bytes, hex format has no data.
+    Listing requires (line number, statement) rows, object file requires lines of words and symbols"""
+    words = [word for program in programs for word in program]
+    if args.format == 'obj':
+        if args.output == STDIN:
+            raise ValueError("Object format requires an output file")
+        write_object(args.output, words, lines, symbols or None, data=data, data_address=data_address)
+        return len(words) * 4 + len(data)
+    binary = args.format == 'bin'
+    if args.output == STDIN:
+        f = sys.stdout.buffer if binary else sys.stdout
+        close = False
+    else:
+        f = open(args.output, 'wb' if binary else 'w')
+        close = True
+    try:
+        if binary:
+            write_binary(words, f, args.endian, data)
+        elif args.format == 'ihex':
+            write_ihex(words, f, args.endian, data=data, data_address=data_address)
+        elif args.format == 'lst':
+            write_listing(rows, words, f, data, data_address)
+        else:
+            write_hex(words, f)
+            data = b''
+    finally:
+        if close:
+            f.close()
+    return len(words) * 4 + len(data)
+
+
+def main(argv: list = None) -> int:
+    args = get_parser().parse_args(argv)
+    if args.profile:
+        PROFILER.enable(detail=args.profile == 'detail')
+    try:
+        return run(args)
+    finally:
+        if args.profile:
+            PROFILER.disable()
+            print(PROFILER.stats().format(), file=sys.stderr)
+
+
+def uses_cache(args) -> bool:
+    """Check sources are looked up in on-disk cache, listing requires statements which are not cached"""
+    return bool(args.cache_dir) and args.format != 'lst' and STDIN not in args.sources
+
+
+def run(args) -> int:
+    start = time.perf_counter()
+    cache = None
+    rows = lines = symbols = None
+    try:
+        if uses_cache(args):
+            cache = DiskCache(args.cache_dir, int(args.cache_size * 2 ** 20))
+            entries = assemble_cached(args.sources, args.jobs, cache)
+            programs = [entry.words for entry in entries]
+            data, data_address = get_data(entries)
+            diagnostics = [
+                (get_name(source), diagnostic)
+                for source, entry in zip(args.sources, entries) for diagnostic in entry.diagnostics
+            ]
+            if not diagnostics and args.format == 'obj':
+                lines = [line for entry in entries for line in entry.lines]
+                symbols = get_symbols([entry.symbols for entry in entries])
+        else:
+            errors = []
+            statements, images = assemble(args.sources, args.jobs, needs_statements(args), errors)
+            programs = [image.words for image in images]
+            data, data_address = get_data(images)
+            diagnostics = [(error.path, get_diagnostic(error)) for error in errors]
+            if not diagnostics and statements is not None:
+                rows = [row for st in statements for row in get_rows(st)]
+                lines = [line for line, _ in rows]
+                if args.format == 'obj':
+                    symbols = get_symbols([image.symbols for image in images])
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if diagnostics:
+        report_diagnostics(diagnostics)
+        return 1
+    assembled = time.perf_counter()
+    try:
+        size = write(args, programs, rows, lines, symbols, data, data_address)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    end = time.perf_counter()
+
+    count = sum(len(program) for program in programs)
+    if args.time:
+        elapsed = end - start
+        rate = count / (assembled - start) if assembled > start else 0
+        print(
+            f"time: assemble {assembled - start:.6f}s, write {end - assembled:.6f}s, total {elapsed:.6f}s, "
+            f"{rate:,.0f} instructions/s",
+            file=sys.stderr
+        )
+    if args.stats:
+        print(f"sources: {len(args.sources)}, instructions: {count}, output: {size} bytes", file=sys.stderr)
+        if cache is not None:
+            print(f"disk cache: {cache.hits} hits, {cache.misses} misses", file=sys.stderr)
+        if args.jobs == 1:
+            stats = ENCODING_CACHE.stats()
+            print(
+                f"cache: {stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions, "
+                f"{stats.hit_rate:.1%} hit rate",
+                file=sys.stderr
+            )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
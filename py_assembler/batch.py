@@ -0,0 +1,8 @@
+from typing import Iterable
+
+import numpy as np
+
+
+def words_array(words: Iterable[int]) -> np.ndarray:
+    """Get machine words as numpy uint32 array, words are encoded by the scalar path and only copied"""
+    return np.fromiter(words, dtype=np.uint32)
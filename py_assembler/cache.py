@@ -0,0 +1,132 @@
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Hashable
+
+
+LRU = 'lru'
+LFU = 'lfu'
+
+POLICIES = LRU, LFU
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Snapshot of cache statistics"""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+    policy: str
+
+    @property
+    def hit_rate(self) -> float:
+        """Get ratio of lookups that are served from cache"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EncodingCache:
+    """Bounded cache with least recently / least frequently used eviction, maxsize of zero disables it"""
+
+    def __init__(self, maxsize: int = 4096, policy: str = LRU):
+        self._lock = Lock()
+        self.configure(maxsize, policy)
+
+    def configure(self, maxsize: int = None, policy: str = None) -> None:
+        """Change size and eviction policy, cached values and statistics are cleared"""
+        policy = policy or getattr(self, 'policy', LRU)
+        if policy not in POLICIES:
+            raise ValueError(f"Invalid eviction policy, should be one of {POLICIES}")
+        with self._lock:
+            self.maxsize = maxsize if maxsize is not None else self.maxsize
+            self.policy = policy
+            self._clear()
+
+    def _clear(self) -> None:
+        self._values = OrderedDict()
+        # frequency -> keys ordered by recency, only used by lfu policy
+        self._counts = {}
+        self._buckets = defaultdict(OrderedDict)
+        self._min_count = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def clear(self) -> None:
+        """Remove all cached values and reset statistics"""
+        with self._lock:
+            self._clear()
+
+    def _touch(self, key: Hashable) -> None:
+        if self.policy == LRU:
+            self._values.move_to_end(key)
+            return
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets[count + 1][key] = None
+
+    def _evict(self) -> None:
+        if self.policy == LRU:
+            self._values.popitem(last=False)
+        else:
+            bucket = self._buckets[self._min_count]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_count]
+            del self._counts[key]
+            del self._values[key]
+        self.evictions += 1
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get cached value of key, it is counted as hit or miss"""
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                self._touch(key)
+                return self._values[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache value of key, evicting other values if cache is full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if key in self._values:
+                self._values[key] = value
+                self._touch(key)
+                return
+            while len(self._values) >= self.maxsize:
+                self._evict()
+            self._values[key] = value
+            if self.policy == LFU:
+                self._counts[key] = 1
+                self._buckets[1][key] = None
+                self._min_count = 1
+
+    def get_or_set(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """Get cached value of key, or compute and cache it in case of miss"""
+        if self.maxsize <= 0:
+            return func()
+        value = self.get(key, self)
+        if value is self:
+            value = func()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> CacheStats:
+        """Get hits, misses and evictions statistics"""
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._values), self.maxsize, self.policy)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
@@ -0,0 +1,120 @@
+import ast
+import sys
+from array import array
+from typing import Tuple
+
+from .lexer import parse_immediate
+
+
+TEXT = '.text'
+DATA = '.data'
+SECTIONS = frozenset({TEXT, DATA})
+
+DATA_BASE = 0x10010000
+# largest power of two boundary of .align
+MAX_ALIGN = 16
+
+# directive -> array typecode of its elements, elements are aligned on their size
+ELEMENTS = {'.word': 'I', '.half': 'H', '.byte': 'B'}
+STRINGS = {'.ascii': b'', '.asciiz': b'\0'}
+
+
+def split_directive(inst: str) -> Tuple[str, str]:
+    """Split directive statement into its name and arguments"""
+    name, *args = inst.split(None, 1)
+    return name.lower(), args[0].strip() if args else ''
+
+
+def align_address(address: int, boundary: int) -> int:
+    """Get first address from address on that is multiple of boundary"""
+    return address + (-address % boundary)
+
+
+def parse_number(value: str) -> int:
+    """Get integer of directive argument, decimal or 0x / 0b prefixed with optional # prefix"""
+    try:
+        return parse_immediate(value)
+    except ValueError:
+        raise ValueError(f"Invalid number '{value.strip()}'") from None
+
+
+def parse_numbers(args: str, bits: int) -> list:
+    """Get comma separated integers that fit in bits, either signed or unsigned, negative ones are wrapped"""
+    values = [parse_number(i) for i in args.split(',')]
+    low, high = min(values), max(values)
+    if low < -(1 << (bits - 1)) or high >= 1 << bits:
+        raise ValueError(f"Value {low if low < 0 else high} does not fit in {bits} bits")
+    if low < 0:
+        mask = (1 << bits) - 1
+        values = [i & mask for i in values]
+    return values
+
+
+def parse_string(args: str) -> bytes:
+    """Get bytes of quoted string argument, escape sequences are the same as python ones"""
+    value = ast.literal_eval(args) if args[:1] == args[-1:] == '"' and len(args) > 1 else None
+    if not isinstance(value, str):
+        raise ValueError("String should be double quoted")
+    return value.encode('utf-8')
+
+
+class DataSegment:
+    """Data section kept as packed little endian bytes in growable buffer, without emit only addresses are computed"""
+
+    def __init__(self, base: int = DATA_BASE, emit: bool = True):
+        self.base = base
+        self.emit = emit
+        self.data = bytearray()
+        self.size = 0
+
+    @property
+    def address(self) -> int:
+        """Get address of next byte"""
+        return self.base + self.size
+
+    def pad(self, count: int) -> None:
+        """Add count zero bytes"""
+        if self.emit:
+            self.data += bytes(count)
+        self.size += count
+
+    def align(self, boundary: int) -> None:
+        """Pad till address is multiple of boundary"""
+        self.pad(-self.address % boundary)
+
+    def add(self, name: str, args: str) -> int:
+        """Add data of directive, returns address of its first byte after alignment"""
+        if name in ELEMENTS:
+            if not args:
+                raise ValueError(f"{name} requires values")
+            items = array(ELEMENTS[name], parse_numbers(args, array(ELEMENTS[name]).itemsize * 8))
+            self.align(items.itemsize)
+            start = self.address
+            if self.emit:
+                if sys.byteorder == 'big':
+                    items.byteswap()
+                self.data += items.tobytes()
+            self.size += len(items) * items.itemsize
+            return start
+        if name in STRINGS:
+            value = parse_string(args) + STRINGS[name]
+            start = self.address
+            if self.emit:
+                self.data += value
+            self.size += len(value)
+            return start
+        if name == '.space':
+            count = parse_number(args)
+            if count < 0:
+                raise ValueError(".space size should not be negative")
+            start = self.address
+            self.pad(count)
+            return start
+        if name == '.align':
+            # power of two boundary as mips assemblers
+            power = parse_number(args)
+            if not 0 <= power <= MAX_ALIGN:
+                raise ValueError(f".align power should be between 0 and {MAX_ALIGN}")
+            self.align(1 << power)
+            return self.address
+        raise ValueError(f"Unknown directive {name}")
@@ -0,0 +1,105 @@
+from array import array
+from typing import Iterable, List, NamedTuple, Union
+
+from .regs import REGISTERS
+from .types import TYPES, INSTRUCTIONS, UNSIGNED_IMM, iType, rType
+
+
+# register number -> canonical name
+REGISTER_NAMES = tuple(f"${name}" for name, _ in sorted(REGISTERS.items(), key=lambda i: i[1]))
+
+# conditional branches keep rs, rt and 16 bits word offset in their 26 bits field, in mips i-type layout
+BRANCHES = frozenset({'beq', 'bne', 'blez', 'bqtz'})
+# branches that compare a single register, second one is rendered only if it is not zero
+SINGLE_BRANCHES = frozenset({'blez', 'bqtz'})
+
+
+class Decoded(NamedTuple):
+    """Instruction parts decoded from machine word, imm is the raw 16 bits of i-type immediate or branch offset"""
+    op: str
+    typ: TYPES
+    rs: int = 0
+    rt: int = 0
+    rd: int = 0
+    shift: int = 0
+    imm: int = 0
+    pseudo: int = 0
+
+
+def build_tables() -> tuple:
+    """Build dispatch tables indexed by opcode and by funct of opcode zero instructions"""
+    opcodes, functs = [None] * 64, [None] * 64
+    for op, typ in INSTRUCTIONS.items():
+        table, index = (functs, typ.func) if isinstance(typ, rType) else (opcodes, typ.opcode)
+        if table[index] is not None:
+            raise ValueError(f"Instructions {table[index][0]} and {op} have the same code")
+        table[index] = op, typ
+    return tuple(opcodes), tuple(functs)
+
+
+OPCODES, FUNCTS = build_tables()
+
+
+def lookup(word: int) -> tuple:
+    """Get (mnemonic, type) of word"""
+    opcode = word >> 26
+    entry = FUNCTS[word & 0x3F] if opcode == 0 else OPCODES[opcode]
+    if entry is None:
+        raise ValueError(f"Invalid instruction word {word:#010x}")
+    return entry
+
+
+def decode(word: int) -> Decoded:
+    """Decode machine word into its parts"""
+    op, typ = lookup(word)
+    if isinstance(typ, rType):
+        return Decoded(op, typ, (word >> 21) & 0x1F, (word >> 16) & 0x1F, (word >> 11) & 0x1F, (word >> 6) & 0x1F)
+    if isinstance(typ, iType):
+        return Decoded(op, typ, (word >> 21) & 0x1F, (word >> 16) & 0x1F, imm=word & 0xFFFF)
+    if op in BRANCHES:
+        return Decoded(op, typ, (word >> 21) & 0x1F, (word >> 16) & 0x1F, imm=word & 0xFFFF, pseudo=word & 0x3FFFFFF)
+    return Decoded(op, typ, pseudo=word & 0x3FFFFFF)
+
+
+def signed(value: int, bits: int = 16) -> int:
+    """Get signed value of two's complement number"""
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def disassemble(word: int) -> str:
+    """Render machine word as canonical assembly text that assembles back into the same word"""
+    op, typ = lookup(word)
+    if typ.__class__ is rType:
+        text = f"{op} {REGISTER_NAMES[(word >> 21) & 0x1F]},{REGISTER_NAMES[(word >> 16) & 0x1F]}," \
+               f"{REGISTER_NAMES[(word >> 11) & 0x1F]}"
+        shift = (word >> 6) & 0x1F
+        return f"{text},#{shift}" if shift else text
+    if typ.__class__ is iType:
+        imm = word & 0xFFFF
+        if op not in UNSIGNED_IMM and imm >> 15:
+            imm -= 1 << 16
+        return f"{op} {REGISTER_NAMES[(word >> 21) & 0x1F]},{REGISTER_NAMES[(word >> 16) & 0x1F]},#{imm}"
+    if op in BRANCHES:
+        rt = (word >> 16) & 0x1F
+        regs = REGISTER_NAMES[(word >> 21) & 0x1F]
+        if rt or op not in SINGLE_BRANCHES:
+            regs = f"{regs},{REGISTER_NAMES[rt]}"
+        return f"{op} {regs},#{signed(word & 0xFFFF)}"
+    return f"{op} #{word & 0x3FFFFFF}"
+
+
+def iter_words(buffer: Union[bytes, bytearray, memoryview, array, Iterable[int]]) -> Iterable[int]:
+    """Iterate over words of packed native uint32 buffer or any iterable of integers"""
+    if isinstance(buffer, (bytes, bytearray)):
+        return memoryview(buffer).cast('I')
+    if isinstance(buffer, memoryview) and buffer.format != 'I':
+        return buffer.cast('B').cast('I')
+    if hasattr(buffer, 'tolist'):
+        # numpy arrays are converted at once instead of boxing element by element
+        return buffer.tolist()
+    return buffer
+
+
+def disassemble_buffer(buffer: Union[bytes, bytearray, memoryview, array, Iterable[int]]) -> List[str]:
+    """Disassemble whole buffer of words"""
+    return [disassemble(word) for word in iter_words(buffer)]
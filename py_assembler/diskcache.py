@@ -0,0 +1,157 @@
+import hashlib
+import os
+import tempfile
+import time
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Union
+
+from . import __version__
+from .directives import DATA_BASE
+from .errors import Diagnostic
+from .objfile import VERSION, read_object, write_object
+from .pseudo import PSEUDO_INSTRUCTIONS
+from .types import INSTRUCTIONS
+
+
+DEFAULT_MAXSIZE = 64 * 1024 * 1024
+EXTENSION = '.pyao'
+TEMP_PREFIX = '.tmp-'
+# temporary files older than this are left by writers that were killed, they are removed on eviction
+STALE_SECONDS = 3600
+
+
+def get_fingerprint() -> bytes:
+    """Get hash of everything besides source that changes assembled output, entries of older builds never match.
+    Expansions of pseudo instructions hold functions whose repr differs per process, so only their names are used"""
+    data = f"{__version__}\0{VERSION}\0{INSTRUCTIONS!r}\0{sorted(PSEUDO_INSTRUCTIONS)!r}".encode('utf-8')
+    return hashlib.sha256(data).digest()
+
+
+class CacheEntry(NamedTuple):
+    """Assembled source, lines is None if source has errors"""
+    words: array
+    lines: Optional[array]
+    symbols: Dict[str, int]
+    diagnostics: List[Diagnostic]
+    data: bytes = b''
+    data_address: int = DATA_BASE
+
+
+class DiskCache:
+    """Assembled sources stored as object files keyed by hash of their content, entries are written atomically and
+    least recently used ones are evicted once directory exceeds maxsize bytes, so it could be shared by processes.
+    Size of directory is scanned only once the sizes of entries written since the last scan could exceed maxsize,
+    so entries written by other processes meanwhile are counted by the next scan"""
+
+    def __init__(self, directory: Union[str, os.PathLike], maxsize: int = DEFAULT_MAXSIZE):
+        self.directory = os.fspath(directory)
+        self.maxsize = maxsize
+        self.fingerprint = get_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        # total size of entries at the last scan plus sizes of entries written since, None till the first scan
+        self.size = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, source: bytes, address: int = 0, data_end: int = DATA_BASE) -> str:
+        """Get key of source content placed at text address after data sections that end at data_end, addresses
+        of labels and so words of source depend on them"""
+        placement = address.to_bytes(4, 'little') + data_end.to_bytes(4, 'little')
+        return hashlib.sha256(self.fingerprint + placement + source).hexdigest()
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + EXTENSION)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get entry of key, None if it is missing or unreadable"""
+        path = self.get_path(key)
+        try:
+            with read_object(path) as obj:
+                words, lines = array('I', obj.words), obj.lines
+                entry = CacheEntry(
+                    words, None if lines is None else array('I', lines), obj.symbols, obj.diagnostics, obj.data,
+                    obj.data_address
+                )
+        except (OSError, ValueError):
+            # entry is removed by another process or it is corrupted, it is assembled and written again
+            self.misses += 1
+            return None
+        try:
+            # access time is not updated on every file system, so modification time orders entries by last use
+            os.utime(path)
+        except OSError:
+            # entry is already read, if its use is not recorded it is only evicted earlier, eg: on read only file
+            pass
+        self.hits += 1
+        return entry
+
+    def put(
+            self,
+            key: str,
+            words: List[int],
+            lines: List[int] = None,
+            symbols: Dict[str, int] = None,
+            diagnostics: List[Diagnostic] = None,
+            data: bytes = None,
+            data_address: int = DATA_BASE
+    ) -> None:
+        """Store entry of key, readers see either the whole entry or none of it"""
+        fd, temp = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=EXTENSION, dir=self.directory)
+        os.close(fd)
+        try:
+            write_object(temp, words, lines, symbols, diagnostics, data, data_address)
+            size = os.path.getsize(temp)
+            os.replace(temp, self.get_path(key))
+        except BaseException:
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+        # replaced entry of the same key is still counted, it only makes the next scan come earlier
+        if self.size is None or self.size + size > self.maxsize:
+            self.evict()
+        else:
+            self.size += size
+
+    def evict(self) -> None:
+        """Remove least recently used entries till total size is within maxsize, and stale temporary files"""
+        entries, total, now = [], 0, time.time()
+        try:
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    if item.name.startswith(TEMP_PREFIX):
+                        if now - stat.st_mtime > STALE_SECONDS:
+                            self.remove(item.path)
+                    elif item.name.endswith(EXTENSION):
+                        entries.append((stat.st_mtime_ns, stat.st_size, item.path))
+                        total += stat.st_size
+        except OSError:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.maxsize:
+                break
+            self.remove(path)
+            total -= size
+        self.size = total
+
+    @staticmethod
+    def remove(path: str) -> None:
+        # other processes could remove the same entry or still have it open on Windows
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(EXTENSION) and not item.name.startswith(TEMP_PREFIX):
+                    self.remove(item.path)
+        self.size = None
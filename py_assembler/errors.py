@@ -0,0 +1,50 @@
+from typing import NamedTuple, Optional
+
+
+# codes of errors, they are stable so diagnostics could be filtered by tools
+UNKNOWN_INSTRUCTION = 'unknown-instruction'
+INVALID_OPERANDS = 'invalid-operands'
+UNDEFINED_LABEL = 'undefined-label'
+DUPLICATE_LABEL = 'duplicate-label'
+INVALID_LABEL = 'invalid-label'
+INVALID_DIRECTIVE = 'invalid-directive'
+WRONG_SECTION = 'wrong-section'
+
+
+class AssemblyError(ValueError):
+    """Invalid instruction with its location in source, text is the invalid part of statement"""
+
+    def __init__(self, message: str, line: int = None, path: str = None, code: str = None, text: str = None):
+        # all arguments are kept in args so error could be pickled back from worker processes
+        super().__init__(message, line, path, code, text)
+        self.message = message
+        self.line = line
+        self.path = path
+        self.code = code
+        self.text = text
+
+    def __str__(self) -> str:
+        location = ':'.join(str(i) for i in (self.path, self.line) if i is not None)
+        return f"{location}: {self.message}" if location else self.message
+
+
+class Diagnostic(NamedTuple):
+    """Error reported by error tolerant assembly, line and column are 1-based, column is None if it is unknown"""
+    line: int
+    column: Optional[int]
+    message: str
+    code: str
+
+    @classmethod
+    def from_error(cls, error: AssemblyError, source_line: str = None) -> 'Diagnostic':
+        """Get diagnostic of error, its column is found by looking up text of error in its source line"""
+        column = None
+        if source_line is not None:
+            index = source_line.find(error.text) if error.text else -1
+            column = index + 1 if index != -1 else len(source_line) - len(source_line.lstrip()) + 1
+        return cls(error.line, column, error.message, error.code)
+
+    def format(self, path: str = None) -> str:
+        """Get diagnostic as path:line:column: message [code] line"""
+        location = ':'.join(str(i) for i in (path, self.line, self.column) if i is not None)
+        return f"{location}: {self.message} [{self.code}]"
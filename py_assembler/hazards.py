@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Tuple
+
+from .disasm import decode, iter_words
+from .types import iType, rType
+
+
+RAW = 'RAW'
+WAW = 'WAW'
+LOAD_USE = 'load-use'
+
+# distance between writer and reader from which the register file already holds the value
+PIPELINE_DEPTH = 3
+
+LOADS = frozenset({'lw', 'lb'})
+STORES = frozenset({'sw', 'sb'})
+SHIFTS = frozenset({'sll', 'srl', 'sra'})
+BRANCHES = frozenset({'beq', 'bne'})
+ZERO_BRANCHES = frozenset({'blez', 'bqtz'})
+
+
+class Hazard(NamedTuple):
+    """Dependency between instruction at index and earlier instruction at source index on register"""
+    kind: str
+    index: int
+    source: int
+    register: int
+
+
+def unique(*regs: int) -> tuple:
+    """Get registers without duplicates, register read twice by instruction is one dependency"""
+    return tuple(dict.fromkeys(regs))
+
+
+@lru_cache(maxsize=4096)
+def get_operands(word: int) -> Tuple[str, tuple, int]:
+    """Get (mnemonic, read registers, written register) of word, zero is returned if nothing is written.
+    Operands are read in the order they are written, so rs is the destination like in the simulator"""
+    d = decode(word)
+    op = d.op
+    if isinstance(d.typ, rType):
+        if op in SHIFTS:
+            return op, (d.rt, ), d.rs
+        # mult / div also write lo into rs
+        return op, unique(d.rt, d.rd), d.rs
+    if isinstance(d.typ, iType):
+        if op in STORES:
+            return op, unique(d.rs, d.rt), 0
+        if op == 'lui':
+            return op, (), d.rs
+        return op, (d.rt, ), d.rs
+    if op in BRANCHES:
+        return op, unique(d.rs, d.rt), 0
+    if op in ZERO_BRANCHES:
+        return op, (d.rs, ), 0
+    return op, (), 0
+
+
+@dataclass
+class HazardReport:
+    """Hazards and stall cycles of classic 5-stage pipeline with and without forwarding"""
+    mnemonics: List[str] = field(repr=False)
+    hazards: List[Hazard] = field(repr=False)
+    stalls: List[int] = field(repr=False)
+    stalls_forwarding: List[int] = field(repr=False)
+
+    @property
+    def total_stalls(self) -> int:
+        """Get stall cycles without forwarding"""
+        return sum(self.stalls)
+
+    @property
+    def total_stalls_forwarding(self) -> int:
+        """Get stall cycles with forwarding"""
+        return sum(self.stalls_forwarding)
+
+    def get_cycles(self, forwarding: bool = True) -> int:
+        """Get cycles of whole program including filling the pipeline"""
+        if not self.mnemonics:
+            return 0
+        stalls = self.total_stalls_forwarding if forwarding else self.total_stalls
+        return len(self.mnemonics) + PIPELINE_DEPTH + 1 + stalls
+
+    def get_instruction_cycles(self, forwarding: bool = True) -> List[int]:
+        """Get cycles spent by each instruction, one issue cycle plus its stalls"""
+        return [1 + i for i in (self.stalls_forwarding if forwarding else self.stalls)]
+
+    def count(self, kind: str) -> int:
+        """Get count of hazards of kind"""
+        return sum(1 for hazard in self.hazards if hazard.kind == kind)
+
+
+def analyze(words: Iterable[int]) -> HazardReport:
+    """Analyze words in linear time by tracking the last writer of each register"""
+    mnemonics, hazards, stalls, stalls_forwarding = [], [], [], []
+    # per register: index of last writer, cycle from which it could be read with and without forwarding
+    writer, ready, ready_forwarding = [-1] * 32, [0] * 32, [0] * 32
+    cycle = cycle_forwarding = 0
+
+    for index, word in enumerate(iter_words(words)):
+        op, reads, write = get_operands(word)
+        mnemonics.append(op)
+        cycle += 1
+        cycle_forwarding += 1
+
+        stall = stall_forwarding = 0
+        for reg in reads:
+            source = writer[reg]
+            if not reg or source < 0 or index - source >= PIPELINE_DEPTH:
+                continue
+            kind = LOAD_USE if index - source == 1 and mnemonics[source] in LOADS else RAW
+            hazards.append(Hazard(kind, index, source, reg))
+            stall = max(stall, ready[reg] - cycle)
+            stall_forwarding = max(stall_forwarding, ready_forwarding[reg] - cycle_forwarding)
+
+        cycle += stall
+        cycle_forwarding += stall_forwarding
+        stalls.append(stall)
+        stalls_forwarding.append(stall_forwarding)
+
+        if write:
+            source = writer[write]
+            if source >= 0 and index - source < PIPELINE_DEPTH:
+                hazards.append(Hazard(WAW, index, source, write))
+            writer[write] = index
+            # without forwarding value is read from register file after write back,
+            # with forwarding alu results are ready for next instruction and loads one cycle later
+            ready[write] = cycle + PIPELINE_DEPTH
+            ready_forwarding[write] = cycle_forwarding + (2 if op in LOADS else 1)
+
+    return HazardReport(mnemonics, hazards, stalls, stalls_forwarding)
@@ -0,0 +1,135 @@
+import re
+from functools import lru_cache
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from . import lexer
+from .directives import SECTIONS, STRINGS, DataSegment, split_directive
+from .instruction import expand_cached
+from .parse import get_statement
+from .pseudo import PSEUDO_INSTRUCTIONS
+from .regs import REGISTERS
+from .symbols import LABEL_DEF_RE, is_directive
+from .types import INSTRUCTIONS
+
+
+# kinds of highlighted spans
+MNEMONIC = 'mnemonic'
+REGISTER = 'register'
+IMMEDIATE = 'immediate'
+LABEL = 'label'
+DIRECTIVE = 'directive'
+STRING = 'string'
+ERROR = 'error'
+
+MNEMONICS = frozenset(INSTRUCTIONS) | frozenset(PSEUDO_INSTRUCTIONS)
+
+WORD_RE = re.compile(r'\S+')
+OPERAND_RE = re.compile(r'[^,]+')
+# registers and numbers inside brackets of addressing modes
+BRACKET_PART_RE = re.compile(r'[^\[\]+\s]+')
+
+BRACKETED = frozenset({lexer.DIRECT, lexer.INDIRECT, lexer.BASE_PLUS_INDEX, lexer.RELATIVE})
+
+
+class Span(NamedTuple):
+    """Highlighted part of statement, start and end are offsets in its text"""
+    start: int
+    end: int
+    kind: str
+
+
+def get_token_kind(token: lexer.Token) -> Optional[str]:
+    """Get kind of span of operand token, None if it is not highlighted"""
+    if token.kind == lexer.REGULAR:
+        return REGISTER if token.text in REGISTERS else LABEL
+    if token.kind == lexer.IMMEDIATE:
+        return IMMEDIATE
+    if token.kind == lexer.LABEL:
+        return LABEL
+    return None
+
+
+def get_operand_spans(text: str, start: int, end: int) -> List[Span]:
+    """Get spans of operand between start and end offsets, it is classified by the lexer as by the assembler.
+    Registers and numbers inside brackets of valid addressing modes are highlighted on their own"""
+    raw = text[start:end]
+    token = lexer.lex_operand(raw.replace('$', ''))
+    if token.kind in BRACKETED:
+        spans = []
+        for m in BRACKET_PART_RE.finditer(text, start, end):
+            kind = get_token_kind(lexer.lex_operand(m.group(0).lstrip('$')))
+            if kind is not None:
+                spans.append(Span(m.start(), m.end(), kind))
+        return spans
+    kind = get_token_kind(token)
+    if kind is None:
+        return []
+    return [Span(start + len(raw) - len(raw.lstrip()), start + len(raw.rstrip()), kind)]
+
+
+def iter_operands(text: str, start: int, end: int, strings: bool = False) -> List[Span]:
+    """Get spans of comma separated operands between start and end offsets, quoted string arguments are a single
+    string span"""
+    if strings:
+        args = text[start:end]
+        first = start + len(args) - len(args.lstrip())
+        return [Span(first, start + len(args.rstrip()), STRING)] if first < end else []
+    spans = []
+    for m in OPERAND_RE.finditer(text, start, end):
+        spans.extend(get_operand_spans(text, m.start(), m.end()))
+    return spans
+
+
+def check_statement(inst: str) -> Optional[str]:
+    """Get error message of instruction or directive without labels, None if it is valid.
+    Labels are not resolved, as their addresses depend on the whole program"""
+    try:
+        if is_directive(inst):
+            name, args = split_directive(inst)
+            if name not in SECTIONS:
+                DataSegment(emit=False).add(name, args)
+        else:
+            expand_cached(inst)
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+    return None
+
+
+def analyze_statement(text: str, start: int, end: int) -> Tuple[List[Span], Optional[Span], Optional[str]]:
+    """Get spans of statement between start and end offsets of text, with span and message of its error.
+    Statement could span multiple lines, it is checked as the assembler reads it"""
+    spans, pos = [], start
+    while (m := LABEL_DEF_RE.match(text, pos, end)) is not None:
+        spans.append(Span(m.start(1), m.end(1), LABEL))
+        pos = m.end()
+    word = WORD_RE.search(text, pos, end)
+    if word is None:
+        return spans, None, None
+    op = word.group(0)
+    directive = is_directive(op)
+    if directive:
+        spans.append(Span(word.start(), word.end(), DIRECTIVE))
+    elif op in MNEMONICS:
+        spans.append(Span(word.start(), word.end(), MNEMONIC))
+    spans.extend(iter_operands(text, word.end(), end, directive and op.lower() in STRINGS))
+    message = check_statement(get_statement(text[word.start():end]))
+    if message is None:
+        return spans, None, None
+    return spans, Span(word.start(), len(text[:end].rstrip()), ERROR), message
+
+
+@lru_cache(maxsize=1 << 14)
+def analyze_segment(segment: str) -> Tuple[Tuple[Span, ...], Optional[Tuple[Span, str]]]:
+    """Get highlighted spans of ; separated segment of source and its error with message.
+    Results are cached by segment text, so unchanged statements are never lexed again"""
+    spans, span, message = analyze_statement(segment, 0, len(segment))
+    return tuple(spans), None if span is None else (span, message)
+
+
+def analyze_text(text: str) -> Iterator[Tuple[int, Tuple[Span, ...], Optional[Tuple[Span, str]]]]:
+    """Split text on ; terminator as the assembler does, yields offset of each segment in text with its spans
+    and error, offsets of spans are relative to the segment"""
+    offset = 0
+    for segment in text.split(';'):
+        yield (offset, *analyze_segment(segment))
+        offset += len(segment) + 1
@@ -0,0 +1,272 @@
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from .directives import DataSegment
+from .errors import AssemblyError
+from .instruction import expand_cached
+from .output import listing_line
+from .symbols import (
+    WORD_SIZE, Layout, get_error, get_statement_size, get_words, is_directive, layout, split_labels
+)
+
+
+PROGRESS_STEP = 1000
+
+
+@dataclass(frozen=True)
+class Patch:
+    """Replace output lines from start till stop of previous run with new lines"""
+    start: int
+    stop: int
+    lines: List[str]
+
+
+class Update(NamedTuple):
+    """Prepared run, it is applied to the state of the assembler once committed"""
+    patch: Patch
+    # text of previous run the update is prepared from, and the new one
+    base: str
+    text: str
+    # statements from start till stop of previous run are replaced by statements
+    start: int
+    stop: int
+    statements: List[str]
+    # positions of ; separated segments that have no statement
+    empty: List[int]
+    rendered: int
+    addresses: List[int]
+    end: int
+    symbols: Dict[str, int]
+    labels: Dict[str, int]
+    # positions of statements whose output depends on other statements - label references, label and directive errors
+    dependent: List[int]
+    errors: Dict[int, AssemblyError]
+    directives: List[int]
+
+
+def error_line(inst: str, error: Union[AssemblyError, str]) -> str:
+    """Get output line of invalid statement, code of assembly error follows its message as in diagnostics"""
+    if isinstance(error, AssemblyError) and error.code:
+        return f"{inst} // error: {error.message} [{error.code}]"
+    return f"{inst} // error: {error}"
+
+
+def render_statement(inst: str, address: int = 0, symbols: Dict[str, int] = None) -> str:
+    """Get output line of statement at address, in the same format as the GUI output"""
+    try:
+        words = get_words(inst, address, symbols)
+    except AssemblyError as e:
+        return error_line(inst, e)
+    except Exception as e:
+        return error_line(inst, get_error(e, split_labels(inst)[1]))
+    return listing_line(inst, *words) if words else inst
+
+
+def refers_label(inst: str) -> bool:
+    """Check statement refers to label, so its output changes with addresses of labels"""
+    try:
+        return any(enc.word is None for enc in expand_cached(split_labels(inst)[1]))
+    except Exception:
+        return False
+
+
+def common_prefix(a: str, b: str) -> int:
+    """Get length of common prefix of strings, halves are compared as slices, not character by character"""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a: str, b: str, limit: int) -> int:
+    """Get length of common suffix of strings, up to limit"""
+    low, high, size_a, size_b = 0, limit, len(a), len(b)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[size_a - middle:size_a - low] == b[size_b - middle:size_b - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def is_structural(statement: str) -> bool:
+    """Check statement defines labels or could be a directive, so it affects layout of other statements"""
+    return ':' in statement or statement[:1] == '.'
+
+
+def layout_statements(statements: List[str]) -> Tuple[List[int], Layout, Dict[int, AssemblyError]]:
+    """Get addresses, state after the last statement and errors of labels and directives by position of statements"""
+    errors, state = [], Layout(data=DataSegment(emit=False))
+    addresses, _ = layout(enumerate(statements), errors=errors, state=state)
+    return addresses, state, {e.line: e for e in errors}
+
+
+def get_layout(statements: List[str]) -> Tuple[List[int], Dict[str, int], Dict[int, AssemblyError]]:
+    """Get addresses, symbols table and errors of labels and directives by position of statements"""
+    addresses, state, errors = layout_statements(statements)
+    return addresses, state.symbols, errors
+
+
+def render_statements(statements: List[str], render: Callable[..., str] = render_statement) -> List[str]:
+    """Get output lines of whole program"""
+    addresses, symbols, errors = get_layout(statements)
+    return [
+        error_line(inst, errors[position]) if position in errors else render(inst, address, symbols)
+        for position, (inst, address) in enumerate(zip(statements, addresses))
+    ]
+
+
+class IncrementalAssembler:
+    """Re-assembles only statements that changed since previous run. Edited statements are found by comparing the
+    texts, statements after them are moved by the change of their size while they define no labels or directives"""
+
+    def __init__(self, render: Callable[..., str] = render_statement):
+        self.render = render
+        self.rendered = 0
+        self.reset()
+
+    def prepare(self, text: str, progress: Callable[[int, int], None] = None) -> Optional[Update]:
+        """Assemble new text without changing state, so it could run on worker thread and be discarded.
+        progress is called with (done, total) statements, it could raise to cancel the run"""
+        base, old = self.text, self.statements
+        if text == base:
+            return None
+
+        # ; separated segments from first till last contain the edited characters, others are kept as they are
+        prefix = common_prefix(base, text)
+        suffix = common_suffix(base, text, min(len(base), len(text)) - prefix)
+        first = base.count(';', 0, prefix)
+        old_last, new_last = base.count(';', 0, len(base) - suffix), text.count(';', 0, len(text) - suffix)
+        finish = text.find(';', len(text) - suffix)
+        segments = text[text.rfind(';', 0, prefix) + 1:len(text) if finish < 0 else finish].split(';')
+
+        region, empty = [], []
+        for segment, part in enumerate(segments, first):
+            inst = part.replace('\n', '').strip()
+            if inst:
+                region.append(inst)
+            else:
+                empty.append(segment)
+        # segments without statement are skipped by positions of statements
+        empty_start, empty_stop = bisect_left(self.empty, first), bisect_left(self.empty, old_last + 1)
+        start, stop = first - empty_start, old_last + 1 - empty_stop
+        if new_last == old_last and empty == self.empty[empty_start:empty_stop] and region == old[start:stop]:
+            # only spaces around statements are edited
+            return None
+        shift, new_stop = start + len(region) - stop, start + len(region)
+        empty = (
+            self.empty[:empty_start] + empty + [segment + new_last - old_last for segment in self.empty[empty_stop:]]
+        )
+
+        if self.directives or self.errors or any(map(is_structural, old[start:stop] + region)):
+            statements = old[:start] + region + old[stop:]
+            addresses, state, errors = layout_statements(statements)
+            end, symbols, labels = state.address, state.symbols, state.lines
+            directives = [
+                position for position, inst in enumerate(statements)
+                if is_structural(inst) and is_directive(split_labels(inst)[1])
+            ]
+        else:
+            addresses, end, symbols, labels = self.move(start, stop, region)
+            errors, directives = {}, []
+
+        # dependent statements outside edited region are rendered again once labels or their addresses moved
+        forced = {position for position in errors if not start <= position < new_stop}
+        changed = symbols is not self.symbols and symbols != self.symbols
+        for position in self.dependent:
+            if start <= position < stop:
+                continue
+            moved = position if position < start else position + shift
+            if changed or addresses[moved] != self.addresses[position] or position in self.errors:
+                forced.add(moved)
+
+        lines, dependent = [], set(errors)
+        dependent.update(
+            position if position < start else position + shift
+            for position in self.dependent if not start <= position < stop
+        )
+        for position, inst in enumerate(region, start):
+            if position in errors:
+                lines.append(error_line(inst, errors[position]))
+            else:
+                lines.append(self.render(inst, addresses[position], symbols))
+            if refers_label(inst):
+                dependent.add(position)
+            if progress and not (position - start) % PROGRESS_STEP:
+                progress(position - start, len(region))
+
+        patch = Patch(start, stop, lines)
+        if forced:
+            # the patch is extended to cover them and lines in between are taken from previous run
+            first, last = min(start, min(forced)), max(new_stop, max(forced) + 1)
+            lines = self.lines[first:start] + lines + self.lines[stop:last - shift]
+            for position in forced:
+                inst = old[position] if position < start else old[position - shift]
+                if position in errors:
+                    lines[position - first] = error_line(inst, errors[position])
+                else:
+                    lines[position - first] = self.render(inst, addresses[position], symbols)
+                    if not refers_label(inst):
+                        dependent.discard(position)
+            patch = Patch(first, last - shift, lines)
+
+        return Update(
+            patch, base, text, start, stop, region, empty, len(region) + len(forced), addresses, end, symbols, labels,
+            sorted(dependent), errors, directives,
+        )
+
+    def move(self, start: int, stop: int, region: List[str]) -> Tuple[List[int], int, Dict[str, int], Dict[str, int]]:
+        """Get addresses, end address, symbols table and positions of labels once instructions from start till stop
+        are replaced by region of instructions, labels and statements after them are moved by change of its size"""
+        addresses = self.addresses
+        address = addresses[start] if start < len(addresses) else self.end
+        placed = []
+        for inst in region:
+            placed.append(address)
+            address += WORD_SIZE * get_statement_size(inst)
+        delta = address - (addresses[stop] if stop < len(addresses) else self.end)
+        shift = start + len(region) - stop
+        rest = [address + delta for address in addresses[stop:]] if delta else addresses[stop:]
+
+        symbols, labels = self.symbols, self.labels
+        moved = [name for name, position in labels.items() if position >= stop] if delta or shift else ()
+        if moved:
+            symbols, labels = dict(symbols), dict(labels)
+            for name in moved:
+                symbols[name] += delta
+                labels[name] += shift
+        return addresses[:start] + placed + rest, self.end + delta, symbols, labels
+
+    def commit(self, update: Update) -> Patch:
+        """Apply prepared update to the state of next run"""
+        if update.base is not self.text:
+            raise ValueError("Update is prepared from another state of the assembler")
+        patch = update.patch
+        self.statements[update.start:update.stop] = update.statements
+        self.lines[patch.start:patch.stop] = patch.lines
+        self.text, self.empty, self.rendered = update.text, update.empty, update.rendered
+        self.addresses, self.end = update.addresses, update.end
+        self.symbols, self.labels = update.symbols, update.labels
+        self.dependent, self.errors, self.directives = update.dependent, update.errors, update.directives
+        return patch
+
+    def update(self, text: str) -> Optional[Patch]:
+        """Assemble new text, returns patch of changed output lines or None if nothing changed"""
+        update = self.prepare(text)
+        if update is None:
+            self.rendered = 0
+            return None
+        return self.commit(update)
+
+    def reset(self) -> None:
+        """Forget previous run, so next update assembles everything"""
+        # empty text is a single segment without statement
+        self.text, self.statements, self.lines, self.empty = '', [], [], [0]
+        self.addresses, self.end, self.symbols, self.labels = [], 0, {}, {}
+        self.dependent, self.errors, self.directives = [], {}, []
@@ -1,48 +1,105 @@
 import re
-from dataclasses import dataclass
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Tuple
 import inspect
 
-from .types import iType, TYPES, get_instruction_type
+from .cache import EncodingCache
+from .lexer import lex_opcode, lex_operand, lex_operands
+from .pseudo import get_pseudo
+from .types import iType, TYPES, ENCODINGS, get_instruction_type
 
 
 OP_CODE_PATTERN = r'^[a-zA-Z]{1,4}\s+'
 
 
-@dataclass
-class Instruction:
-    """MIPS Assembly Instruction"""
+ENCODING_CACHE = EncodingCache()
 
-    inst: str
-    typ: TYPES = None
 
-    def __post_init__(self) -> None:
-        """Set instruction type after class initialization"""
-        op = self.parse(self.inst, OP_CODE_PATTERN).strip()
+class ThreadCache(threading.local):
+    """Encoding cache of thread, threads that set their own one, eg: profiling on GUI worker, leave the shared one"""
+    cache = ENCODING_CACHE
+
+
+_thread_cache = ThreadCache()
+
+
+def normalize(inst: str) -> str:
+    """Normalize instruction text, so instructions that differ only in spaces share the same cache key"""
+    return ','.join(i.strip() for i in ' '.join(inst.split()).split(','))
+
+
+def encode(inst: str) -> ENCODINGS:
+    """Encode real instruction string into its per-instruction record"""
+    op = lex_opcode(inst)
+
+    typ = get_instruction_type(op)
+    if not typ:
+        raise ValueError("Invalid instruction code")
+
+    rest = lex_operands(inst[len(op)+1:])  # instructions parts - registers & immediate - as typed tokens.
 
-        if op == 'subi':
-            # in case of op code in subi, change op to addi and then get the second complement of number
-            op = 'addi'
-            number_regex = r',\s*#?\s*(\d+)'
-            number = str(1 - int(re.findall(number_regex, self.inst)[0]))  # second complement
-            self.inst = re.sub(number_regex, f", {number}", self.inst)
+    if isinstance(typ, iType) and len(rest) == 2:
+        rest.insert(1, lex_operand('zero'))
+    return typ.assign(*rest)
 
-        typ = get_instruction_type(op)
-        if not typ:
-            raise ValueError("Invalid instruction code")
 
-        self.typ = typ
+def expand(inst: str) -> Tuple[ENCODINGS, ...]:
+    """Encode instruction string into records of real instructions, pseudo instructions are expanded by templates"""
+    pseudo, operands = get_pseudo(inst)
+    if pseudo is not None:
+        return pseudo.expand(operands)
+    return encode(inst),
 
-        inst = self.inst[len(op)+1:]  # get instruction without op part
-        rest = inst.replace('$', '').strip().split(',')  # instructions parts - registers & immediate - as list.
 
-        if isinstance(self.typ, iType) and len(rest) == 2:
-            rest.insert(1, 'zero')
-        self.typ.assign(*rest)
+def expand_cached(inst: str) -> Tuple[ENCODINGS, ...]:
+    """Expand instruction string, reusing records of previously encoded instruction with the same normalized text"""
+    return _thread_cache.cache.get_or_set(normalize(inst), lambda: expand(inst))
+
+
+@contextmanager
+def private_cache(cache: EncodingCache = None) -> Iterator[EncodingCache]:
+    """Encode instructions of current thread with separate cache, an empty one by default"""
+    previous = _thread_cache.cache
+    _thread_cache.cache = EncodingCache() if cache is None else cache
+    try:
+        yield _thread_cache.cache
+    finally:
+        _thread_cache.cache = previous
+
+
+def encode_cached(inst: str) -> ENCODINGS:
+    """Encode instruction string that is a single real instruction after expansion"""
+    records = expand_cached(inst)
+    if len(records) != 1:
+        raise ValueError(f"{inst.split()[0]} expands into {len(records)} instructions")
+    return records[0]
+
+
+@dataclass(slots=True)
+class Instruction:
+    """MIPS Assembly Instruction"""
+
+    inst: str
+    typ: TYPES = None
+    enc: ENCODINGS = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        """Set instruction type and encoded record after class initialization"""
+        if self.enc is None:
+            self.enc = encode_cached(self.inst)
+            if self.enc.word is None:
+                # labels are resolved by the parsers, which know addresses of the whole program
+                raise ValueError(f"Undefined label '{self.enc.label.name}'")
+        self.typ = self.enc.typ
 
     @staticmethod
     def parse(s: str, pattern: str) -> str:
         """Parse string s with required pattern"""
         m = re.compile(pattern).search(s)
+        if m is None:
+            raise ValueError(f"Invalid instruction '{s.strip()}'")
         return m.group(0)
 
     @property
@@ -62,11 +119,11 @@ class Instruction:
 
     def get_bin_repr(self) -> bin:
         """Gwt binary representation for whole instruction"""
-        return self.typ.get_full_repr()
+        return self.enc.get_full_repr()
 
     def get_hex_repr(self) -> hex:
         """Gwt hex representation for whole instruction"""
-        return hex(int(self.get_bin_repr(), 2))
+        return hex(self.enc.word)
 
     def get_inst_sections(self) -> tuple:
         """Return instructions sections / parts"""
@@ -78,4 +135,7 @@ class Instruction:
 
     def get_inst_assigned_sections_count(self) -> int:
         """Return count of instruction assigned section"""
-        return sum(1 for parm in inspect.signature(self.typ.assign).parameters if parm != 'self')
+        return sum(
+            1 for name, parm in inspect.signature(self.typ.assign).parameters.items()
+            if name != 'self' and parm.kind != parm.VAR_POSITIONAL
+        )
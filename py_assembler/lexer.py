@@ -0,0 +1,124 @@
+import re
+from typing import List, NamedTuple, Optional
+
+from .errors import INVALID_OPERANDS, AssemblyError
+
+
+# operand token kinds, one per addressing mode
+REGULAR = 'regular'
+IMMEDIATE = 'immediate'
+DIRECT = 'direct'
+INDIRECT = 'indirect'
+BASE_PLUS_INDEX = 'base_plus_index'
+RELATIVE = 'relative'
+# not an addressing mode, name of label used as jump or branch target
+LABEL = 'label'
+
+OP_CODE_RE = re.compile(r'^[a-zA-Z]{1,4}\s+')
+LABEL_RE = re.compile(r'[A-Za-z_.][A-Za-z0-9_.]*')
+NUMBER_RE = re.compile(r'-?(?:0[xX][0-9a-fA-F]+|0[bB][01]+|[0-9]+)')
+
+LETTERS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+class Token(NamedTuple):
+    """Typed operand token, kind is None when operand does not match any addressing mode"""
+    kind: Optional[str]
+    text: str
+    parts: tuple = ()
+
+
+def is_reg_name(s: str) -> bool:
+    """Check string has the shape of register name - zero, two letters or letter followed by digit"""
+    if len(s) == 2:
+        return s[0] in LETTERS and (s[1] in LETTERS or s[1].isdecimal())
+    return s == 'zero'
+
+
+def is_number(s: str) -> bool:
+    """Check string is a number with optional # prefix - decimal, 0x / 0b prefixed or negative"""
+    if s[:1] == '#':
+        s = s[1:]
+    return s.isdecimal() or NUMBER_RE.fullmatch(s) is not None
+
+
+def parse_immediate(text: str) -> int:
+    """Get integer of immediate, shared by instructions, pseudo instructions and directives"""
+    if text.isdecimal():
+        return int(text)
+    value = text.strip()
+    if not is_number(value):
+        raise AssemblyError(f"Invalid immediate '{value}'", code=INVALID_OPERANDS, text=value)
+    value = value.lstrip('#')
+    digits = value.lstrip('-')
+    # leading zeros of decimal numbers are allowed, so base is only taken from prefix
+    number = int(digits, 0) if digits[:2].lower() in ('0x', '0b') else int(digits)
+    return -number if value[0] == '-' else number
+
+
+def is_label(s: str) -> bool:
+    """Check string is a valid label name"""
+    return bool(LABEL_RE.fullmatch(s))
+
+
+def lex_bracket(value: str) -> Token:
+    """Classify bracketed operand - direct, indirect, base plus index or relative"""
+    inner = value[1:-1].strip()
+    if is_number(inner):
+        number = inner.replace('#', '')
+        # direct address is not negative
+        return Token(DIRECT, value, (number,)) if number[:1] != '-' else Token(None, value)
+    if is_reg_name(inner):
+        return Token(INDIRECT, value, (inner,))
+
+    s = value.replace('[', '').replace(']', '')
+    index = s.find('+')
+    if index == -1:
+        return Token(None, value)
+    left, right = s[:index].strip(), s[index + 1:].strip()
+    if is_reg_name(left) and is_reg_name(right):
+        return Token(BASE_PLUS_INDEX, value, (left, right))
+
+    # relative mode ignores # prefix, and number could be on either side
+    left, right = left.replace('#', '').strip(), right.replace('#', '').strip()
+    if left.isnumeric():
+        left, right = right, left
+    elif not right.isnumeric():
+        return Token(None, value)
+    if is_reg_name(left):
+        return Token(RELATIVE, value, (left,))
+    return Token(None, value)
+
+
+def lex_operand(value: str) -> Token:
+    """Classify operand by its addressing mode in a single pass"""
+    value = value.strip()
+    if not value:
+        return Token(None, value)
+    if value[0] == '[' and value[-1] == ']' and len(value) > 1:
+        return lex_bracket(value)
+    if is_reg_name(value):
+        return Token(REGULAR, value, (value,))
+    if is_number(value):
+        return Token(IMMEDIATE, value, (value.replace('#', ''),))
+    if is_label(value):
+        return Token(LABEL, value, (value,))
+    return Token(None, value)
+
+
+def as_token(value) -> Token:
+    """Get token of value, value could be token or raw operand string"""
+    return value if isinstance(value, Token) else lex_operand(value)
+
+
+def lex_opcode(inst: str) -> str:
+    """Get opcode name from instruction string"""
+    m = OP_CODE_RE.match(inst)
+    if m is None:
+        raise ValueError(f"Invalid instruction '{inst.strip()}'")
+    return m.group(0).strip()
+
+
+def lex_operands(operands: str) -> List[Token]:
+    """Split operands part of instruction into typed tokens"""
+    return [lex_operand(i) for i in operands.replace('$', '').split(',')]
@@ -0,0 +1,229 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List, Union
+
+from .directives import DATA_BASE
+from .errors import Diagnostic
+from .output import to_array
+
+
+MAGIC = b'PYAO'
+VERSION = 2
+
+# flags of optional sections
+HAS_LINES = 1 << 0
+HAS_SYMBOLS = 1 << 1
+HAS_DIAGNOSTICS = 1 << 2
+HAS_DATA = 1 << 3
+
+# magic, version, flags, words count, symbols count, symbols section size
+HEADER = struct.Struct('<4sHHIII4x')
+SYMBOL = struct.Struct('<IH')
+# address and size of data section bytes
+DATA_HEADER = struct.Struct('<II')
+# line, column or zero if it is unknown, code length, message length
+DIAGNOSTIC = struct.Struct('<IIHH')
+COUNT = struct.Struct('<I')
+
+
+def pack_symbols(symbols: Dict[str, int]) -> bytes:
+    """Pack symbols table as (value, name length, name) entries"""
+    data = bytearray()
+    for name, value in symbols.items():
+        name = name.encode('utf-8')
+        data += SYMBOL.pack(value, len(name)) + name
+    # keep next sections aligned to 4 bytes
+    data += b'\0' * (-len(data) % 4)
+    return bytes(data)
+
+
+def unpack_symbols(data: Union[bytes, memoryview], count: int) -> Dict[str, int]:
+    """Unpack symbols table"""
+    symbols, offset = {}, 0
+    for _ in range(count):
+        value, length = SYMBOL.unpack_from(data, offset)
+        offset += SYMBOL.size
+        symbols[bytes(data[offset:offset + length]).decode('utf-8')] = value
+        offset += length
+    return symbols
+
+
+def pack_diagnostics(diagnostics: List[Diagnostic]) -> bytes:
+    """Pack diagnostics as count followed by (line, column, code length, message length, code, message) entries"""
+    data = bytearray(COUNT.pack(len(diagnostics)))
+    for line, column, message, code in diagnostics:
+        code, message = code.encode('utf-8'), message.encode('utf-8')
+        data += DIAGNOSTIC.pack(line or 0, column or 0, len(code), len(message)) + code + message
+    data += b'\0' * (-len(data) % 4)
+    return bytes(data)
+
+
+def unpack_diagnostics(data: Union[bytes, memoryview]) -> List[Diagnostic]:
+    """Unpack diagnostics"""
+    diagnostics, offset = [], COUNT.size
+    for _ in range(COUNT.unpack_from(data)[0]):
+        line, column, code_length, message_length = DIAGNOSTIC.unpack_from(data, offset)
+        offset += DIAGNOSTIC.size
+        code = bytes(data[offset:offset + code_length]).decode('utf-8')
+        offset += code_length
+        message = bytes(data[offset:offset + message_length]).decode('utf-8')
+        offset += message_length
+        diagnostics.append(Diagnostic(line or None, column or None, message, code))
+    if offset > len(data):
+        raise ValueError("Truncated object file")
+    return diagnostics
+
+
+def pack_data(data: bytes, address: int) -> bytes:
+    """Pack data section as (address, size) followed by its bytes"""
+    return DATA_HEADER.pack(address, len(data)) + bytes(data) + b'\0' * (-len(data) % 4)
+
+
+def write_object(
+        path: Union[str, os.PathLike],
+        words: Iterable[int],
+        lines: Iterable[int] = None,
+        symbols: Dict[str, int] = None,
+        diagnostics: List[Diagnostic] = None,
+        data: bytes = None,
+        data_address: int = DATA_BASE
+) -> None:
+    """Write words with optional source line of each word, symbols table, data section bytes at data address and
+    diagnostics into object file"""
+    words = to_array(words, 'little')
+    flags, sections = 0, [words.tobytes()]
+    if lines is not None:
+        lines = to_array(lines, 'little')
+        if len(lines) != len(words):
+            raise ValueError("Lines table should have one entry per word")
+        flags |= HAS_LINES
+        sections.append(lines.tobytes())
+    symbols_data = b''
+    if symbols:
+        flags |= HAS_SYMBOLS
+        symbols_data = pack_symbols(symbols)
+        sections.append(symbols_data)
+    if data:
+        flags |= HAS_DATA
+        sections.append(pack_data(data, data_address))
+    if diagnostics:
+        # last section, its size is known from its own count
+        flags |= HAS_DIAGNOSTICS
+        sections.append(pack_diagnostics(diagnostics))
+    header = HEADER.pack(MAGIC, VERSION, flags, len(words), len(symbols or ()), len(symbols_data))
+    with open(path, 'wb') as f:
+        f.write(header)
+        for section in sections:
+            f.write(section)
+
+
+class ObjectFile:
+    """Memory mapped object file, words are exposed without copying"""
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        with open(path, 'rb') as f:
+            # empty file could not be mapped
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError("Truncated object file")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        magic, version, self.flags, self.count, self.symbols_count, symbols_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Invalid object file")
+
+        self.text_offset = HEADER.size
+        self.lines_offset = self.text_offset + self.count * 4
+        self.symbols_offset = self.lines_offset + (self.count * 4 if self.flags & HAS_LINES else 0)
+        self.data_offset = self.symbols_offset + symbols_size
+        self.data_address, self.data_size = DATA_BASE, 0
+        self.diagnostics_offset = self.data_offset
+        if self.flags & HAS_DATA:
+            try:
+                self.data_address, self.data_size = DATA_HEADER.unpack_from(self._mmap, self.data_offset)
+            except struct.error:
+                self.close()
+                raise ValueError("Truncated object file") from None
+            self.diagnostics_offset += DATA_HEADER.size + self.data_size + (-self.data_size % 4)
+        # sections are aligned to 4 bytes, so size of whole file is too
+        end = self.diagnostics_offset + (COUNT.size if self.flags & HAS_DIAGNOSTICS else 0)
+        if len(self._mmap) < end or len(self._mmap) % 4:
+            self.close()
+            raise ValueError("Truncated object file")
+
+    def _section(self, offset: int, count: int) -> Union[memoryview, array]:
+        """Get uint32 view of section, it is copied only on big endian platforms"""
+        view = memoryview(self._mmap)[offset:offset + count * 4]
+        if sys.byteorder != 'little':
+            words = array('I', view.tobytes())
+            words.byteswap()
+            view.release()
+            return words
+        view = view.cast('I')
+        self._views.append(view)
+        return view
+
+    @property
+    def words(self) -> Union[memoryview, array]:
+        """Get text section words"""
+        return self._section(self.text_offset, self.count)
+
+    @property
+    def lines(self) -> Union[memoryview, array, None]:
+        """Get source line of each word, None if object has no lines table"""
+        if self.flags & HAS_LINES:
+            return self._section(self.lines_offset, self.count)
+
+    @property
+    def symbols(self) -> Dict[str, int]:
+        """Get symbols table"""
+        if not self.flags & HAS_SYMBOLS:
+            return {}
+        with memoryview(self._mmap)[self.symbols_offset:] as view:
+            return unpack_symbols(view, self.symbols_count)
+
+    @property
+    def data(self) -> bytes:
+        """Get data section bytes, they are placed at data_address"""
+        start = self.data_offset + DATA_HEADER.size
+        return self._mmap[start:start + self.data_size] if self.data_size else b''
+
+    @property
+    def diagnostics(self) -> List[Diagnostic]:
+        """Get diagnostics of assembled source"""
+        if not self.flags & HAS_DIAGNOSTICS:
+            return []
+        with memoryview(self._mmap)[self.diagnostics_offset:] as view:
+            try:
+                return unpack_diagnostics(view)
+            except struct.error:
+                raise ValueError("Truncated object file") from None
+
+    def as_numpy(self) -> 'numpy.ndarray':
+        """Get text section words as read only numpy array sharing the mapped memory"""
+        import numpy as np
+        return np.frombuffer(self._mmap, dtype='<u4', count=self.count, offset=self.text_offset)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """Release views then unmap file"""
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> 'ObjectFile':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_object(path: Union[str, os.PathLike]) -> ObjectFile:
+    """Open object file for reading"""
+    return ObjectFile(path)
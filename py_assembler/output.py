@@ -0,0 +1,93 @@
+import sys
+from array import array
+from typing import IO, Iterable, Iterator, Tuple
+
+from .directives import DATA_BASE
+
+
+IHEX_RECORD_SIZE = 16
+
+
+def to_array(words: Iterable[int], byteorder: str = sys.byteorder) -> array:
+    """Get uint32 array of words in required byte order"""
+    words = array('I', words)
+    if byteorder != sys.byteorder:
+        words.byteswap()
+    return words
+
+
+def data_words(data: bytes) -> array:
+    """Get data section bytes as uint32 words, data is little endian and last word is zero padded"""
+    words = array('I', bytes(data) + b'\0' * (-len(data) % 4))
+    if sys.byteorder != 'little':
+        words.byteswap()
+    return words
+
+
+def write_binary(words: Iterable[int], f: IO[bytes], byteorder: str = 'little', data: bytes = b'') -> None:
+    """Write words as raw binary in one bulk write, followed by data section bytes as they are"""
+    f.write(to_array(words, byteorder).tobytes() + bytes(data))
+
+
+def write_hex(words: Iterable[int], f: IO[str]) -> None:
+    """Write one hex word per line"""
+    f.write(''.join(f"{word:#010x}\n" for word in words))
+
+
+def ihex_record(address: int, typ: int, data: bytes) -> str:
+    """Get one Intel HEX record with its checksum"""
+    record = bytes((len(data), (address >> 8) & 0xFF, address & 0xFF, typ)) + data
+    return f":{record.hex().upper()}{(-sum(record)) & 0xFF:02X}\n"
+
+
+def ihex_records(data: bytes, address: int, upper: int = None) -> Iterator[str]:
+    """Get data records of bytes at address, extended linear address records are added when upper 16 bits of
+    address differ from upper"""
+    for offset in range(0, len(data), IHEX_RECORD_SIZE):
+        current = address + offset
+        if current >> 16 != upper:
+            upper = current >> 16
+            yield ihex_record(0, 0x04, upper.to_bytes(2, 'big'))
+        yield ihex_record(current & 0xFFFF, 0x00, data[offset:offset + IHEX_RECORD_SIZE])
+
+
+def write_ihex(
+        words: Iterable[int],
+        f: IO[str],
+        byteorder: str = 'little',
+        address: int = 0,
+        data: bytes = b'',
+        data_address: int = DATA_BASE
+) -> None:
+    """Write words as Intel HEX followed by data section bytes at data address, extended linear address records are
+    added for images above 64 KiB"""
+    records = list(ihex_records(to_array(words, byteorder).tobytes(), address))
+    # data section always starts with its own extended address record
+    records.extend(ihex_records(bytes(data), data_address))
+    records.append(ihex_record(0, 0x01, b''))
+    f.write(''.join(records))
+
+
+def listing_line(inst: str, word: int, *words: int) -> str:
+    """Get listing line of instruction, in the same format as the GUI output.
+    Words of expanded pseudo instruction are separated by spaces"""
+    if words:
+        words = (word, ) + words
+        return f"{inst} // {' '.join(hex(i) for i in words)} // {' '.join(format(i, '032b') for i in words)}"
+    return f"{inst} // {hex(word)} // {word:032b}"
+
+
+def write_listing(
+        statements: Iterable[Tuple[int, str]],
+        words: Iterable[int],
+        f: IO[str],
+        data: bytes = b'',
+        data_address: int = DATA_BASE
+) -> None:
+    """Write listing of (line number, statement) and their words, followed by words of data section with their
+    addresses"""
+    f.write(''.join(f"{listing_line(inst, word)}\n" for (_, inst), word in zip(statements, words)))
+    f.write(''.join(
+        f"{listing_line(f'.data {data_address + index * 4:#010x}', word)}\n"
+        for index, word in enumerate(data_words(data))
+    ))
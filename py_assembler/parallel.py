@@ -0,0 +1,128 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+from .directives import DATA_BASE, DataSegment, align_address
+from .parse import iter_chunks, iter_statements
+from .symbols import Layout, get_alignment, iter_resolved, layout
+
+
+CHUNK_STATEMENTS = 1 << 14
+# smaller chunks cost more to send to workers than to assemble
+MIN_CHUNK_STATEMENTS = 1 << 10
+# files larger than this are split into chunks of statements instead of being assembled whole by one worker
+LARGE_SOURCE = 1 << 22
+
+
+class Image(NamedTuple):
+    """Assembled source - words of text section, bytes of data section placed at data address and symbols table"""
+    words: array
+    data: bytes
+    data_address: int
+    symbols: Dict[str, int]
+
+
+def assemble_statements(
+        statements: Iterable[Tuple[int, str]],
+        path: str = None,
+        symbols: Dict[str, int] = None,
+        address: int = 0,
+        errors: list = None,
+        state: Layout = None
+) -> bytes:
+    """Assemble (line number, statement) pairs into packed buffer of uint32 words.
+    Chunk of larger source is passed with symbols table and address of its first statement, whole source could be
+    passed with state that holds addresses of its sections and collects its data section and labels.
+    If errors list is passed, all errors are appended to it and invalid statements are skipped"""
+    statements = iter_resolved(statements, path, symbols, address, state, errors)
+    words = array('I', (statement.enc.word for statement in statements))
+    return words.tobytes()
+
+
+def measure_file(path: Union[str, os.PathLike]) -> Tuple[int, int, int]:
+    """Get sizes of text and data sections of file in bytes and boundary of its data section, without encoding"""
+    path = os.fspath(path)
+    statements = list(iter_statements(iter_chunks(path)))
+    # data section at zero has the same layout as at any address aligned on its boundary
+    state = Layout(path, 0, DataSegment(0, emit=False))
+    layout(statements, path, state=state)
+    return state.address, state.data.size, get_alignment(statements)
+
+
+def assemble_file(path: Union[str, os.PathLike], address: int = 0, data_address: int = DATA_BASE) -> Image:
+    """Assemble whole file placed at text address and data address"""
+    path = os.fspath(path)
+    state = Layout(path, address, DataSegment(data_address))
+    words = to_words(assemble_statements(iter_statements(iter_chunks(path)), path, state=state))
+    return Image(words, bytes(state.data.data), data_address, state.symbols)
+
+
+def iter_batches(statements: Iterable[Tuple[int, str]], size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Group statements into lists of required size"""
+    statements = iter(statements)
+    while batch := list(islice(statements, size)):
+        yield batch
+
+
+def get_chunk_statements(count: int, workers: int = None) -> int:
+    """Get size of chunks that split count statements evenly among workers, bounded by the chunk size limits"""
+    workers = workers or os.cpu_count() or 1
+    return max(MIN_CHUNK_STATEMENTS, min(CHUNK_STATEMENTS, -(-count // workers)))
+
+
+def is_large(path: Union[str, os.PathLike]) -> bool:
+    """Check file is large enough to be split into chunks of statements"""
+    return os.path.getsize(path) > LARGE_SOURCE
+
+
+def to_words(buffer: bytes) -> array:
+    """Get array of uint32 words from packed buffer"""
+    words = array('I')
+    words.frombytes(buffer)
+    return words
+
+
+def assemble_statements_parallel(
+        statements: Iterable[Tuple[int, str]],
+        workers: int = None,
+        chunk_statements: int = None,
+        path: str = None,
+        state: Layout = None
+) -> array:
+    """Assemble (line number, statement) pairs on multiple processes, words are returned in source order.
+    Labels are collected in a first pass, so chunks could refer to labels of each other. If state is passed,
+    statements are placed from its addresses and its data section is filled by the first pass.
+    Statements are split evenly among workers by default"""
+    statements = statements if isinstance(statements, list) else list(statements)
+    chunk_statements = chunk_statements or get_chunk_statements(len(statements), workers)
+    addresses, symbols = layout(statements, path, state=state)
+    words = array('I')
+    with ProcessPoolExecutor(workers) as executor:
+        batches = iter_batches(statements, chunk_statements)
+        starts = addresses[::chunk_statements]
+        for buffer in executor.map(assemble_statements, batches, repeat(path), repeat(symbols), starts):
+            words.frombytes(buffer)
+    return words
+
+
+def assemble_parallel(instructions_str: str, workers: int = None, chunk_statements: int = None) -> array:
+    """Assemble one large source on multiple processes, words are returned in source order"""
+    return assemble_statements_parallel(iter_statements((instructions_str, )), workers, chunk_statements)
+
+
+def assemble_files_parallel(paths: Iterable[Union[str, os.PathLike]], workers: int = None) -> List[Image]:
+    """Assemble multiple files on multiple processes, images are returned in paths order.
+    Each file is placed after text and data sections of previous ones, so sizes of all files are measured first
+    and labels are resolved at their final addresses"""
+    paths = list(paths)
+    addresses, data_addresses = [0], [DATA_BASE]
+    with ProcessPoolExecutor(workers) as executor:
+        if len(paths) > 1:
+            addresses, data_addresses, address, end = [], [], 0, DATA_BASE
+            for text_size, data_size, alignment in executor.map(measure_file, paths):
+                addresses.append(address)
+                data_addresses.append(align_address(end, alignment))
+                address, end = address + text_size, data_addresses[-1] + data_size
+        return list(executor.map(assemble_file, paths, addresses, data_addresses))
@@ -1,11 +1,112 @@
-from typing import List
+import os
+from array import array
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from py_assembler.errors import AssemblyError, Diagnostic
 from py_assembler.instruction import Instruction
+from py_assembler.symbols import Layout, iter_resolved
 
 
-def instructions_parser(instructions_str: str) -> List[Instruction]:
-    """Parse multiple instructions at once from string"""
-    return [
-        Instruction(i.replace('\n', '').strip())
-        for i in instructions_str.split(';')
-        if i.strip()
-    ]
+CHUNK_SIZE = 1 << 16
+
+
+@dataclass
+class Program:
+    """Assembled program, instructions of text section with data section bytes and symbols table"""
+    instructions: List[Instruction]
+    data: bytearray = field(repr=False)
+    data_base: int
+    symbols: Dict[str, int] = field(repr=False)
+
+    @property
+    def words(self) -> array:
+        """Get machine words of text section"""
+        return array('I', (inst.enc.word for inst in self.instructions))
+
+
+def iter_chunks(source: Union[str, os.PathLike, IO[str]], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Read file object or path lazily in chunks"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r') as f:
+            yield from iter_chunks(f, chunk_size)
+        return
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def get_statement(segment: str) -> str:
+    """Get statement of ; separated segment of source as it is assembled, new lines inside it are removed"""
+    return segment.replace('\n', '').strip()
+
+
+def iter_statements(chunks: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """Split chunks on ; terminator into (line number, statement), statement could span chunks boundaries"""
+    line, rest = 1, ''
+    for chunk in chunks:
+        statements = (rest + chunk).split(';')
+        rest = statements.pop()  # last part is not terminated yet, it is completed by next chunks
+        for statement in statements:
+            inst = get_statement(statement)
+            if inst:
+                # line of statement is the line of its first non-space character
+                yield line + statement.count('\n', 0, len(statement) - len(statement.lstrip())), inst
+            line += statement.count('\n')
+    inst = get_statement(rest)
+    if inst:
+        yield line + rest.count('\n', 0, len(rest) - len(rest.lstrip())), inst
+
+
+def instructions_stream(
+        source: Union[str, os.PathLike, IO[str]],
+        chunk_size: int = CHUNK_SIZE,
+        words: bool = False
+) -> Iterator[Union[Instruction, int]]:
+    """Parse instructions lazily from file object or path, yields instructions or their machine words.
+    Instructions that refer to later labels are yielded once the label is reached"""
+    path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+    for statement in iter_resolved(iter_statements(iter_chunks(source, chunk_size)), path):
+        yield statement.enc.word if words else Instruction(statement.inst, enc=statement.enc)
+
+
+def get_diagnostics(errors: List[AssemblyError], source: str) -> List[Diagnostic]:
+    """Get diagnostics of errors sorted by their location, columns are found in lines of source.
+    Records of one statement could report the same error, eg: both halves of la, so it is kept once"""
+    lines = source.split('\n')
+    diagnostics = dict.fromkeys(
+        Diagnostic.from_error(e, lines[e.line - 1] if e.line and e.line <= len(lines) else None) for e in errors
+    )
+    return sorted(diagnostics, key=lambda d: (d.line or 0, d.column or 0))
+
+
+def instructions_parser(
+        instructions_str: str,
+        batch: bool = False,
+        diagnostics: Optional[list] = None
+) -> Union[List[Instruction], 'numpy.ndarray']:
+    """Parse multiple instructions at once from string, in batch mode machine words are returned as numpy array.
+    If diagnostics list is passed, invalid statements are skipped and all errors are appended to it as diagnostics"""
+    errors = None if diagnostics is None else []
+    statements = iter_resolved(iter_statements((instructions_str, )), errors=errors)
+    if batch:
+        # numpy is only required in batch mode, words are exported from records without building instructions
+        from .batch import words_array
+        words = words_array(enc.word for _, _, _, enc in statements)
+    else:
+        words = [Instruction(inst, enc=enc) for _, inst, _, enc in statements]
+    if errors:
+        diagnostics.extend(get_diagnostics(errors, instructions_str))
+    return words
+
+
+def program_parser(instructions_str: str, diagnostics: Optional[list] = None) -> Program:
+    """Parse whole program with .text / .data sections, data directives are packed into bytes of data section.
+    If diagnostics list is passed, invalid statements are skipped and all errors are appended to it as diagnostics"""
+    state, errors = Layout(), None if diagnostics is None else []
+    statements = iter_resolved(iter_statements((instructions_str, )), state=state, errors=errors)
+    instructions = [Instruction(inst, enc=enc) for _, inst, _, enc in statements]
+    if errors:
+        diagnostics.extend(get_diagnostics(errors, instructions_str))
+    return Program(instructions, state.data.data, state.data.base, state.symbols)
@@ -0,0 +1,169 @@
+import sys
+from dataclasses import dataclass
+from threading import Lock, local
+from time import perf_counter_ns
+from types import CodeType
+from typing import Callable, Dict, Optional, Tuple
+
+from . import instruction, lexer, output, pseudo
+from .cache import EncodingCache
+from .types import Encoding, iType, jType, rType
+
+
+def get_op(self, result) -> str:
+    """Get mnemonic of instruction type, record or pseudo instruction passed as self"""
+    return getattr(self, 'op', None) or self.typ.op
+
+
+# stage -> (owner, attribute, breakdown key of (first argument, result)) of functions and methods that are timed.
+# Calls are matched by code objects of functions, stages are timed inclusively, so time of assign contains operands
+# classification and packing of its record
+STAGES: Dict[str, Tuple[Tuple[object, str, Optional[Callable]], ...]] = {
+    'cache': ((EncodingCache, 'get_or_set', None), ),
+    'opcode': ((lexer, 'lex_opcode', lambda inst, result: result), ),
+    'classify': ((lexer, 'lex_operand', lambda value, result: result.kind or 'invalid'), ),
+    'expand': ((pseudo.Pseudo, 'expand', get_op), ),
+    'assign': ((iType, 'assign', get_op), (rType, 'assign', get_op), (jType, 'assign', get_op)),
+    'pack': ((Encoding, 'pack', get_op), ),
+    'resolve': ((Encoding, 'resolve', get_op), ),
+    'format': (
+        (Encoding, 'get_sub_repr', get_op),
+        (Encoding, 'get_full_repr', get_op),
+        (instruction.Instruction, 'get_hex_repr', get_op),
+        (output, 'listing_line', None),
+    ),
+}
+
+CODES: Dict[CodeType, Tuple[str, Optional[Callable]]] = {
+    getattr(owner, name).__code__: (stage, key) for stage, targets in STAGES.items() for owner, name, key in targets
+}
+
+
+def get_key(key: Callable, frame, result) -> str:
+    """Get breakdown key of call of frame, calls that raised are keyed as errors"""
+    if result is None:
+        return 'error'
+    code = frame.f_code
+    return key(frame.f_locals[code.co_varnames[0]] if code.co_argcount else None, result)
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """Calls and cumulative time of stage"""
+    calls: int
+    ns: int
+
+    @property
+    def per_call(self) -> float:
+        """Get average time of single call in ns"""
+        return self.ns / self.calls if self.calls else 0.0
+
+
+@dataclass(frozen=True)
+class ProfileStats:
+    """Snapshot of profiler counters, details break stages down by mnemonic or addressing mode"""
+    stages: Dict[str, StageStats]
+    details: Dict[str, Dict[str, StageStats]]
+
+    def format(self) -> str:
+        """Get report of stages and their details as text table"""
+        lines = [f"{'stage':<24} {'calls':>12} {'total ms':>12} {'ns / call':>12}"]
+        for name, stage in self.stages.items():
+            lines.append(f"{name:<24} {stage.calls:>12,} {stage.ns / 1e6:>12.3f} {stage.per_call:>12,.0f}")
+            details = sorted(self.details.get(name, {}).items(), key=lambda item: -item[1].ns)
+            for key, detail in details:
+                lines.append(
+                    f"  {key:<22} {detail.calls:>12,} {detail.ns / 1e6:>12.3f} {detail.per_call:>12,.0f}"
+                )
+        return '\n'.join(lines)
+
+
+class Profiler:
+    """Per-stage counters and nanosecond timings of the assembler pipeline.
+    Calls are timed by profile hook of threads that enabled it, functions are not replaced, so other threads and
+    disabled profiler cost nothing"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._local = local()
+        self._stages = {name: [0, 0] for name in STAGES}
+        self._details = {name: {} for name in STAGES}
+
+    @property
+    def enabled(self) -> bool:
+        """Check counters are being collected on current thread"""
+        return getattr(self._local, 'depth', 0) > 0
+
+    def clear(self) -> None:
+        """Reset counters of all stages"""
+        with self._lock:
+            for name, counters in self._stages.items():
+                counters[:] = 0, 0
+                self._details[name].clear()
+
+    def add(self, stage: str, ns: int, key: str = None) -> None:
+        """Add call of stage that took ns, counters are shared by all profiled threads"""
+        with self._lock:
+            counters = self._stages[stage]
+            counters[0] += 1
+            counters[1] += ns
+            if key is not None:
+                detail = self._details[stage].setdefault(key, [0, 0])
+                detail[0] += 1
+                detail[1] += ns
+
+    def hook(self) -> Callable:
+        """Get profile hook of current thread, that times calls of stages"""
+        state, stack = self._local, []
+
+        def profile(frame, event, result):
+            if event == 'call':
+                if frame.f_code in CODES:
+                    stack.append((frame, perf_counter_ns()))
+            elif event == 'return' and stack and stack[-1][0] is frame:
+                elapsed = perf_counter_ns() - stack.pop()[1]
+                stage, key = CODES[frame.f_code]
+                self.add(stage, elapsed, get_key(key, frame, result) if key and state.detail else None)
+        return profile
+
+    def enable(self, detail: bool = False) -> None:
+        """Start collecting counters of current thread, nested calls are counted and need the same count of disable
+        calls"""
+        state = self._local
+        state.depth = getattr(state, 'depth', 0) + 1
+        state.detail = getattr(state, 'detail', False) or detail
+        if state.depth == 1:
+            state.previous = sys.getprofile()
+            sys.setprofile(self.hook())
+
+    def disable(self) -> None:
+        """Stop collecting counters of current thread once all enable calls are matched, collected counters are kept"""
+        state = self._local
+        if not getattr(state, 'depth', 0):
+            return
+        state.depth -= 1
+        if state.depth:
+            return
+        sys.setprofile(state.previous)
+        state.previous, state.detail = None, False
+
+    def stats(self) -> ProfileStats:
+        """Get snapshot of counters"""
+        with self._lock:
+            return ProfileStats(
+                {name: StageStats(*counters) for name, counters in self._stages.items()},
+                {
+                    name: {key: StageStats(*counters) for key, counters in details.items()}
+                    for name, details in self._details.items() if details
+                },
+            )
+
+    def __enter__(self) -> 'Profiler':
+        self.enable()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.disable()
+
+
+PROFILER = Profiler()
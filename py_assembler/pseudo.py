@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from .lexer import IMMEDIATE, LABEL, REGULAR, Token, lex_operand, lex_operands, parse_immediate
+from .regs import REGISTERS
+from .types import ENCODINGS, HIGH, INSTRUCTIONS, LOW, LabelRef
+
+
+ZERO = lex_operand('zero')
+# assembler temporary register, used by expansions that need an intermediate value
+AT = lex_operand('at')
+
+INT16 = range(-(1 << 15), 1 << 15)
+UINT16 = range(1 << 16)
+INT32 = range(-(1 << 31), 1 << 32)
+
+
+def imm_token(value: int) -> Token:
+    """Get immediate token of computed value"""
+    return Token(IMMEDIATE, f'#{value}', (str(value), ))
+
+
+def get_number(token: Token) -> int:
+    """Get integer of immediate operand, decimal or 0x / 0b prefixed with optional # prefix"""
+    return parse_immediate(token.text)
+
+
+def is_label(token: Token) -> bool:
+    """Check operand is label name, not register"""
+    return token.kind in (REGULAR, LABEL) and token.text not in REGISTERS
+
+
+def number(index: int) -> Callable[[List[Token]], Token]:
+    """Get operand of immediate in decimal, so any accepted number format could be assigned"""
+    return lambda operands: imm_token(get_number(operands[index]))
+
+
+def negate(index: int) -> Callable[[List[Token]], Token]:
+    """Get operand of negated immediate"""
+    return lambda operands: imm_token(-get_number(operands[index]))
+
+
+def low(index: int) -> Callable[[List[Token]], object]:
+    """Get operand of lower half of immediate or label address"""
+    def get(operands):
+        token = operands[index]
+        return LabelRef(token.text, mode=LOW) if is_label(token) else imm_token(get_number(token) & 0xFFFF)
+    return get
+
+
+def high(index: int) -> Callable[[List[Token]], object]:
+    """Get operand of upper half of immediate or label address"""
+    def get(operands):
+        token = operands[index]
+        return LabelRef(token.text, mode=HIGH) if is_label(token) else imm_token((get_number(token) >> 16) & 0xFFFF)
+    return get
+
+
+def fits(index: int, bits: range) -> Callable[[List[Token]], bool]:
+    """Get condition of immediate operand being in range"""
+    return lambda operands: get_number(operands[index]) in bits
+
+
+@dataclass(frozen=True)
+class Pseudo:
+    """Pseudo instruction, expanded into real instructions of INSTRUCTIONS by precompiled templates.
+    Each template is (condition, steps), the first one whose condition is None or holds for operands is used.
+    Step is (instruction type, operands), operand is index of pseudo instruction operand, fixed token or
+    function of operands"""
+    op: str
+    operands: Tuple[int, ...]
+    templates: tuple
+
+    def select(self, operands: List[Token]) -> tuple:
+        """Get steps of template that matches operands"""
+        if len(operands) not in self.operands:
+            raise ValueError(f"{self.op} requires {' or '.join(map(str, self.operands))} operands")
+        for condition, steps in self.templates:
+            if condition is None or condition(operands):
+                return steps
+        raise ValueError(f"Invalid operands of {self.op}")
+
+    def size(self, operands: List[Token]) -> int:
+        """Get count of real instructions of expansion"""
+        return len(self.select(operands))
+
+    def expand(self, operands: List[Token]) -> Tuple[ENCODINGS, ...]:
+        """Encode operands into records of real instructions"""
+        return tuple(
+            typ.assign(*(
+                operands[arg] if isinstance(arg, int) else arg(operands) if callable(arg) else arg for arg in args
+            ))
+            for typ, args in self.select(operands)
+        )
+
+
+ADDI, ORI, LUI = INSTRUCTIONS['addi'], INSTRUCTIONS['ori'], INSTRUCTIONS['lui']
+ADD, SLL, SLT, BNE = INSTRUCTIONS['add'], INSTRUCTIONS['sll'], INSTRUCTIONS['slt'], INSTRUCTIONS['bne']
+
+# operands follow the order of real instructions - destination is written first and goes to rs
+PSEUDO_INSTRUCTIONS = {
+    'nop': Pseudo('nop', (0, ), (
+        (None, ((SLL, (ZERO, ZERO, ZERO)), )),
+    )),
+    'move': Pseudo('move', (2, ), (
+        (None, ((ADD, (0, 1, ZERO)), )),
+    )),
+    'subi': Pseudo('subi', (2, 3), (
+        (lambda operands: len(operands) == 2, ((ADDI, (0, 0, negate(1))), )),
+        (None, ((ADDI, (0, 1, negate(2))), )),
+    )),
+    'li': Pseudo('li', (2, ), (
+        (fits(1, INT16), ((ADDI, (0, ZERO, number(1))), )),
+        (fits(1, UINT16), ((ORI, (0, ZERO, number(1))), )),
+        (fits(1, INT32), ((LUI, (0, ZERO, high(1))), (ORI, (0, 0, low(1))))),
+    )),
+    'la': Pseudo('la', (2, ), (
+        (None, ((LUI, (0, ZERO, high(1))), (ORI, (0, 0, low(1))))),
+    )),
+    'blt': Pseudo('blt', (3, ), (
+        (None, ((SLT, (AT, 0, 1)), (BNE, (AT, ZERO, 2)))),
+    )),
+    'bgt': Pseudo('bgt', (3, ), (
+        (None, ((SLT, (AT, 1, 0)), (BNE, (AT, ZERO, 2)))),
+    )),
+}
+
+
+def get_pseudo(inst: str) -> Tuple[Optional[Pseudo], List[Token]]:
+    """Get pseudo instruction of instruction string with its operands, None is returned for real instructions"""
+    parts = inst.split(None, 1)
+    pseudo = PSEUDO_INSTRUCTIONS.get(parts[0]) if parts else None
+    if pseudo is None:
+        return None, []
+    return pseudo, lex_operands(parts[1]) if len(parts) > 1 else []
+
+
+def get_size(inst: str) -> int:
+    """Get count of real instructions of instruction string, without encoding it"""
+    pseudo, operands = get_pseudo(inst)
+    return 1 if pseudo is None else pseudo.size(operands)
@@ -1,6 +1,8 @@
-import re
 from abc import abstractmethod
 from dataclasses import dataclass, field
+from typing import ClassVar
+
+from .lexer import Token, REGULAR, IMMEDIATE, DIRECT, INDIRECT, BASE_PLUS_INDEX, RELATIVE, lex_operand, parse_immediate
 
 REGISTERS = {
     'zero': 0, 'at': 1, 'v0': 2, 'v1': 3,
@@ -21,35 +23,31 @@ def get_register_num(reg_name: str) -> int:
 
 @dataclass
 class Reg:
-    """Base class for mode addressing"""
+    """Base class for mode addressing, operands are classified and split by the lexer"""
     string: str
-    match_pattern: str = field(init=False)
-    parse_pattern: str = field(init=False)
+    parts: tuple = field(default=None, repr=False, compare=False)
 
-    @classmethod
-    def process_str(cls, value: str) -> str:
-        """Modify string before it is used in parsing process"""
-        return value
+    # token kind of addressing mode
+    kind: ClassVar[str] = None
+
+    def __post_init__(self):
+        self.string = self.string.strip()
 
     @classmethod
     def match(cls, value: str) -> bool:
-        """Validate string is matching the pattern"""
-        return bool(re.fullmatch(cls.match_pattern, value))
-
-    def get_proper_str(self) -> str:
-        """Get ready string for parsing process"""
-        return self.process_str(self.string)
+        """Validate string is operand of the addressing mode"""
+        return lex_operand(value).kind == cls.kind
 
     @property
     def is_matched(self) -> bool:
-        """Validate string is matching the pattern"""
-        return self.match(self.get_proper_str())
+        """Validate string is operand of the addressing mode"""
+        return self.match(self.string)
 
     def parse(self) -> list:
         """Parse string to get it`s parts"""
-        # if not self.is_matched:
-        #     raise ValueError("Reg does not match")
-        return re.findall(self.parse_pattern, self.get_proper_str())
+        if self.parts is None:
+            self.parts = lex_operand(self.string).parts
+        return list(self.parts)
 
     @abstractmethod
     def get_val(self) -> int:
@@ -64,21 +62,11 @@ class Reg:
         """Get hex value of addressing"""
         return hex(self.get_val())
 
-    def __setattr__(self, key, value):
-        # deny setting values for match pattern and parse pattern
-        if key in ['match_pattern', 'parse_pattern']:
-            raise ValueError()
-        # remove space from string value
-        if key == 'string':
-            value = value.strip()
-        super().__setattr__(key, value)
-
 
 @dataclass
 class RegularReg(Reg):
     """Regular / Register mode addressing"""
-    match_pattern = 'zero|[a-zA-Z]{2}|[a-zA-Z]{1}\d{1}'
-    parse_pattern = match_pattern
+    kind: ClassVar[str] = REGULAR
 
     def get_val(self) -> int:
         return get_register_num(self.parse()[0])
@@ -87,53 +75,30 @@ class RegularReg(Reg):
 @dataclass
 class ImmediateReg(Reg):
     """Immediate / Constant mode addressing"""
-    match_pattern = '#?\d{1,}'
-    parse_pattern = '#?(\d{1,})'
+    kind: ClassVar[str] = IMMEDIATE
 
     def get_val(self) -> int:
-        num = self.parse()[0].replace('-', '')
-        if not num.isnumeric():
-            raise ValueError
-        return int(num)
+        return parse_immediate(self.parse()[0])
 
     get_val.__doc__ = Reg.get_val.__doc__
 
 
 @dataclass
 class DirectReg(ImmediateReg):
-    """Direct mode addressing"""
-    match_pattern = '\[\s*#?\d{1,}\s*\]'
-    parse_pattern = '\[\s*#?(\d{1,})\s*\]'
+    """Direct mode addressing, address is a non negative number"""
+    kind: ClassVar[str] = DIRECT
 
 
 @dataclass
 class InDirectReg(RegularReg):
     """InDirect mode addressing"""
-    match_pattern = '\[\s*zero\s*\]|\[\s*[a-zA-Z]{2}\s*\]|\[\s*[a-zA-Z]{1}\d{1}\s*\]'
+    kind: ClassVar[str] = INDIRECT
 
 
 @dataclass
 class BasePlusIndexReg(RegularReg):
     """Base plus index mode addressing"""
-
-    @classmethod
-    def process_str(cls, value: str) -> str:
-        return value.replace('[', '').replace(']', '')
-
-    process_str.__doc__ = Reg.process_str.__doc__
-
-    @classmethod
-    def match(cls, value: str) -> bool:
-        s = cls.process_str(value)
-        # validating the format of the string
-        index = s.find('+')
-        if index == -1 or not value.startswith('[') or not value.endswith(']'):
-            return False
-        # get two registers then match them with pattern
-        matched_string = (s[:index].strip(), s[index + 1:].strip())
-        return all(map(lambda i: re.fullmatch(cls.match_pattern, i), matched_string))
-
-    match.__doc__ = Reg.match.__doc__
+    kind: ClassVar[str] = BASE_PLUS_INDEX
 
     def get_val(self) -> int:
         s = self.parse()
@@ -146,42 +111,61 @@ class BasePlusIndexReg(RegularReg):
 
 @dataclass
 class RelativeReg(RegularReg):
-    """Relative mode addressing"""
+    """Relative mode addressing, value is the number of its register"""
+    kind: ClassVar[str] = RELATIVE
 
-    @classmethod
-    def process_str(cls, value: str):
-        return value.strip().replace('[', '').replace(']', "").replace('#', '')
 
-    process_str.__doc__ = Reg.process_str.__doc__
+REGS = RegularReg, ImmediateReg, DirectReg, InDirectReg, BasePlusIndexReg, RelativeReg
 
-    @classmethod
-    def match(cls, value: str) -> bool:
-        s = cls.process_str(value)
-        # validating the format of the value
-        index = s.find('+')
-        if index == -1 or not value.startswith('[') or not value.endswith(']'):
-            return False
-        # check if one value is numeric and the other is register
-        matched_string = (s[:index].strip(), s[index + 1:].strip())
-        if matched_string[0].isnumeric():
-            matched_string = matched_string[::-1]
-        elif not matched_string[0].isnumeric() and not matched_string[1].isnumeric():
-            return False
-        return bool(re.fullmatch(cls.match_pattern, matched_string[0]))
-
-    match.__doc__ = Reg.match.__doc__
+TOKEN_REGS = {
+    REGULAR: RegularReg,
+    IMMEDIATE: ImmediateReg,
+    DIRECT: DirectReg,
+    INDIRECT: InDirectReg,
+    BASE_PLUS_INDEX: BasePlusIndexReg,
+    RELATIVE: RelativeReg,
+}
 
-    def get_val(self) -> int:
-        return sum(int(i) if i.isnumeric() else get_register_num(i) for i in self.parse())
 
-    get_val.__doc__ = Reg.get_val.__doc__
+def get_token_reg(token: Token) -> REGS:
+    """Get addressing mode of lexed operand token"""
+    typ = TOKEN_REGS.get(token.kind)
+    if typ:
+        return typ(token.text, token.parts)
 
 
-REGS = RegularReg, ImmediateReg, DirectReg, InDirectReg, BasePlusIndexReg, RelativeReg
+def get_register(name: str) -> int:
+    """Get number of register operand, raises on names that have register shape but are not registers"""
+    num = REGISTERS.get(name)
+    if num is None:
+        raise ValueError("Invalid register value")
+    return num
+
+
+def get_base_plus_index(base: str, index: str) -> int:
+    """Get value of base plus index operand, sum of numbers of its registers"""
+    return get_register(base) + get_register(index)
+
+
+# token kind -> value of its parts, same values as get_val of addressing modes without building them
+TOKEN_VALUES = {
+    REGULAR: get_register,
+    IMMEDIATE: parse_immediate,
+    DIRECT: parse_immediate,
+    INDIRECT: get_register,
+    BASE_PLUS_INDEX: get_base_plus_index,
+    RELATIVE: get_register,
+}
+
+
+def get_token_value(token: Token) -> int:
+    """Get integer value of operand token in its addressing mode"""
+    get = TOKEN_VALUES.get(token.kind)
+    if get is None:
+        raise ValueError("Invalid register value")
+    return get(*token.parts)
 
 
 def get_register_type(reg_val: str) -> REGS:
-    reg_val = reg_val.strip()
-    for typ in REGS:
-        if typ.match(reg_val):
-            return typ(reg_val)
+    """Determine addressing mode of string"""
+    return get_token_reg(lex_operand(reg_val))
@@ -0,0 +1,232 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+from .disasm import decode, iter_words, signed
+from .regs import REGISTERS
+from .types import UNSIGNED_IMM, iType, rType
+
+
+MASK = 0xFFFFFFFF
+
+# estimated cycles of each instruction on a classic multi-cycle datapath
+CYCLES = {
+    'lw': 5, 'lb': 5,
+    'sw': 4, 'sb': 4,
+    'j': 3, 'beq': 3, 'bne': 3, 'blez': 3, 'bqtz': 3,
+    'mult': 32, 'div': 32,
+}
+DEFAULT_CYCLES = 4
+
+# micro-op kinds
+ALU, ALU_IMM, MUL_DIV, LOAD_WORD, LOAD_BYTE, STORE_WORD, STORE_BYTE, BRANCH, JUMP = range(9)
+
+
+def sign(value: int) -> int:
+    """Get signed value of 32 bits register"""
+    return value - (1 << 32) if value >> 31 else value
+
+
+def div(a: int, b: int) -> tuple:
+    """Get (hi, lo) of signed division truncated toward zero, division by zero leaves them zero"""
+    a, b = sign(a), sign(b)
+    if b == 0:
+        return 0, 0
+    quotient = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+    return (a - quotient * b) & MASK, quotient & MASK
+
+
+def mult(a: int, b: int) -> tuple:
+    """Get (hi, lo) of signed multiplication"""
+    product = (sign(a) * sign(b)) & 0xFFFFFFFFFFFFFFFF
+    return product >> 32, product & MASK
+
+
+ALU_OPS = {
+    'add': lambda a, b: a + b,
+    'sub': lambda a, b: a - b,
+    'and': lambda a, b: a & b,
+    'or': lambda a, b: a | b,
+    'nor': lambda a, b: ~(a | b),
+    'xor': lambda a, b: a ^ b,
+    'slt': lambda a, b: int(sign(a) < sign(b)),
+    # shift amount is passed as second operand
+    'sll': lambda a, b: a << b,
+    'srl': lambda a, b: a >> b,
+    'sra': lambda a, b: sign(a) >> b,
+}
+
+ALU_IMM_OPS = {
+    'addi': lambda a, b: a + b,
+    'andi': lambda a, b: a & b,
+    'ori': lambda a, b: a | b,
+    'slti': lambda a, b: int(sign(a) < b),
+    'lui': lambda a, b: b << 16,
+}
+
+BRANCH_OPS = {
+    'beq': lambda a, b: a == b,
+    'bne': lambda a, b: a != b,
+    'blez': lambda a, b: sign(a) <= 0,
+    'bqtz': lambda a, b: sign(a) > 0,
+}
+
+MEMORY_OPS = {'lw': LOAD_WORD, 'lb': LOAD_BYTE, 'sw': STORE_WORD, 'sb': STORE_BYTE}
+
+
+def predecode(word: int) -> tuple:
+    """Decode word once into (mnemonic, micro-op) used by the execution loop, operands are read in the order they are
+    written, so rs is the destination of r-type and i-type instructions"""
+    d = decode(word)
+    op = d.op
+    if isinstance(d.typ, rType):
+        if op in ('mult', 'div'):
+            return op, (MUL_DIV, mult if op == 'mult' else div, d.rs, d.rt, d.rd, 0)
+        if op in ('sll', 'srl', 'sra'):
+            return op, (ALU_IMM, ALU_OPS[op], d.rs, d.rt, 0, d.shift)
+        return op, (ALU, ALU_OPS[op], d.rs, d.rt, d.rd, 0)
+    if isinstance(d.typ, iType):
+        imm = d.imm if op in UNSIGNED_IMM else signed(d.imm)
+        if op in ('sw', 'sb'):
+            # stored register is written first, base address second
+            return op, (MEMORY_OPS[op], None, 0, d.rt, d.rs, imm)
+        if op in MEMORY_OPS:
+            return op, (MEMORY_OPS[op], None, d.rs, d.rt, 0, imm)
+        return op, (ALU_IMM, ALU_IMM_OPS[op], d.rs, d.rt, 0, imm)
+    if op in BRANCH_OPS:
+        return op, (BRANCH, BRANCH_OPS[op], 0, d.rs, d.rt, signed(d.imm))
+    return op, (JUMP, None, 0, 0, 0, d.pseudo)
+
+
+class Memory:
+    """Sparse little endian memory, only written words are stored"""
+
+    def __init__(self, words: Dict[int, int] = None):
+        self.words = dict(words or {})
+
+    def load(self, data: bytes, address: int) -> None:
+        """Copy little endian bytes into memory starting from word aligned address, eg: data section of program"""
+        if address & 3:
+            raise ValueError(f"Unaligned word address {address:#x}")
+        data = bytes(data) + b'\0' * (-len(data) % 4)
+        for offset in range(0, len(data), 4):
+            self.words[address + offset] = int.from_bytes(data[offset:offset + 4], 'little')
+
+    def load_word(self, address: int) -> int:
+        if address & 3:
+            raise ValueError(f"Unaligned word address {address:#x}")
+        return self.words.get(address, 0)
+
+    def store_word(self, address: int, value: int) -> None:
+        if address & 3:
+            raise ValueError(f"Unaligned word address {address:#x}")
+        self.words[address] = value & MASK
+
+    def load_byte(self, address: int) -> int:
+        return (self.words.get(address & ~3, 0) >> ((address & 3) * 8)) & 0xFF
+
+    def store_byte(self, address: int, value: int) -> None:
+        shift = (address & 3) * 8
+        word = self.words.get(address & ~3, 0) & ~(0xFF << shift)
+        self.words[address & ~3] = word | ((value & 0xFF) << shift)
+
+
+@dataclass
+class ExecutionStats:
+    """Dynamic counts and estimated cycles of a run"""
+    steps: int
+    halted: bool
+    mnemonics: List[str] = field(repr=False)
+    counts: List[int] = field(repr=False)
+    cycles: List[int] = field(repr=False)
+
+    @property
+    def total_cycles(self) -> int:
+        """Get estimated cycles of whole run"""
+        return sum(self.cycles)
+
+    @property
+    def cpi(self) -> float:
+        """Get average cycles per instruction"""
+        return self.total_cycles / self.steps if self.steps else 0.0
+
+    def by_mnemonic(self) -> Dict[str, tuple]:
+        """Get (executions count, cycles) of each mnemonic"""
+        counts, cycles = Counter(), Counter()
+        for op, count, cycle in zip(self.mnemonics, self.counts, self.cycles):
+            counts[op] += count
+            cycles[op] += cycle
+        return {op: (counts[op], cycles[op]) for op in counts}
+
+
+class Simulator:
+    """Execution engine of assembled words, each word is decoded once before running"""
+
+    def __init__(self, words: Iterable[int], memory: Memory = None, cycles: Dict[str, int] = None):
+        decoded = [predecode(word) for word in iter_words(words)]
+        self.mnemonics = [op for op, _ in decoded]
+        self.code = [uop for _, uop in decoded]
+        cycles = {**CYCLES, **(cycles or {})}
+        self.cycles = [cycles.get(op, DEFAULT_CYCLES) for op in self.mnemonics]
+        self.memory = memory or Memory()
+        self.regs = [0] * 32
+        self.hi = self.lo = 0
+        self.pc = 0
+
+    @property
+    def registers(self) -> Dict[str, int]:
+        """Get register file keyed by register names"""
+        return {name: self.regs[num] for name, num in REGISTERS.items()}
+
+    def run(self, max_steps: int = 10_000_000) -> ExecutionStats:
+        """Run from current pc till it leaves the program or max steps are executed"""
+        code, regs, words = self.code, self.regs, self.memory.words
+        memory = self.memory
+        counts = [0] * len(code)
+        size, pc, steps = len(code), self.pc, 0
+
+        while 0 <= pc < size and steps < max_steps:
+            kind, fn, d, s, t, imm = code[pc]
+            counts[pc] += 1
+            steps += 1
+            pc += 1
+            if kind == ALU:
+                if d:
+                    regs[d] = fn(regs[s], regs[t]) & MASK
+            elif kind == ALU_IMM:
+                if d:
+                    regs[d] = fn(regs[s], imm) & MASK
+            elif kind == BRANCH:
+                if fn(regs[s], regs[t]):
+                    pc += imm
+            elif kind == LOAD_WORD:
+                address = (regs[s] + imm) & MASK
+                if address & 3:
+                    raise ValueError(f"Unaligned word address {address:#x}")
+                if d:
+                    regs[d] = words.get(address, 0)
+            elif kind == STORE_WORD:
+                address = (regs[s] + imm) & MASK
+                if address & 3:
+                    raise ValueError(f"Unaligned word address {address:#x}")
+                words[address] = regs[t]
+            elif kind == JUMP:
+                pc = imm
+            elif kind == LOAD_BYTE:
+                if d:
+                    regs[d] = signed(memory.load_byte((regs[s] + imm) & MASK), 8) & MASK
+            elif kind == STORE_BYTE:
+                memory.store_byte((regs[s] + imm) & MASK, regs[t])
+            else:
+                self.hi, self.lo = fn(regs[s], regs[t])
+                if d:
+                    regs[d] = self.lo
+
+        self.pc = pc
+        return ExecutionStats(
+            steps,
+            not 0 <= pc < size,
+            self.mnemonics,
+            counts,
+            [count * cycle for count, cycle in zip(counts, self.cycles)],
+        )
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, NamedTuple, Sequence, Tuple
+
+from .types import INSTRUCTIONS
+
+
+# upper bound of points of each series, so plotting time does not grow with program size
+MAX_POINTS = 512
+HISTOGRAM_BINS = 32
+WORD_SIZE = 4
+
+
+class Series(NamedTuple):
+    """Labels and values of aggregated series"""
+    labels: list
+    values: list
+
+
+@dataclass(frozen=True)
+class Summary:
+    """Aggregates of per-instruction values, sizes of all series are bounded regardless of program size"""
+    count: int
+    total: float
+    # totals per mnemonic and per instruction type
+    mnemonics: Series
+    types: Series
+    # totals per address window of window bytes, labels are start addresses of windows
+    windows: Series
+    window: int
+    # count of instructions per value bin, labels are lower bounds of bins
+    histogram: Series
+
+
+def get_type_name(op: str) -> str:
+    """Get name of instruction type of mnemonic"""
+    typ = INSTRUCTIONS.get(op)
+    return typ.__class__.__name__ if typ is not None else 'unknown'
+
+
+def decimate(
+        values: Sequence[float],
+        max_points: int = MAX_POINTS,
+        reduce: Callable[[Sequence[float]], float] = sum
+) -> Tuple[List[int], List[float]]:
+    """Get start indexes and reduced values of consecutive windows, there are at most max_points windows"""
+    step = max(1, -(-len(values) // max_points))
+    starts = list(range(0, len(values), step))
+    return starts, [reduce(values[start:start + step]) for start in starts]
+
+
+def histogram(values: Iterable[float], bins: int = HISTOGRAM_BINS) -> Series:
+    """Get count of values per bin, distinct values are kept as bins if there are not more than bins of them"""
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    if len(counts) <= bins:
+        keys = sorted(counts)
+        return Series(keys, [counts[key] for key in keys])
+    low, high = min(counts), max(counts)
+    width = (high - low) / bins
+    totals = [0] * bins
+    for value, count in counts.items():
+        totals[min(int((value - low) / width), bins - 1)] += count
+    return Series([low + width * i for i in range(bins)], totals)
+
+
+def summarize(
+        mnemonics: Sequence[str],
+        values: Sequence[float],
+        max_points: int = MAX_POINTS,
+        address: int = 0
+) -> Summary:
+    """Aggregate value of each instruction, instructions are consecutive words starting from address"""
+    values = values if isinstance(values, list) else list(values)
+    totals = {}
+    for op, value in zip(mnemonics, values):
+        totals[op] = totals.get(op, 0) + value
+    types = {}
+    for op, total in totals.items():
+        name = get_type_name(op)
+        types[name] = types.get(name, 0) + total
+    starts, windows = decimate(values, max_points)
+    step = starts[1] - starts[0] if len(starts) > 1 else 1
+    return Summary(
+        len(values),
+        sum(values),
+        Series(list(totals), list(totals.values())),
+        Series(list(types), list(types.values())),
+        Series([address + start * WORD_SIZE for start in starts], windows),
+        step * WORD_SIZE,
+        histogram(values),
+    )
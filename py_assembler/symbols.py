@@ -0,0 +1,334 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .directives import DATA, MAX_ALIGN, SECTIONS, TEXT, DataSegment, align_address, parse_number, split_directive
+from .errors import (
+    DUPLICATE_LABEL, INVALID_DIRECTIVE, INVALID_LABEL, INVALID_OPERANDS, UNDEFINED_LABEL, UNKNOWN_INSTRUCTION,
+    WRONG_SECTION, AssemblyError
+)
+from .instruction import expand_cached
+from .pseudo import PSEUDO_INSTRUCTIONS, get_size
+from .regs import REGISTERS
+from .types import ENCODINGS, INSTRUCTIONS
+
+
+LABEL_DEF_RE = re.compile(r'\s*([A-Za-z_.][A-Za-z0-9_.]*)\s*:')
+
+WORD_SIZE = 4
+
+
+class Statement(NamedTuple):
+    """Assembled statement - source line, instruction without labels, its address and resolved record"""
+    line: int
+    inst: str
+    address: int
+    enc: ENCODINGS
+
+
+def split_labels(statement: str) -> Tuple[List[str], str]:
+    """Split labels defined at start of statement from its instruction, instruction is empty for labels only"""
+    if ':' not in statement:
+        return [], statement
+    labels, pos = [], 0
+    while m := LABEL_DEF_RE.match(statement, pos):
+        labels.append(m.group(1))
+        pos = m.end()
+    return labels, statement[pos:].strip()
+
+
+def define(symbols: Dict[str, int], lines: Dict[str, int], name: str, address: int, line: int, path: str = None):
+    """Add label to symbols table, raises on labels defined twice or named as registers"""
+    if name in symbols:
+        raise AssemblyError(
+            f"Duplicate label '{name}', first defined at line {lines[name]}", line, path, DUPLICATE_LABEL, name
+        )
+    if name in REGISTERS:
+        raise AssemblyError(f"Label '{name}' is a register name", line, path, INVALID_LABEL, name)
+    symbols[name] = address
+    lines[name] = line
+
+
+class Layout:
+    """Addresses of text and data sections while going through statements in order, labels are defined on the way"""
+
+    def __init__(self, path: str = None, address: int = 0, data: DataSegment = None):
+        self.path = path
+        self.address = address
+        self.data = DataSegment() if data is None else data
+        self.section = TEXT
+        self.symbols: Dict[str, int] = {}
+        self.lines: Dict[str, int] = {}
+
+    def place(self, line: int, statement: str, errors: Optional[list] = None) -> Tuple[List[str], str]:
+        """Place statement in its section, returns defined labels and instruction to be encoded at current
+        address, which is empty for labels and directives. Errors are appended to errors list if it is passed"""
+        labels, inst = split_labels(statement)
+        try:
+            if is_directive(inst):
+                name, args = split_directive(inst)
+                if name in SECTIONS:
+                    self.section = name
+                    address = self.data.address if name == DATA else self.address
+                elif self.section != DATA:
+                    raise ValueError(f"{name} is only allowed in {DATA} section")
+                else:
+                    address = self.data.add(name, args)
+                inst = ''
+            elif self.section == DATA:
+                if inst:
+                    raise ValueError(f"Instructions are only allowed in {TEXT} section")
+                address = self.data.address
+            else:
+                address = self.address
+        except ValueError as e:
+            if is_directive(inst):
+                e = AssemblyError(str(e), line, self.path, INVALID_DIRECTIVE, inst.split(None, 1)[0])
+            else:
+                e = AssemblyError(str(e), line, self.path, WRONG_SECTION, inst)
+            if errors is None:
+                raise e from None
+            errors.append(e)
+            return [], ''
+
+        for name in labels:
+            try:
+                define(self.symbols, self.lines, name, address, line, self.path)
+            except AssemblyError as e:
+                if errors is None:
+                    raise
+                errors.append(e)
+        return labels, inst
+
+
+def is_directive(inst: str) -> bool:
+    """Check statement is assembler directive"""
+    return inst[:1] == '.'
+
+
+def layout(
+        statements: Iterable[Tuple[int, str]],
+        path: str = None,
+        address: int = 0,
+        errors: Optional[list] = None,
+        state: Layout = None
+) -> Tuple[List[int], Dict[str, int]]:
+    """First pass, get text address of each statement and symbols table without encoding instructions.
+    Errors are appended to errors list instead of being raised if it is passed. If state is passed statements are
+    placed from its addresses, and its data section is filled if it emits data"""
+    addresses = []
+    state = Layout(path, address, DataSegment(emit=False)) if state is None else state
+    for line, statement in statements:
+        addresses.append(state.address)
+        inst = state.place(line, statement, errors)[1]
+        if inst:
+            state.address += WORD_SIZE * get_statement_size(inst)
+    return addresses, state.symbols
+
+
+def get_alignment(statements: Iterable[Tuple[int, str]]) -> int:
+    """Get boundary of data section of statements, the largest of word size and .align directives, so the section
+    has the same layout at any address that is multiple of it"""
+    alignment = WORD_SIZE
+    for _, statement in statements:
+        if statement[:1] != '.' and ':' not in statement:
+            continue
+        inst = split_labels(statement)[1]
+        if inst[:1] != '.':
+            continue
+        name, args = split_directive(inst)
+        if name == '.align':
+            try:
+                power = parse_number(args)
+            except ValueError:
+                # invalid directive is reported by layout
+                continue
+            if 0 <= power <= MAX_ALIGN:
+                alignment = max(alignment, 1 << power)
+    return alignment
+
+
+def get_data_address(end: int, statements: Iterable[Tuple[int, str]]) -> int:
+    """Get address of data section of source placed after data sections that end at end"""
+    if end % (1 << MAX_ALIGN) == 0:
+        # already aligned on any boundary, eg: data base of first source
+        return end
+    return align_address(end, get_alignment(statements))
+
+
+def get_statement_size(inst: str) -> int:
+    """Get count of words of instruction, invalid one is counted as single word and reported by encoding"""
+    try:
+        return get_size(inst)
+    except ValueError:
+        return 1
+
+
+def get_words(statement: str, address: int = 0, symbols: Dict[str, int] = None) -> Tuple[int, ...]:
+    """Get machine words of single statement at address, labels and directives have no words"""
+    _, inst = split_labels(statement)
+    if not inst or is_directive(inst):
+        return ()
+    words = []
+    for enc in expand_statement(inst):
+        if enc.word is None:
+            target = (symbols or {}).get(enc.label.name)
+            if target is None:
+                raise undefined_label(enc.label.name)
+            enc = enc.resolve(address, target)
+        words.append(enc.word)
+        address += WORD_SIZE
+    return tuple(words)
+
+
+def undefined_label(name: str, line: int = None, path: str = None) -> AssemblyError:
+    """Get error of reference to label that is not defined"""
+    return AssemblyError(f"Undefined label '{name}'", line, path, UNDEFINED_LABEL, name)
+
+
+def get_error(error: Exception, inst: str, line: int = None, path: str = None) -> AssemblyError:
+    """Get assembly error with location and code of error raised while encoding instruction"""
+    op = inst.split(None, 1)[0] if inst.strip() else inst
+    if op not in INSTRUCTIONS and op not in PSEUDO_INSTRUCTIONS:
+        return AssemblyError(f"Invalid instruction code '{op}'", line, path, UNKNOWN_INSTRUCTION, op)
+    if isinstance(error, TypeError):
+        # missing or extra arguments of Type.assign
+        return AssemblyError(f"Invalid operands count of {op}", line, path, INVALID_OPERANDS, inst)
+    if isinstance(error, AssemblyError):
+        return AssemblyError(error.message, line, path, error.code, error.text or inst)
+    return AssemblyError(str(error) or error.__class__.__name__, line, path, INVALID_OPERANDS, inst)
+
+
+def expand_statement(inst: str, line: int = None, path: str = None) -> Tuple[ENCODINGS, ...]:
+    """Encode instruction into records of real instructions, errors are reported with its location"""
+    try:
+        return expand_cached(inst)
+    except Exception as e:
+        raise get_error(e, inst, line, path) from None
+
+
+def resolve_entry(entry: list, target: int, path: str = None, errors: Optional[list] = None) -> None:
+    """Resolve record of held back [line, statement, address, record] entry, if errors list is passed, record of
+    target that could not be reached is set to None and its error is appended instead of raising"""
+    try:
+        entry[3] = entry[3].resolve(entry[2], target)
+    except AssemblyError as e:
+        error = get_error(e, entry[1], entry[0], path)
+        if errors is None:
+            raise error from None
+        errors.append(error)
+        entry[3] = None
+
+
+def iter_resolved(
+        statements: Iterable[Tuple[int, str]],
+        path: str = None,
+        symbols: Dict[str, int] = None,
+        address: int = 0,
+        state: Layout = None,
+        errors: Optional[list] = None
+) -> Iterator[Statement]:
+    """Assemble (line number, statement) pairs into statements with resolved records in source order, there is
+    a statement for each real instruction of expanded pseudo instructions.
+    Without symbols table, references to later labels are backpatched once the label is defined, so only
+    statements after the first unresolved one are held back, data directives are added to data section of
+    state. With symbols table of first pass, which is the case of chunks assembled on separate processes,
+    labels are looked up right away and directives are skipped as they were checked by first pass.
+    If errors list is passed, errors are appended to it and invalid statements are skipped instead of raising"""
+    if symbols is not None:
+        for line, statement in statements:
+            _, inst = split_labels(statement)
+            if not inst or is_directive(inst):
+                continue
+            try:
+                records = expand_statement(inst, line, path)
+            except AssemblyError as e:
+                if errors is None:
+                    raise
+                errors.append(e)
+                # invalid statement keeps its place as in first pass, so addresses of next ones do not change
+                address += WORD_SIZE * get_statement_size(inst)
+                continue
+            for enc in records:
+                if enc.word is None:
+                    target = symbols.get(enc.label.name)
+                    if target is None:
+                        e = undefined_label(enc.label.name, line, path)
+                        if errors is None:
+                            raise e
+                        errors.append(e)
+                        address += WORD_SIZE
+                        continue
+                    try:
+                        enc = enc.resolve(address, target)
+                    except AssemblyError as e:
+                        if errors is None:
+                            raise get_error(e, inst, line, path) from None
+                        errors.append(get_error(e, inst, line, path))
+                        address += WORD_SIZE
+                        continue
+                yield Statement(line, inst, address, enc)
+                address += WORD_SIZE
+        return
+
+    state = Layout(path, address) if state is None else state
+    symbols = state.symbols
+    # statements waiting to be yielded in order, and unresolved ones of them by label name
+    pending, waiting = deque(), {}
+    for line, statement in statements:
+        if ':' in statement or statement[:1] == '.' or state.section != TEXT:
+            labels, inst = state.place(line, statement, errors)
+        else:
+            # plain instruction in text section, nothing to define or check
+            labels, inst = (), statement
+        for name in labels:
+            for entry in waiting.pop(name, ()):
+                resolve_entry(entry, symbols[name], path, errors)
+        if not inst:
+            continue
+        try:
+            records = expand_statement(inst, line, path)
+        except AssemblyError as e:
+            if errors is None:
+                raise
+            errors.append(e)
+            state.address += WORD_SIZE * get_statement_size(inst)
+            continue
+        for enc in records:
+            address = state.address
+            if enc.word is None:
+                name = enc.label.name
+                if name in symbols:
+                    try:
+                        enc = enc.resolve(address, symbols[name])
+                    except AssemblyError as e:
+                        if errors is None:
+                            raise get_error(e, inst, line, path) from None
+                        errors.append(get_error(e, inst, line, path))
+                        state.address += WORD_SIZE
+                        continue
+            if pending or enc.word is None:
+                entry = [line, inst, address, enc]
+                if enc.word is None:
+                    waiting.setdefault(enc.label.name, []).append(entry)
+                pending.append(entry)
+            else:
+                # nothing is held back, common case of programs without forward references
+                yield Statement(line, inst, address, enc)
+            state.address += WORD_SIZE
+        while pending and (pending[0][3] is None or pending[0][3].word is not None):
+            entry = pending.popleft()
+            if entry[3] is not None:
+                yield Statement(*entry)
+
+    if not waiting:
+        # statements resolved by labels of the last statements, eg: data labels, are not yielded yet
+        yield from (Statement(*entry) for entry in pending if entry[3] is not None)
+        return
+    if errors is None:
+        line, name = min((entries[0][0], name) for name, entries in waiting.items())
+        raise undefined_label(name, line, path)
+    for name, entries in waiting.items():
+        errors.extend(undefined_label(name, entry[0], path) for entry in entries)
+    # statements held back by undefined labels are yielded, without the unresolved ones
+    yield from (Statement(*entry) for entry in pending if entry[3] is not None and entry[3].word is not None)
@@ -1,8 +1,11 @@
-from typing import Union
+from typing import ClassVar, NamedTuple, Optional, Union
 from abc import abstractmethod
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+from functools import cached_property
 
-from .regs import Reg, REGISTERS, get_register_type
+from .errors import INVALID_OPERANDS, AssemblyError
+from .lexer import Token, REGULAR, IMMEDIATE, LABEL, as_token, parse_immediate
+from .regs import Reg, REGISTERS, get_token_value
 
 
 def bin_conv(num: str, length: int) -> str:
@@ -18,131 +21,312 @@ def is_parent(cls: type, parent: type) -> bool:
     return parent in cls.__mro__
 
 
-@dataclass
+def get_int(value) -> int:
+    """Get integer value of instruction part, either number or register"""
+    if isinstance(value, int):
+        return value
+    if is_parent(value.__class__, Reg):
+        value = value.get_val()
+        if value is not None:
+            return value
+    raise ValueError("Invalid register value")
+
+
+# immediate of these instructions is zero extended, others are sign extended
+UNSIGNED_IMM = frozenset({'andi', 'ori', 'lui'})
+
+
+# ways of resolving label reference
+JUMP = 'jump'
+BRANCH = 'branch'
+HIGH = 'high'
+LOW = 'low'
+
+# jump keeps the upper bits of address of next instruction, so its target is in the same 256 MB region
+REGION_MASK = 0xF0000000
+MAX_ADDRESS = 0xFFFFFFFF
+
+
+def check_branch_offset(offset: int, target: str) -> int:
+    """Get 16 bits field of branch word offset, raises on offset that does not fit it"""
+    if not -0x8000 <= offset <= 0x7FFF:
+        raise AssemblyError(
+            f"Branch offset {offset} to {target} is out of range [-32768, 32767]", code=INVALID_OPERANDS, text=target
+        )
+    return offset & 0xFFFF
+
+
+class LabelRef(NamedTuple):
+    """Reference to label in instruction, it is resolved once addresses of labels are known"""
+    name: str
+    rs: int = 0
+    rt: int = 0
+    mode: str = JUMP
+
+    def resolve(self, address: int, target: int) -> int:
+        """Get value of field of instruction at address that refers to target address, raises on target that could
+        not be reached from address"""
+        if self.mode == BRANCH:
+            # word offset from next instruction, kept with compared registers in mips i-type layout
+            offset = check_branch_offset((target - address - 4) >> 2, self.name)
+            return (self.rs << 21) | (self.rt << 16) | offset
+        if not 0 <= target <= MAX_ADDRESS:
+            raise AssemblyError(
+                f"Address {target:#x} of {self.name} is out of range", code=INVALID_OPERANDS, text=self.name
+            )
+        if self.mode == HIGH:
+            return (target >> 16) & 0xFFFF
+        if self.mode == LOW:
+            return target & 0xFFFF
+        if (target ^ (address + 4)) & REGION_MASK:
+            raise AssemblyError(
+                f"Jump target {target:#x} of {self.name} is out of 256 MB region of {address:#x}",
+                code=INVALID_OPERANDS, text=self.name
+            )
+        return (target >> 2) & 0x3FFFFFF
+
+
+@dataclass(frozen=True)
 class Type:
-    """Base type class"""
+    """Base type class, immutable opcode specification shared by all instructions of the same opcode"""
     op: str
     avg_exc_time: int = field(metadata={'': 'ns'})
     opcode: bin = field(metadata={'length': 6})
 
     reg_pattern: str
 
+    encoding: ClassVar[type] = None
+
     @property
     @abstractmethod
     def values(self) -> tuple:
         """Get instruction parts` name as a tuple"""
         raise NotImplemented
 
+    @cached_property
+    def layout(self) -> tuple:
+        """Get (name, shift, mask) of instruction parts from most to least significant, based on their lengths"""
+        fields = {**self.__dataclass_fields__, **self.encoding.__dataclass_fields__}
+        layout, shift = [], self.width
+        for name in self.values:
+            length = fields[name].metadata['length']
+            shift -= length
+            layout.append((name, shift, (1 << length) - 1))
+        return tuple(layout)
+
+    @cached_property
+    def ranges(self) -> tuple:
+        """Get (minimum, maximum) value of instruction parts in the order of layout, parts are unsigned by default"""
+        return tuple((0, mask) for _, _, mask in self.layout)
+
+    @cached_property
+    def width(self) -> int:
+        """Get instruction length in bits"""
+        fields = {**self.__dataclass_fields__, **self.encoding.__dataclass_fields__}
+        return sum(fields[name].metadata['length'] for name in self.values)
+
+    @abstractmethod
+    def assign(self, *args) -> 'Encoding':
+        """Assign instruction parts to there values, returns new encoded record"""
+        raise NotImplemented
+
+
+@dataclass(frozen=True, slots=True)
+class Encoding:
+    """Base per-instruction encoded record, holds assigned parts of one instruction"""
+    typ: Type
+    word: int = field(default=None, init=False, repr=False, compare=False)
+
+    # part that could hold label reference
+    label_field: ClassVar[str] = None
+
+    def __post_init__(self) -> None:
+        """Pack machine word once, text formats are rendered from it only when required.
+        Word of record that refers to label is left None till it is resolved"""
+        if self.label is None:
+            object.__setattr__(self, 'word', self.pack())
+
+    @property
+    def label(self) -> Optional[LabelRef]:
+        """Get unresolved label reference of record"""
+        value = getattr(self, self.label_field) if self.label_field else None
+        return value if isinstance(value, LabelRef) else None
+
+    def resolve(self, address: int, target: int) -> 'Encoding':
+        """Get record with label reference resolved, for instruction at address and label at target address"""
+        label = self.label
+        if label is None:
+            return self
+        return replace(self, **{self.label_field: label.resolve(address, target)})
+
     def get_fields_values(self) -> dict:
-        """Get instruction parts as dataclass fields"""
-        return {key: value for key, value in self.__dataclass_fields__.items() if key in self.values}
+        """Get instruction parts as dataclass fields, from both record and its type"""
+        fields = {**self.typ.__dataclass_fields__, **self.__dataclass_fields__}
+        return {key: fields[key] for key in self.typ.values}
+
+    def get_value(self, key: str):
+        """Get value of instruction part either assigned in record or constant in type"""
+        if key in self.__dataclass_fields__:
+            return getattr(self, key)
+        return getattr(self.typ, key)
+
+    def pack(self) -> int:
+        """Pack instruction parts into machine word with integer shifts and masks, raises on parts that do not fit"""
+        word = 0
+        for (name, shift, mask), (minimum, maximum) in zip(self.typ.layout, self.typ.ranges):
+            value = self.get_value(name)
+            if not minimum <= value <= maximum:
+                raise AssemblyError(
+                    f"{name} value {value} of {self.typ.op} is out of range [{minimum}, {maximum}]",
+                    code=INVALID_OPERANDS, text=str(value)
+                )
+            word |= (value & mask) << shift
+        return word
 
     def get_sub_repr(self) -> tuple:
         """Get instruction parts in bin format as tuple"""
-        result = []
-        for k, v in self.get_fields_values().items():
-            value = getattr(self, k)
-            if str(value).strip().replace('#', '').replace('-', '').isnumeric():
-                value = bin(value)
-            elif is_parent(value.__class__, Reg):
-                value = value.get_bin_repr()
-            else:
-                raise ValueError("Invalid register value")
-            result.append(bin_conv(value, v.metadata.get('length')))
-        return tuple(result)
+        return tuple(
+            format((self.word >> shift) & mask, f'0{mask.bit_length()}b') for _, shift, mask in self.typ.layout
+        )
 
     def get_full_repr(self) -> str:
         """Get instruction representation in bin format as str"""
-        return ''.join([i.replace('-', '0') for i in self.get_sub_repr()])
+        return format(self.word, f'0{self.typ.width}b')
 
-    @abstractmethod
-    def assign(self, *args) -> None:
-        """Assign instruction parts to there values"""
-        raise NotImplemented
+
+@dataclass(frozen=True, slots=True)
+class iEncoding(Encoding):
+    """Immediate Type encoded record, registers are kept as their numbers"""
+    rs: int = field(metadata={'length': 5})
+    rt: int = field(metadata={'length': 5})
+    imm: int = field(metadata={'length': 16})
+
+    label_field: ClassVar[str] = 'imm'
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class rEncoding(Encoding):
+    """Relative Type encoded record, registers are kept as their numbers"""
+    rs: int = field(metadata={'length': 5})
+    rt: int = field(metadata={'length': 5})
+    rd: int = field(metadata={'length': 5})
+    shift: bin = field(default=0b00000, metadata={'length': 5})
+
+    @property
+    def shamt(self) -> bin:
+        """Return shift amount or offset"""
+        return self.shift
+
+
+@dataclass(frozen=True, slots=True)
+class jEncoding(Encoding):
+    """Jump Type encoded record, target is number or label reference till it is resolved"""
+    pseudo: Union[int, LabelRef] = field(metadata={'length': 26})
+
+    label_field: ClassVar[str] = 'pseudo'
+
+
+@dataclass(frozen=True)
 class iType(Type):
     """Immediate Type"""
-    rs: bin = field(metadata={'length': 5}, init=False)
-    rt: bin = field(metadata={'length': 5}, init=False)
-    imm: bin = field(metadata={'length': 16}, init=False)
-
     reg_pattern: str = field(default=r'\$zero,?|\$[a-zA-Z][0-9],?|\$[a-zA-Z]{2},?|\s*#?\d{1,}', init=False)
 
+    encoding: ClassVar[type] = iEncoding
+
     @property
     def values(self):
         return 'opcode', 'rs', 'rt', 'imm'
     values.__doc__ = Type.values.__doc__
 
-    def assign(self, rs: str, rt: str, imm: str) -> None:
-        self.rs = get_register_type(rs)
-        self.rt = get_register_type(rt)
-        if str(imm).strip().startswith('#'):
-            imm = imm.strip().replace('#', '')
-        self.imm = int(imm)
+    @cached_property
+    def ranges(self) -> tuple:
+        imm = (0, 0xFFFF) if self.op in UNSIGNED_IMM else (-0x8000, 0x7FFF)
+        return tuple(imm if name == 'imm' else (0, mask) for name, _, mask in self.layout)
+    ranges.__doc__ = Type.ranges.__doc__
+
+    def assign(self, rs: Token, rt: Token, imm: Union[Token, LabelRef]) -> iEncoding:
+        if not isinstance(imm, LabelRef):
+            imm = parse_immediate(as_token(imm).text)
+        return iEncoding(self, get_token_value(as_token(rs)), get_token_value(as_token(rt)), imm)
     assign.__doc__ = Type.assign.__doc__
 
 
-@dataclass
+@dataclass(frozen=True)
 class rType(Type):
     """Relative Type"""
-    rs: bin = field(metadata={'length': 5}, init=False)
-    rt: bin = field(metadata={'length': 5}, init=False)
-    rd: bin = field(metadata={'length': 5}, init=False)
-    shift: bin = field(default=0b00000, metadata={'length': 5}, init=False)
     func: bin = field(default=0b000000, metadata={'length': 6})
 
     reg_pattern: str = field(default=r'\$zero,?|\$[a-zA-Z][0-9],?|\$[a-zA-Z]{2},?', init=False)
 
+    encoding: ClassVar[type] = rEncoding
+
     @property
     def values(self):
         return 'opcode', 'rs', 'rt', 'rd', 'shift', 'func'
     values.__doc__ = Type.values.__doc__
 
-    @property
-    def shamt(self) -> bin:
-        """Return shift amount or offset"""
-        return self.shift
-
-    def assign(self, rs: str, rt: str, rd: str, shift: bin = None):
-        self.rs = get_register_type(rs)
-        self.rt = get_register_type(rt)
-        self.rd = get_register_type(rd)
-        self.shift = shift if shift is not None else self.shift
+    def assign(self, rs: Token, rt: Token, rd: Token, shift: Token = None) -> rEncoding:
+        regs = (get_token_value(as_token(rs)), get_token_value(as_token(rt)), get_token_value(as_token(rd)))
+        if shift is None:
+            return rEncoding(self, *regs)
+        if not isinstance(shift, int):
+            shift = parse_immediate(as_token(shift).text)
+        return rEncoding(self, *regs, shift)
     assign.__doc__ = Type.assign.__doc__
 
 
-@dataclass
+@dataclass(frozen=True)
 class jType(Type):
     """Jump Type"""
     op: str
     avg_exc_time: float
 
     opcode: bin = field(metadata={'length': 6})
-    pseudo: bin = field(metadata={'length': 26}, init=False)
 
     reg_pattern: str = field(default=r'\$zero,?|\$[a-zA-Z][0-9],?|\$[a-zA-Z]{2},?', init=False)
 
+    encoding: ClassVar[type] = jEncoding
+
     @property
     def values(self):
         return 'opcode', 'pseudo'
     values.__doc__ = Type.values.__doc__
 
-    def assign(self, pseudo):
-        if pseudo in REGISTERS:
-            pseudo = get_register_type(pseudo)
-        elif pseudo.startswith('#'):
-            pseudo = pseudo.replace('#', "")
-            if not str(pseudo).isnumeric():
-                raise ValueError('pseudo should be register or number')
-        self.pseudo = pseudo
+    def assign(self, pseudo: Token, *operands: Token) -> jEncoding:
+        if operands:
+            return jEncoding(self, self.get_branch(as_token(pseudo), *map(as_token, operands)))
+        token = as_token(pseudo)
+        pseudo = token.text
+        if token.kind == REGULAR and pseudo in REGISTERS:
+            pseudo = get_token_value(token)
+        elif token.kind == IMMEDIATE or pseudo.startswith('#'):
+            pseudo = parse_immediate(pseudo)
+        elif token.kind in (REGULAR, LABEL):
+            pseudo = LabelRef(pseudo, mode=JUMP if self.op == 'j' else BRANCH)
+        return jEncoding(self, pseudo)
 
     assign.__doc__ = Type.assign.__doc__
 
+    def get_branch(self, *tokens: Token) -> Union[int, LabelRef]:
+        """Get 26 bits field of conditional branch - registers followed by label or word offset,
+        it is kept in mips i-type layout of rs, rt and 16 bits offset"""
+        *regs, target = tokens
+        if self.op == 'j' or len(regs) > 2:
+            raise ValueError(f"Invalid operands count of {self.op}")
+        if any(token.kind != REGULAR or token.text not in REGISTERS for token in regs):
+            raise ValueError("Branch operands should be registers")
+        rs, rt = ([REGISTERS[token.text] for token in regs] + [0])[:2]
+        if target.kind == IMMEDIATE:
+            return (rs << 21) | (rt << 16) | check_branch_offset(parse_immediate(target.text), target.text)
+        if target.kind in (REGULAR, LABEL) and target.text not in REGISTERS:
+            return LabelRef(target.text, rs, rt, BRANCH)
+        raise ValueError("Branch target should be label or number")
+
 
 TYPES = Union[iType, rType, jType]
 
+ENCODINGS = Union[iEncoding, rEncoding, jEncoding]
+
 
 def get_instruction_type(op: str) -> TYPES:
     """Get instruction type by opcode"""
@@ -160,9 +344,9 @@ INSTRUCTIONS = {
     'and':  rType('and', 6, 0b000000, func=0b100100),
     'andi': iType('andi', 6, 0b1100),
     'or':   rType('or', 6, 0b000000, func=0b100101),
-    'ori':  iType('ori', 6, 0b000000),
-    'nor':  rType('sub', 6, 0b000000, func=0b100111),
-    'xor':  rType('sub', 6, 0b000000, func=0b100110),
+    'ori':  iType('ori', 6, 0b001101),
+    'nor':  rType('nor', 6, 0b000000, func=0b100111),
+    'xor':  rType('xor', 6, 0b000000, func=0b100110),
 
     'j': jType('j', 5, 0b000010),
     'beq':  jType('beq', 5, 0b000100),
@@ -177,8 +361,8 @@ INSTRUCTIONS = {
     'lui':  iType('lui', 8, 0b001111),
 
     'slt': rType('slt', 6, 0b000000, func=0b101010),
-    'slti': iType('slt', 6, 0b001010),
-    'sll': rType('slt', 6, 0b000000, func=0b000000),
+    'slti': iType('slti', 6, 0b001010),
+    'sll': rType('sll', 6, 0b000000, func=0b000000),
     'srl': rType('srl', 6, 0b000000, func=0b000010),
-    'sra': rType('srl', 6, 0b000000, func=0b000011),
+    'sra': rType('sra', 6, 0b000000, func=0b000011),
 }
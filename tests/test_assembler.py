@@ -0,0 +1,271 @@
+import io
+import random
+import threading
+
+import pytest
+
+from benchmarks.generators import generate_program
+from py_assembler.disasm import disassemble, disassemble_buffer
+from py_assembler.errors import AssemblyError, INVALID_OPERANDS
+from py_assembler.incremental import IncrementalAssembler, render_statements
+from py_assembler.instruction import ENCODING_CACHE, Instruction, private_cache
+from py_assembler.parallel import assemble_parallel
+from py_assembler.parse import instructions_parser, instructions_stream, iter_statements, program_parser
+from py_assembler.profiling import Profiler
+from py_assembler.regs import REGS, DirectReg, get_register_type
+from py_assembler.symbols import iter_resolved
+
+
+PROGRAM = generate_program(500)
+
+LABELS = """
+start: addi $t0,$t0,#1;
+bne $t0,$t1,start;
+j done;
+nop;
+done: add $t2,$t0,$t1;
+"""
+
+
+def get_words(text):
+    return [inst.enc.word for inst in instructions_parser(text)]
+
+
+def test_scalar_matches_single_instructions():
+    statements = [statement for _, statement in iter_statements((PROGRAM, ))]
+    assert get_words(PROGRAM) == [Instruction(statement).enc.word for statement in statements]
+
+
+def test_batch_matches_scalar():
+    pytest.importorskip('numpy')
+    assert instructions_parser(PROGRAM, batch=True).tolist() == get_words(PROGRAM)
+
+
+@pytest.mark.parametrize('text', [PROGRAM, LABELS])
+def test_parallel_matches_scalar(text):
+    assert assemble_parallel(text, workers=2, chunk_statements=3).tolist() == get_words(text)
+
+
+@pytest.mark.parametrize('text', [PROGRAM, LABELS])
+def test_stream_matches_scalar(text):
+    assert list(instructions_stream(io.StringIO(text), chunk_size=7, words=True)) == get_words(text)
+
+
+def test_labels_are_resolved():
+    words = get_words(LABELS)
+    # bne at 4 jumps back to 0, two words before the next instruction
+    assert words[1] == (0b000101 << 26) | (8 << 21) | (9 << 16) | 0xFFFE
+    # done is at 16, jump target is its word address
+    assert words[2] == (0b000010 << 26) | 4
+    assert words[3] == 0
+
+
+@pytest.mark.parametrize('text', [PROGRAM, LABELS])
+def test_disassemble_round_trip(text):
+    words = get_words(text)
+    assert get_words(';'.join(disassemble_buffer(words))) == words
+
+
+def test_forward_reference_to_data_label():
+    program = program_parser('la $t0,val;\n.data;\nval: .word 7;')
+    assert [inst.enc.word for inst in program.instructions] == [0x3d001001, 0x35080000]
+
+
+def test_disassemble_text():
+    assert disassemble(0x1484820) == 'add $t2,$t0,$t1'
+
+
+def test_disassemble_branches():
+    words = get_words(LABELS)
+    assert disassemble(words[1]) == 'bne $t0,$t1,#-2'
+    assert disassemble(get_words('blez $t0,#3')[0]) == 'blez $t0,#3'
+    assert disassemble(words[2]) == 'j #4'
+
+
+@pytest.mark.parametrize('operand, mode, value', [
+    ('t1', 'RegularReg', 9), ('#0x10', 'ImmediateReg', 16), ('[0x10]', 'DirectReg', 16), ('[#7]', 'DirectReg', 7),
+    ('[t1]', 'InDirectReg', 9), ('[t1+t2]', 'BasePlusIndexReg', 19), ('[t1+4]', 'RelativeReg', 9),
+])
+def test_addressing_modes_follow_lexer(operand, mode, value):
+    reg = get_register_type(operand)
+    assert type(reg).__name__ == mode and reg.get_val() == value
+    assert [typ.match(operand) for typ in REGS] == [typ is type(reg) for typ in REGS]
+
+
+def test_negative_direct_address_is_rejected():
+    assert get_register_type('[-5]') is None and not DirectReg.match('[-5]')
+    with pytest.raises(AssemblyError) as info:
+        get_words('add $t0,[-5],$t1')
+    assert info.value.code == INVALID_OPERANDS
+
+
+def test_records_keep_register_numbers():
+    enc = Instruction('add $t2,$t0,[$t1]').enc
+    assert (enc.rs, enc.rt, enc.rd) == (10, 8, 9)
+    assert all(type(value) is int for value in (enc.rs, enc.rt, enc.rd, enc.shift))
+
+
+@pytest.mark.parametrize(
+    'immediate, value', [('0x10', 0x10), ('#0x10', 0x10), ('#-5', 0xFFFB), ('010', 10), ('0b11', 3)]
+)
+def test_immediates_are_shared_by_real_and_pseudo_instructions(immediate, value):
+    assert get_words(f'addi $t0,$t1,{immediate}') == [(0b001000 << 26) | (8 << 21) | (9 << 16) | value]
+    assert get_words(f'li $t0,{immediate}')[0] & 0xFFFF == value
+
+
+def test_invalid_immediate_is_assembly_error():
+    with pytest.raises(AssemblyError) as info:
+        get_words('nop;\naddi $t0,$t1,0xZZ')
+    assert (info.value.line, info.value.code, info.value.message) == (2, INVALID_OPERANDS, "Invalid immediate '0xZZ'")
+
+
+@pytest.mark.parametrize('statement', [
+    'addi $t0,$t1,#-32768', 'addi $t0,$t1,#32767', 'ori $t0,$t1,#65535', 'lui $t0,#0', 'sll $t0,$t1,$t2,#31',
+    'add $t0,[31],$t1', 'j #0x3FFFFFF',
+])
+def test_fields_at_range_boundaries_are_packed(statement):
+    assert get_words(statement)
+
+
+@pytest.mark.parametrize('statement, field', [
+    ('addi $t0,$t1,#70000', 'imm'), ('addi $t0,$t1,#32768', 'imm'), ('addi $t0,$t1,#-32769', 'imm'),
+    ('ori $t0,$t1,#65536', 'imm'), ('ori $t0,$t1,#-1', 'imm'), ('sll $t0,$t1,$t2,#32', 'shift'),
+    ('add $t0,[32],$t1', 'rt'), ('add $t0,[$ra+$t0],$t1', 'rt'), ('j #0x4000000', 'pseudo'),
+])
+def test_fields_out_of_range_are_assembly_errors(statement, field):
+    with pytest.raises(AssemblyError) as info:
+        get_words(f'nop;\n{statement}')
+    assert (info.value.line, info.value.code) == (2, INVALID_OPERANDS)
+    assert info.value.message.startswith(f'{field} value')
+
+
+def far_branches(offset):
+    # offsets of branches are offset words forward and offset + 1 words backward
+    return f'beq $t0,$t1,forward;\n{"nop;" * offset}\nforward: back: nop;\n{"nop;" * (offset - 1)}\nbne $t0,$t1,back;'
+
+
+def test_branch_offsets_at_range_boundaries_are_packed():
+    words = get_words(far_branches(0x7FFF))
+    assert (words[0] & 0xFFFF, words[-1] & 0xFFFF) == (0x7FFF, 0x8000)
+
+
+@pytest.mark.parametrize('assemble', [get_words, lambda text: assemble_parallel(text, workers=2)])
+def test_far_branch_labels_are_assembly_errors(assemble):
+    with pytest.raises(AssemblyError) as info:
+        assemble(far_branches(0x8000))
+    assert (info.value.line, info.value.code, info.value.text) == (1, INVALID_OPERANDS, 'forward')
+    assert info.value.message == "Branch offset 32768 to forward is out of range [-32768, 32767]"
+
+    errors = []
+    words = instructions_parser(far_branches(0x8000), diagnostics=errors)
+    # both branches are skipped, statements around them are still emitted
+    assert len(words) == 2 * 0x8000
+    assert [(e.line, e.column, e.message[:13]) for e in errors] == [(1, 13, 'Branch offset'), (5, 13, 'Branch offset')]
+
+
+@pytest.mark.parametrize('offset', ['#70000', '#32768', '#-32769'])
+def test_branch_offset_immediate_out_of_range(offset):
+    with pytest.raises(AssemblyError) as info:
+        get_words(f'nop;\nbeq $t0,$t1,{offset}')
+    assert (info.value.line, info.value.code, info.value.text) == (2, INVALID_OPERANDS, offset)
+
+
+def test_jump_out_of_region_is_assembly_error():
+    with pytest.raises(AssemblyError) as info:
+        program_parser('nop;\nj msg;\n.data;\nmsg: .word 1;')
+    assert (info.value.line, info.value.code, info.value.text) == (2, INVALID_OPERANDS, 'msg')
+    assert 'out of 256 MB region' in info.value.message
+
+
+INVALID = """la $t0,nowhere;
+add $t0,$t1,$t2;
+bad $t0; addi $t0,$t1,#70000;
+foo: nop;
+foo: nop;
+  j nowhere;
+add $t0,$t1,$t2
+"""
+
+
+def test_diagnostics_are_sorted_and_kept_once():
+    diagnostics = []
+    program = program_parser(INVALID, diagnostics)
+    # both records of la refer to the undefined label, it is reported once
+    assert [(d.line, d.column, d.code) for d in diagnostics] == [
+        (1, 8, 'undefined-label'), (3, 1, 'unknown-instruction'), (3, 24, 'invalid-operands'),
+        (5, 1, 'duplicate-label'), (6, 5, 'undefined-label'),
+    ]
+    assert [inst.inst for inst in program.instructions] == ['add $t0,$t1,$t2', 'nop', 'nop', 'add $t0,$t1,$t2']
+
+
+@pytest.mark.parametrize('symbols', [None, {'back': 0, 'foo': 16}])
+def test_errors_are_collected_around_good_statements(symbols):
+    text = 'back: nop;\nj nowhere;\nadd $t0,$t1,$t2;\nbad;\nfoo: beq $t0,$t1,back;\naddi $t0,$t1,#1;\nj foo'
+    errors = []
+    statements = list(iter_resolved(iter_statements((text, )), symbols=symbols, errors=errors))
+    # good statements keep addresses they have in source, invalid ones are skipped
+    assert [(line, address) for line, _, address, _ in statements] == [(1, 0), (3, 8), (5, 16), (6, 20), (7, 24)]
+    words = get_words(text.replace('j nowhere', 'nop').replace('bad', 'nop'))
+    assert [enc.word for _, _, _, enc in statements] == [words[i] for i in (0, 2, 4, 5, 6)]
+    assert sorted((e.line, e.code) for e in errors) == [(2, 'undefined-label'), (4, 'unknown-instruction')]
+
+
+def test_directive_arguments_separated_by_tab():
+    program = program_parser('.data;\nvalues:\t.word\t1,\t2;\n.byte\t3;')
+    assert bytes(program.data) == bytes([1, 0, 0, 0, 2, 0, 0, 0, 3])
+
+
+def test_incremental_matches_full_assembly():
+    pieces = [
+        'add $t0,$t1,$t2;', 'loop: ', 'beq $t0,$t1,loop;\n', 'j end;', 'end:;', ';', '\n', ' ', '.data;', '.text;',
+        'd: .word 1,2;', 'li $t0,0x12345;', 'bogus;', 'sub', ':',
+    ]
+    rng, assembler, text, lines = random.Random(0), IncrementalAssembler(), '', []
+    for _ in range(500):
+        position = rng.randint(0, len(text))
+        if rng.random() < .6 or not text:
+            text = text[:position] + rng.choice(pieces) + text[position:]
+        else:
+            text = text[:position] + text[position + rng.randint(1, 12):]
+        patch = assembler.update(text)
+        if patch:
+            lines[patch.start:patch.stop] = patch.lines
+        expected = render_statements([statement for _, statement in iter_statements((text, ))])
+        assert assembler.lines == lines == expected
+
+
+def test_incremental_renders_edited_statements():
+    assembler = IncrementalAssembler()
+    assembler.update(LABELS + PROGRAM)
+    assembler.update(LABELS + 'sub $t0,$t1,$t2;' + PROGRAM)
+    # inserted statement and the one it is joined to by the edit, later statements are moved without rendering
+    assert assembler.rendered == 2
+    assembler.update(LABELS + 'or $t0,$t1,$t2;' + PROGRAM)
+    assert assembler.rendered == 1
+
+
+def test_profiler_counts_threads_that_enabled_it():
+    profiler, statements = Profiler(), [statement for _, statement in iter_statements((PROGRAM, ))]
+    ENCODING_CACHE.clear()
+
+    def work():
+        with private_cache() as cache:
+            profiler.enable(detail=True)
+            try:
+                instructions_parser(PROGRAM)
+            finally:
+                profiler.disable()
+        assert cache.stats().misses > 0
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    instructions_parser(PROGRAM)
+    for thread in threads:
+        thread.join()
+    stats = profiler.stats()
+    # calls of the main thread are not counted, private caches leave the shared one as it was
+    assert stats.stages['cache'].calls == 4 * len(statements)
+    assert sum(detail.calls for detail in stats.details['opcode'].values()) == stats.stages['opcode'].calls
+    assert ENCODING_CACHE.stats().hits + ENCODING_CACHE.stats().misses == len(statements)
+    assert not profiler.enabled
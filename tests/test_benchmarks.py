@@ -0,0 +1,14 @@
+from benchmarks.__main__ import main
+
+
+def test_missing_baseline_fails_only_when_required(tmp_path, capsys):
+    baseline = str(tmp_path / 'baseline.json')
+    options = ['-s', '10', '-r', '1', '-b', 'get_register_type', '-o', str(tmp_path / 'results.json')]
+    options += ['--baseline', baseline, '--tolerance', '100']
+    assert main([*options, '--require-baseline']) == 2
+    assert f"no baseline at {baseline}" in capsys.readouterr().err
+    assert main(options) == 0
+
+    assert main([*options, '--save']) == 0
+    assert main([*options, '--require-baseline']) == 0
+    assert f"no regressions against {baseline}" in capsys.readouterr().err
@@ -0,0 +1,67 @@
+import pytest
+
+from py_assembler.cache import LFU, LRU, CacheStats, EncodingCache
+from py_assembler.instruction import expand_cached, normalize, private_cache
+
+
+def fill(cache, *keys):
+    for key in keys:
+        cache.put(key, key.upper())
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EncodingCache(maxsize=2, policy=LRU)
+    fill(cache, 'a', 'b')
+    assert cache.get('a') == 'A'
+    fill(cache, 'c')
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    fill(cache, 'd')
+    assert 'a' not in cache and len(cache) == 2
+
+
+def test_lfu_evicts_least_frequently_used_then_oldest():
+    cache = EncodingCache(maxsize=3, policy=LFU)
+    fill(cache, 'a', 'b', 'c')
+    cache.get('a')
+    cache.get('a')
+    cache.get('c')
+    fill(cache, 'd')
+    assert 'b' not in cache
+    # a and c were looked up, so d has the lowest count
+    fill(cache, 'e')
+    assert [key for key in 'abcde' if key in cache] == ['a', 'c', 'e']
+
+
+@pytest.mark.parametrize('policy', [LRU, LFU])
+def test_capacity_and_stats(policy):
+    cache = EncodingCache(maxsize=2, policy=policy)
+    fill(cache, 'a', 'b', 'c', 'd')
+    assert cache.get('d') == 'D' and cache.get('a') is None
+    assert cache.stats() == CacheStats(hits=1, misses=1, evictions=2, size=2, maxsize=2, policy=policy)
+    assert cache.stats().hit_rate == 0.5
+    cache.clear()
+    assert cache.stats() == CacheStats(hits=0, misses=0, evictions=0, size=0, maxsize=2, policy=policy)
+
+
+def test_zero_size_disables_cache():
+    cache = EncodingCache(maxsize=0)
+    assert cache.get_or_set('a', lambda: 1) == 1
+    fill(cache, 'a')
+    assert len(cache) == 0 and cache.stats().misses == 0
+
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        EncodingCache(policy='fifo')
+
+
+def test_key_ignores_spaces_but_not_case():
+    assert normalize(' add  $t0 , $t1,\t$t2 ') == normalize('add $t0,$t1,$t2') == 'add $t0,$t1,$t2'
+    # mnemonics and registers are case sensitive, so case is part of the key
+    assert normalize('ADD $t0,$t1,$t2') != normalize('add $t0,$t1,$t2')
+    with private_cache() as cache:
+        records = expand_cached('add $t0,$t1,$t2')
+        assert expand_cached('add  $t0 ,  $t1 , $t2') is records
+        with pytest.raises(ValueError):
+            expand_cached('ADD $t0,$t1,$t2')
+        assert (cache.stats().hits, cache.stats().misses, len(cache)) == (1, 2, 1)
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from py_assembler import parallel
+from py_assembler.__main__ import get_parser, main
+from py_assembler.objfile import read_object
+
+
+@pytest.mark.parametrize('jobs', ['-1', 'x'])
+def test_invalid_jobs_are_rejected(jobs, capsys):
+    with pytest.raises(SystemExit) as info:
+        get_parser().parse_args(['-j', jobs])
+    assert info.value.code == 2
+    assert 'argument -j/--jobs' in capsys.readouterr().err
+
+
+def test_zero_jobs_uses_all_cores():
+    assert get_parser().parse_args(['-j', '0']).jobs == (os.cpu_count() or 1)
+
+
+A_SOURCE = 'add $t0,$t1,$t2;\nadd $t0,$t1,$t2;\n.data;\nmsg: .byte 1;\n'
+B_SOURCE = '.text;\nbar: j bar;\nla $t0,val;\n.data;\n.align 3;\nval: .word 7;\n'
+# b.asm follows 2 words of a.asm, its data follows the byte of a.asm aligned on 8 bytes
+B_WORDS = ['0x08000002', '0x3d001001', '0x35080008']
+
+
+@pytest.fixture
+def sources(tmp_path):
+    paths = []
+    for name, text in (('a.asm', A_SOURCE), ('b.asm', B_SOURCE)):
+        path = tmp_path / name
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.parametrize('options', [[], ['-j', '2'], ['--cache-dir', 'cache'], ['-j', '2', '--cache-dir', 'cache']])
+def test_sources_are_placed_after_each_other(sources, tmp_path, options, capsys):
+    options = [str(tmp_path / i) if i == 'cache' else i for i in options]
+    for _ in range(2):
+        assert main([*sources, *options]) == 0
+        assert capsys.readouterr().out.split() == ['0x01095020', '0x01095020', *B_WORDS]
+
+
+def test_object_symbols_are_final_addresses(sources, tmp_path):
+    output = str(tmp_path / 'program.pyao')
+    assert main([*sources, '-f', 'obj', '-o', output]) == 0
+    with read_object(output) as obj:
+        assert obj.symbols == {'msg': 0x10010000, 'bar': 8, 'val': 0x10010008}
+
+
+def test_data_section_is_written(sources, tmp_path, capsys):
+    output = str(tmp_path / 'program.bin')
+    assert main([*sources, '-f', 'bin', '-o', output]) == 0
+    with open(output, 'rb') as f:
+        assert f.read()[20:] == bytes([1, 0, 0, 0, 0, 0, 0, 0, 7, 0, 0, 0])
+
+    assert main([*sources, '-f', 'lst']) == 0
+    assert capsys.readouterr().out.splitlines()[-1].startswith('.data 0x10010008 // 0x7 //')
+
+    assert main([*sources, '-f', 'ihex']) == 0
+    assert ':020000041001E9' in capsys.readouterr().out.split()
+
+    output = str(tmp_path / 'program.pyao')
+    assert main([*sources, '-f', 'obj', '-o', output]) == 0
+    with read_object(output) as obj:
+        assert (obj.data_address, obj.data) == (0x10010000, bytes([1, 0, 0, 0, 0, 0, 0, 0, 7, 0, 0, 0]))
+
+
+def test_single_file_is_split_among_jobs(tmp_path, monkeypatch):
+    path = tmp_path / 'a.asm'
+    path.write_text(''.join(f'addi $t0,$t1,#{i};\nloop{i}: j loop{i};\n' for i in range(20)))
+    outputs = [str(tmp_path / f'{jobs}.bin') for jobs in (1, 2)]
+    assert main([str(path), '-f', 'bin', '-o', outputs[0]]) == 0
+
+    batches = []
+    iter_batches = parallel.iter_batches
+    monkeypatch.setattr(parallel, 'MIN_CHUNK_STATEMENTS', 1)
+    monkeypatch.setattr(parallel, 'iter_batches', lambda *args: (batches.append(b) or b for b in iter_batches(*args)))
+    assert main([str(path), '-j', '2', '-f', 'bin', '-o', outputs[1]]) == 0
+    assert len(batches) == 2
+    with open(outputs[0], 'rb') as scalar, open(outputs[1], 'rb') as split:
+        assert scalar.read() == split.read()
+
+
+def test_diagnostics_are_reported_once_in_order(tmp_path, capsys):
+    path = tmp_path / 'a.asm'
+    path.write_text('nop;\nj nowhere;\nla $t0,nowhere;\nbad $t0;\n')
+    assert main([str(path)]) == 1
+    assert capsys.readouterr().err.splitlines() == [
+        f"{path}:2:3: Undefined label 'nowhere' [undefined-label]",
+        f"{path}:3:8: Undefined label 'nowhere' [undefined-label]",
+        f"{path}:4:1: Invalid instruction code 'bad' [unknown-instruction]",
+        '3 errors',
+    ]
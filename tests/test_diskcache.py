@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from py_assembler import diskcache
+from py_assembler.diskcache import DiskCache
+from py_assembler.errors import Diagnostic
+
+
+WORDS = [0x01095020, 0x08000002]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskCache(tmp_path / 'cache')
+
+
+def put(cache, source, words=WORDS):
+    key = cache.key(source)
+    cache.put(key, words, [1, 2], {'main': 0}, data=b'\1', data_address=0x10010000)
+    return key
+
+
+def test_entry_round_trip(cache):
+    key = put(cache, b'add $t0,$t1,$t2;\nj main;')
+    entry = cache.get(key)
+    assert (list(entry.words), list(entry.lines), entry.symbols, entry.diagnostics) == (WORDS, [1, 2], {'main': 0}, [])
+    assert (entry.data, entry.data_address) == (b'\1', 0x10010000)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+    diagnostics = [Diagnostic(1, 1, "Invalid instruction code 'bad'", 'unknown-instruction')]
+    key = cache.key(b'bad;')
+    cache.put(key, [], diagnostics=diagnostics)
+    assert (cache.get(key).lines, cache.get(key).diagnostics) == (None, diagnostics)
+
+
+def test_key_depends_on_placement(cache):
+    keys = {cache.key(b'nop;'), cache.key(b'nop;', 4), cache.key(b'nop;', 0, 0x10010008), cache.key(b'nop; ')}
+    assert len(keys) == 4
+
+
+@pytest.mark.parametrize('corrupt', [b'', b'PYAO', b'garbage' * 10, None])
+def test_corrupted_entry_is_a_miss(cache, corrupt):
+    key = put(cache, b'nop;')
+    path = cache.get_path(key)
+    if corrupt is None:
+        with open(path, 'rb') as f:
+            corrupt = f.read()[:-4]
+    with open(path, 'wb') as f:
+        f.write(corrupt)
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+    # entry is written again over corrupted one
+    put(cache, b'nop;')
+    assert list(cache.get(key).words) == WORDS
+
+
+def test_fingerprint_change_misses_old_entries(cache, monkeypatch):
+    key = put(cache, b'nop;')
+    monkeypatch.setattr(diskcache, '__version__', 'next')
+    other = DiskCache(cache.directory)
+    assert other.fingerprint != cache.fingerprint
+    assert other.key(b'nop;') != key
+    assert other.get(other.key(b'nop;')) is None
+    assert (other.hits, other.misses) == (0, 1)
+
+
+def test_failed_utime_is_still_a_hit(cache, monkeypatch):
+    key = put(cache, b'nop;')
+
+    def utime(*args):
+        raise PermissionError
+
+    monkeypatch.setattr(os, 'utime', utime)
+    assert list(cache.get(key).words) == WORDS
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    keys = [put(cache, f'nop{i};'.encode()) for i in range(4)]
+    size = os.path.getsize(cache.get_path(keys[0]))
+    for i, key in enumerate(keys):
+        os.utime(cache.get_path(key), ns=(i * 10 ** 9, i * 10 ** 9))
+    # first entry is used, so second one is the least recently used
+    assert cache.get(keys[0]) is not None
+    cache.maxsize = 4 * size
+    put(cache, b'nop4;')
+    assert [cache.get(key) is not None for key in keys] == [True, False, True, True]
+    assert cache.size == 4 * size
+
+
+def test_directory_is_scanned_only_over_maxsize(cache, monkeypatch):
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scans.append(path) or scandir(path))
+    put(cache, b'nop0;')
+    size = cache.size
+    cache.maxsize = 3 * size
+    put(cache, b'nop1;')
+    put(cache, b'nop2;')
+    assert (len(scans), cache.size) == (1, 3 * size)
+    put(cache, b'nop3;')
+    assert (len(scans), cache.size) == (2, 3 * size)
+    assert len(os.listdir(cache.directory)) == 3
@@ -0,0 +1,43 @@
+from py_assembler.highlight import DIRECTIVE, ERROR, IMMEDIATE, LABEL, MNEMONIC, REGISTER, STRING, analyze_text
+
+
+def get_spans(text):
+    """Get (text, kind) of spans and (text, message) of errors of each statement"""
+    spans, errors = [], []
+    for offset, statement_spans, error in analyze_text(text):
+        spans.extend((text[offset + start:offset + end], kind) for start, end, kind in statement_spans)
+        if error is not None:
+            (start, end, kind), message = error
+            assert kind == ERROR
+            errors.append((text[offset + start:offset + end], message))
+    return spans, errors
+
+
+def test_multi_line_statement_is_not_an_error():
+    spans, errors = get_spans('start: add $t0,\n  $t1,\n  $t2;\nj start;')
+    assert errors == []
+    assert spans == [
+        ('start', LABEL), ('add', MNEMONIC), ('$t0', REGISTER), ('$t1', REGISTER), ('$t2', REGISTER),
+        ('j', MNEMONIC), ('start', LABEL),
+    ]
+
+
+def test_error_covers_whole_statement():
+    _, errors = get_spans('nop;\naddi $t0,\n$t1,#70000;\nadd $t0,$t1,$t2')
+    assert errors == [('addi $t0,\n$t1,#70000', 'imm value 70000 of addi is out of range [-32768, 32767]')]
+
+
+def test_operands_are_classified_by_lexer():
+    spans, errors = get_spans('add $t0,[$t1+$t2],[12];\nsub $t0,[$zero],$t1;\n.asciiz "a, b";\n.word 0x10, -2')
+    assert errors == []
+    assert spans[1:5] == [('$t0', REGISTER), ('$t1', REGISTER), ('$t2', REGISTER), ('12', IMMEDIATE)]
+    assert spans[6:] == [
+        ('$t0', REGISTER), ('$zero', REGISTER), ('$t1', REGISTER), ('.asciiz', DIRECTIVE), ('"a, b"', STRING),
+        ('.word', DIRECTIVE), ('0x10', IMMEDIATE), ('-2', IMMEDIATE),
+    ]
+
+
+def test_invalid_operands_are_not_highlighted():
+    spans, errors = get_spans('add $t0,$t1,[-4]')
+    assert spans == [('add', MNEMONIC), ('$t0', REGISTER), ('$t1', REGISTER)]
+    assert len(errors) == 1
@@ -0,0 +1,63 @@
+import pytest
+
+from py_assembler.errors import Diagnostic
+from py_assembler.objfile import HEADER, read_object, write_object
+
+
+WORDS = [0x01095020, 0x08000002, 0xFFFFFFFF]
+SYMBOLS = {'main': 0, 'msg': 0x10010000}
+DIAGNOSTICS = [Diagnostic(2, 5, "Invalid register value", 'invalid-operands'), Diagnostic(None, None, 'x', 'y')]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'program.pyao')
+
+
+def test_words_round_trip(path):
+    write_object(path, WORDS)
+    with read_object(path) as obj:
+        assert (len(obj), list(obj.words), obj.lines) == (3, WORDS, None)
+        assert (obj.symbols, obj.data, obj.diagnostics) == ({}, b'', [])
+
+
+def test_all_sections_round_trip(path):
+    write_object(path, WORDS, [1, 2, 2], SYMBOLS, DIAGNOSTICS, b'\1\2\3', 0x10010004)
+    with read_object(path) as obj:
+        assert list(obj.words) == WORDS
+        assert list(obj.lines) == [1, 2, 2]
+        assert obj.symbols == SYMBOLS
+        assert (obj.data_address, obj.data) == (0x10010004, b'\1\2\3')
+        assert obj.diagnostics == DIAGNOSTICS
+
+
+def test_empty_object_round_trip(path):
+    write_object(path, [])
+    with read_object(path) as obj:
+        assert (len(obj), list(obj.words)) == (0, [])
+
+
+def test_lines_table_should_match_words(path):
+    with pytest.raises(ValueError, match='one entry per word'):
+        write_object(path, WORDS, [1])
+
+
+@pytest.mark.parametrize('size', [0, 4, HEADER.size - 1, HEADER.size, HEADER.size + 8 + 12, -1, -4, -8])
+def test_truncated_object_is_rejected(path, size):
+    write_object(path, WORDS, [1, 2, 3], SYMBOLS, DIAGNOSTICS, b'\1\2\3')
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:size])
+    with pytest.raises(ValueError, match='object file'):
+        with read_object(path) as obj:
+            obj.diagnostics
+
+
+@pytest.mark.parametrize('header', [b'XYZW', b'PYAO\x01\x00'])
+def test_bad_magic_or_version_is_rejected(path, header):
+    write_object(path, WORDS)
+    with open(path, 'r+b') as f:
+        f.write(header)
+    with pytest.raises(ValueError, match='Invalid object file'):
+        read_object(path)
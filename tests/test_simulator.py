@@ -0,0 +1,55 @@
+from py_assembler.hazards import LOAD_USE, RAW, analyze
+from py_assembler.parse import instructions_parser, program_parser
+from py_assembler.simulator import Memory, Simulator
+
+
+def run(text):
+    sim = Simulator(inst.enc.word for inst in instructions_parser(text))
+    sim.run()
+    return sim.registers
+
+
+def test_destination_is_first_operand():
+    regs = run('addi $t0,$zero,#5; add $t1,$t0,$t0; sub $t2,$t1,$t0; sll $t3,$t0,$zero,#2; lui $t4,#1')
+    assert (regs['t0'], regs['t1'], regs['t2'], regs['t3'], regs['t4']) == (5, 10, 5, 20, 1 << 16)
+
+
+def test_memory_and_mult_operands():
+    regs = run('addi $t0,$zero,#6; addi $t1,$zero,#7; mult $t2,$t0,$t1; sw $t2,$sp,#8; lw $t3,$sp,#8')
+    assert (regs['t2'], regs['t3']) == (42, 42)
+
+
+def test_branch_compares_first_operands():
+    regs = run('addi $t0,$zero,#3; loop: addi $t1,$t1,#1; bne $t1,$t0,loop')
+    assert regs['t1'] == 3
+
+
+def test_hazards_follow_operand_order():
+    words = [inst.enc.word for inst in instructions_parser(
+        'add $t2,$t0,$t1; add $t3,$t2,$t4; lw $t5,$t3,#0; add $t6,$t5,$t5'
+    )]
+    report = analyze(words)
+    assert [(h.kind, h.index, h.source, h.register) for h in report.hazards] == [
+        (RAW, 1, 0, 10), (RAW, 2, 1, 11), (LOAD_USE, 3, 2, 13)
+    ]
+    assert report.stalls_forwarding == [0, 0, 0, 1]
+
+
+def test_pseudo_instructions_write_first_operand():
+    regs = run('li $t0,#305419896; li $t1,#-3; move $t2,$t1; subi $t2,#2; subi $t3,$t0,#8; la $t4,0x10010004')
+    assert (regs['t0'], regs['t1'], regs['t2']) == (305419896, (-3) & 0xFFFFFFFF, (-5) & 0xFFFFFFFF)
+    assert (regs['t3'], regs['t4']) == (305419888, 0x10010004)
+
+
+def test_pseudo_branches_compare_in_written_order():
+    regs = run('li $t1,#3; loop: addi $t0,$t0,#1; blt $t0,$t1,loop; done: bgt $t0,$t1,done')
+    assert regs['t0'] == 3
+
+
+def test_program_data_is_loaded_into_memory():
+    program = program_parser('la $t1,val; lw $t0,$t1,#4;\n.data;\nval: .word 6, 7;')
+    memory = Memory()
+    memory.load(program.data, program.data_base)
+    sim = Simulator(program.words, memory)
+    sim.run()
+    assert sim.registers['t0'] == 7